@@ -31,12 +31,12 @@ from AlgorithmImports import *
 from datetime import timedelta, datetime
 import math
 from typing import Optional
-from experts.rsi_expert import RSIExpert
-from experts.macd_expert import MACDExpert
-from experts.trend_expert import TrendExpert
-from ensemble.brain import Brain
+from experts.registry import ModelRegistry
+from ensemble.pipeline import ScoringPipeline
 from risk.position_sizing import size_from_prob
 from features.feature_builder import build_features
+from features.snapshot import SnapshotError, dumps_snapshot, loads_snapshot
+from features.streaming import StreamingFeatureEngine
 from risk.guards import daily_pnl_stop_hit, indicators_ready
 
 
@@ -68,8 +68,8 @@ class ProbRSISkeleton(QCAlgorithm):
         self.RegisterIndicator(self.symbol, self.atr, self._consolidator)
         self.RegisterIndicator(self.symbol, self.bb, self._consolidator)
 
-        # Warm-up history to get indicators ready (sufficient bars for the longest indicator)
-        self.SetWarmUp(timedelta(days=30))
+        # Strategy features from the shared indicator library (same values as the bot and backtests)
+        self.engine = StreamingFeatureEngine()
 
         # Risk and execution parameters
         self.edge_size = 0.0025  # 0.25% equity position target (RSI baseline)
@@ -84,14 +84,26 @@ class ProbRSISkeleton(QCAlgorithm):
         self._start_of_day_equity = self.Portfolio.TotalPortfolioValue
         self._current_day = self.Time.date()
 
-        # Load tiny expert models from Object Store (placeholders for now)
-        # In QC Cloud, pass self.ObjectStore and keys like 'models/rsi_expert.json'
-        self.rsi_expert = RSIExpert.load(self.ObjectStore, "models/rsi_expert.json")
-        self.macd_expert = MACDExpert.load(self.ObjectStore, "models/macd_expert.json")
-        self.trend_expert = TrendExpert.load(self.ObjectStore, "models/trend_expert.json")
-
-        # Load ensemble brain (JSON model; falls back to average if missing)
-        self.brain = Brain.load(self.ObjectStore, "models/brain.json")
+        # Live restarts resume the shared-library features from the last snapshot; only
+        # LEAN's own indicators (not serializable) still need a short warm-up
+        self._snapshot_key = f"state/{self.symbol.Value}.json"
+        if self.LiveMode and self._restore_snapshot():
+            self.SetWarmUp(timedelta(days=5))
+        else:
+            # Warm-up history to get indicators ready (sufficient bars for the longest indicator)
+            self.SetWarmUp(timedelta(days=30))
+
+        # Tiny expert models + ensemble brain from Object Store (or local files), fused into
+        # one scoring graph (raises on unknown brain weights). Missing models fall back to
+        # 0.5 experts / an averaging brain. Reloaded in place when a model file changes.
+        self.models = ModelRegistry(self.ObjectStore)
+        self.models.register(
+            "scorer",
+            ["models/rsi_expert.json", "models/macd_expert.json", "models/trend_expert.json", "models/brain.json"],
+            lambda rsi, macd, trend, brain: ScoringPipeline({"rsi": rsi, "macd": macd, "trend": trend}, brain),
+        )
+        self._scorer_checked = False
+        self._model_errors = {}
 
         # Default: brain on for backtests (strict gate/cap to limit trades).
         self.use_brain = False  # Phase 1: Testing RSI enhancements
@@ -100,9 +112,15 @@ class ProbRSISkeleton(QCAlgorithm):
 
     # Consolidated bar handler (5-minute)
     def _on_five_minute_bar(self, bar: TradeBar) -> None:
+        # Feed the shared-library features first so they warm up with LEAN's
+        self.engine.update(bar.Time, float(bar.Open), float(bar.High), float(bar.Low), float(bar.Close), float(bar.Volume))
+
         # Safety: ensure indicators are ready and not warming up
         if self.IsWarmingUp:
             return
+        # One ObjectStore write per live bar; none for the bars replayed during warm-up
+        if self.LiveMode:
+            self._save_snapshot()
         if not indicators_ready(self.rsi, self.macd, self.atr, self.bb):
             return
 
@@ -123,12 +141,22 @@ class ProbRSISkeleton(QCAlgorithm):
         atr_value = float(self.atr.Current.Value)
         atr_pct = atr_value / price if price > 0 else 0.0
 
-        # Expert probabilities
-        expert_probs = {
-            "rsi": float(self.rsi_expert.predict_proba(features)),
-            "macd": float(self.macd_expert.predict_proba(features)),
-            "trend": float(self.trend_expert.predict_proba(features)),
-        }
+        # Expert and brain probabilities in one pass, from the current model version
+        if self.models.refresh():
+            self.Debug(f"Models reloaded (reload #{self.models.reloads})")
+            self._scorer_checked = False
+        if self.models.errors != self._model_errors:
+            self._model_errors = dict(self.models.errors)
+            if self._model_errors:
+                self.Debug(f"Model reload failed, keeping previous: {self._model_errors}")
+        scorer = self.models.get("scorer")
+        if not self._scorer_checked:
+            missing = scorer.missing_features(features)
+            if missing:
+                self.Debug(f"Scoring inputs not built (scored as 0.0): {missing}")
+            self._scorer_checked = True
+        scored = scorer.evaluate(features)
+        expert_probs = scored["experts"]
         self.Log(f"Experts p: {expert_probs}")
 
         invested = self.Portfolio[self.symbol].Invested
@@ -219,11 +247,7 @@ class ProbRSISkeleton(QCAlgorithm):
             return
 
         # --- Phase 3: Brain p->size mapping ---
-        regime = {
-            "volatility": float(atr_pct),
-            "time_of_day": features.get("time_of_day", 9.5),
-        }
-        p = float(self.brain.predict_proba(expert_probs, regime))
+        p = scored["p"]
         edge = abs(p - 0.5)
 
         # Strict gate: require meaningful edge
@@ -250,6 +274,30 @@ class ProbRSISkeleton(QCAlgorithm):
             self._last_entry_time = self.Time
 
     # Helpers
+    def _restore_snapshot(self) -> bool:
+        if not self.ObjectStore.ContainsKey(self._snapshot_key):
+            return False
+        try:
+            # Older than the short warm-up would leave a gap in the features
+            strategy = loads_snapshot(
+                self.ObjectStore.Read(self._snapshot_key), self.engine, self.symbol.Value,
+                now=self.Time, max_age=timedelta(days=5),
+            )
+        except SnapshotError as e:
+            self.Debug(f"Discarding feature snapshot: {e}")
+            return False
+        if strategy.get("last_entry_time"):
+            self._last_entry_time = datetime.fromisoformat(strategy["last_entry_time"])
+        self.Debug(f"Restored feature snapshot through {self.engine.last_timestamp}")
+        return True
+
+    def _save_snapshot(self) -> None:
+        strategy = {
+            "last_entry_time": self._last_entry_time.isoformat() if self._last_entry_time else None,
+            "trail_stop": float(self._stop_ticket.Get(OrderField.StopPrice)) if self._stop_ticket is not None else None,
+        }
+        self.ObjectStore.Save(self._snapshot_key, dumps_snapshot(self.engine, self.symbol.Value, strategy))
+
     def _enter_with_bracket(self, direction: int, qty: int, price: float, atr: float) -> None:
         # Market entry
         signed_qty = int(direction * qty)
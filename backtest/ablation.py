@@ -0,0 +1,160 @@
+"""
+Filter ablation: every on/off combination of the eight strategy filters.
+
+Each gate filter's pass/fail mask is computed once and packed into one
+``uint8`` per bar (bit ``i`` set = ``GATE_FILTERS[i]`` rejects the bar). A
+combination then needs only ``(fail_bits & enabled_bits) == 0`` to get its
+entry and exit masks, plus a choice between the fixed and dynamic RSI
+crossings and whether the trailing stop is active. All 2^8 = 256
+combinations run through ``simulate`` in seconds.
+
+A filter's marginal contribution is the average change in a metric when
+the filter is switched on, over the 128 pairs of combinations that differ
+only in that filter.
+
+Usage:
+    python -m backtest.ablation --source file --path data/{symbol}_1min.parquet --out ablation.csv
+"""
+
+import argparse
+from typing import Any, Dict, List, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from backtest.engine import (
+    EXIT_GATES,
+    FILTER_DEFAULTS,
+    FILTERS,
+    GATE_FILTERS,
+    TRAIL_ATR_MULT,
+    day_bounds,
+    filter_masks,
+    simulate,
+)
+from backtest.feature_store import FeatureSet
+from backtest.sweep import RESULT_METRICS, summary_metrics
+
+MARGINAL_METRICS = ("sharpe", "win_rate", "total_return_pct", "trade_count", "max_drawdown")
+
+
+def gate_fail_bits(masks: Dict[str, np.ndarray]) -> np.ndarray:
+    """Pack the gate pass masks into one byte per bar; bit i = ``GATE_FILTERS[i]`` fails."""
+    fail = np.zeros(len(masks["buy"]), dtype=np.uint8)
+    for i, name in enumerate(GATE_FILTERS):
+        fail |= (~masks[name]).astype(np.uint8) << i
+    return fail
+
+
+def combo_filters(combo: int) -> List[str]:
+    """Names of the filters switched on in ``combo`` (bit i = ``FILTERS[i]``)."""
+    return [name for i, name in enumerate(FILTERS) if combo >> i & 1]
+
+
+def run_ablation(df_feat: Union[pd.DataFrame, FeatureSet], initial_capital: float = 100000.0, **params: Any) -> pd.DataFrame:
+    """Backtest all 256 filter combinations.
+
+    Parameters
+    ----------
+    df_feat : pd.DataFrame or FeatureSet
+        Output of ``backtest.data.build_features``, or the same features
+        opened from the feature store.
+    **params
+        ``FILTER_DEFAULTS`` thresholds and ``simulate`` keyword arguments,
+        shared by every combination.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per combination (``combo`` bitmask, one boolean column per
+        filter, then ``RESULT_METRICS``), indexed by ``combo``.
+    """
+    thresholds = {k: params.pop(k) for k in list(params) if k in FILTER_DEFAULTS}
+    trail_atr_mult = params.pop("trail_atr_mult", TRAIL_ATR_MULT)
+    masks = filter_masks(df_feat, **thresholds)
+    fail = gate_fail_bits(masks)
+    bit = {name: np.uint8(1 << i) for i, name in enumerate(GATE_FILTERS)}
+
+    close = np.asarray(df_feat["close"], dtype=float)
+    atr = np.asarray(df_feat["atr"], dtype=float)
+    times_ns = df_feat.index.as_unit("ns").asi8
+    day_id, day_start, next_day_start = day_bounds(df_feat.index)
+
+    rows = []
+    for combo in range(1 << len(FILTERS)):
+        enabled = combo_filters(combo)
+        entry_bits = np.uint8(sum(int(bit[f]) for f in enabled if f in bit))
+        exit_bits = np.uint8(sum(int(bit[f]) for f in enabled if f in EXIT_GATES))
+        dynamic = "dynamic_rsi" in enabled
+        entry_ok = ((fail & entry_bits) == 0) & masks["buy_dynamic" if dynamic else "buy"]
+        exit_ok = ((fail & exit_bits) == 0) & masks["sell_dynamic" if dynamic else "sell"]
+        trailing = "trailing_stop" in enabled
+        trades, equity = simulate(
+            close,
+            times_ns,
+            day_id,
+            day_start,
+            next_day_start,
+            entry_ok,
+            exit_ok,
+            initial_capital=initial_capital,
+            atr=atr if trailing else None,
+            trail_atr_mult=trail_atr_mult if trailing else None,
+            **params,
+        )
+        metrics = summary_metrics(trades, equity, initial_capital)
+        rows.append({"combo": combo, **{f: f in enabled for f in FILTERS}, **{m: metrics[m] for m in RESULT_METRICS}})
+    return pd.DataFrame(rows).set_index("combo")
+
+
+def marginal_contributions(table: pd.DataFrame, metrics: Sequence[str] = MARGINAL_METRICS) -> pd.DataFrame:
+    """Average change in each metric from switching each filter on.
+
+    Returns one row per filter with ``<metric>_delta`` (mean over the pairs
+    of combinations differing only in that filter) and ``sharpe_improved``
+    (fraction of those pairs where Sharpe went up).
+    """
+    combos = table.index.to_numpy()
+    rows = []
+    for i, name in enumerate(FILTERS):
+        on = combos[combos >> i & 1 == 1]
+        off = on ^ (1 << i)
+        row: Dict[str, Any] = {"filter": name}
+        for m in metrics:
+            delta = table.loc[on, m].to_numpy(dtype=float) - table.loc[off, m].to_numpy(dtype=float)
+            row[f"{m}_delta"] = float(np.nanmean(delta))
+        row["sharpe_improved"] = float(np.mean(table.loc[on, "sharpe"].to_numpy() > table.loc[off, "sharpe"].to_numpy()))
+        rows.append(row)
+    return pd.DataFrame(rows).set_index("filter")
+
+
+def main() -> None:
+    from backtest.data import add_source_args
+    from backtest.feature_store import add_store_args, load_features
+
+    parser = argparse.ArgumentParser(description="Ablation over all combinations of the strategy filters")
+    add_source_args(parser)
+    add_store_args(parser)
+    parser.add_argument("--capital", type=float, default=100000.0)
+    parser.add_argument("--out", default="ablation.csv", help="Per-combination results table (CSV)")
+    args = parser.parse_args()
+
+    table = run_ablation(load_features(args), initial_capital=args.capital)
+    table.to_csv(args.out)
+
+    print("\n" + "=" * 60)
+    print("TOP 10 COMBINATIONS BY SHARPE")
+    print("=" * 60)
+    top = table.sort_values("sharpe", ascending=False).head(10)
+    for combo, row in top.iterrows():
+        print(f"{row['sharpe']:>7.2f}  win {row['win_rate']:.1%}  trades {row['trade_count']:>5.0f}  "
+              f"{'+'.join(combo_filters(combo)) or '(none)'}")
+
+    print("\n" + "=" * 60)
+    print("MARGINAL CONTRIBUTION PER FILTER")
+    print("=" * 60)
+    print(marginal_contributions(table).to_string(float_format=lambda v: f"{v:.3f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,397 @@
+"""
+Pluggable bar sources and the shared research feature pipeline.
+
+A ``BarSource`` yields raw OHLCV bars (minute or 5-minute) for one symbol;
+``load_bars`` normalises timestamps to exchange time, keeps the regular
+session, and resamples to the backtest bar size; ``build_features`` turns
+those bars into the frame ``backtest.engine.backtest_rsi`` expects. The
+same pipeline runs whether bars come from QuantConnect Research, local
+CSV/Parquet files, or the live bot's ``BarStore`` cache, so backtests can
+run on any machine.
+
+Minute sources are read in calendar chunks (a month by default) and
+aggregated with ``market_data.resample.StreamingResampler``, which carries
+the unfinished bar over each chunk boundary, so peak memory follows the
+chunk size rather than the span. ``stream_bars`` can also hand every batch
+of finished bars to a sink instead of collecting them, e.g. to fill the
+bot's ``BarStore`` cache with 5- and 15-minute bars:
+
+    python -m backtest.data --source file --path data/{symbol}_1min.csv --cache-dir .bar_cache
+
+Usage:
+    source = FileSource("data/{symbol}_1min.parquet", bar_minutes=1)
+    df5 = load_bars(source, "TSLA", datetime(2020, 1, 1), datetime(2024, 12, 31))
+    df_feat = build_features(df5)
+"""
+
+import argparse
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence, Union
+
+import pandas as pd
+
+from features import indicators
+from market_data.bar_store import COLUMNS, BarStore
+from market_data.resample import StreamingResampler
+
+EXCHANGE_TZ = "US/Eastern"
+# Rows per read when streaming a file (about two months of minute bars)
+FILE_CHUNK_ROWS = 50_000
+
+
+def to_exchange_time(df: pd.DataFrame) -> pd.DataFrame:
+    """Return ``df`` with a sorted, tz-naive US/Eastern index (QuantConnect convention)."""
+    index = pd.DatetimeIndex(df.index)
+    if index.tz is not None:
+        index = index.tz_convert(EXCHANGE_TZ).tz_localize(None)
+    out = df.copy()
+    out.index = index.rename("timestamp")
+    return out.sort_index()
+
+
+def _timeframe_minutes(timeframe: str) -> int:
+    return int(pd.Timedelta(timeframe.replace("Min", "min")).total_seconds() // 60)
+
+
+class BarSource:
+    """Base class: ``load`` returns OHLCV bars of ``bar_minutes`` for one symbol.
+
+    Bars are labelled by their start time; sources that already exclude
+    extended hours set ``regular_hours_only``.
+    """
+
+    bar_minutes = 1
+    regular_hours_only = False
+
+    def load(self, symbol: str, start: datetime, end: datetime) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def describe(self) -> str:
+        """Short identity of where the bars come from (used to key cached features)."""
+        return type(self).__name__
+
+    def fingerprint(self, symbol: str) -> str:
+        """Cheap token that changes when ``symbol``'s bars change (empty for immutable sources)."""
+        return ""
+
+    def iter_chunks(self, symbol: str, start: datetime, end: datetime, chunk: str = "MS") -> Iterator[pd.DataFrame]:
+        """Yield the bars of ``[start, end]`` in time order, one ``load`` per calendar ``chunk``."""
+        edges = [pd.Timestamp(start)]
+        edges += [t for t in pd.date_range(start, end, freq=chunk) if t > edges[0]]
+        for i, lo in enumerate(edges):
+            if i + 1 < len(edges):
+                hi = edges[i + 1] - pd.Timedelta(1, "ns")
+            else:
+                hi = pd.Timestamp(end)
+            yield self.load(symbol, lo, hi)
+
+
+class FileSource(BarSource):
+    """Bars from local CSV or Parquet files.
+
+    Parameters
+    ----------
+    path : str or Path
+        File path; ``{symbol}`` is substituted, e.g. ``data/{symbol}_1min.parquet``.
+        ``.parquet``/``.pq`` files are read with ``pd.read_parquet``, anything
+        else with ``pd.read_csv``.
+    bar_minutes : int
+        Bar size stored in the files (1 for minute bars).
+    timestamp_column : str
+        Column holding bar timestamps; ignored if the file's index already
+        is a DatetimeIndex (Parquet written from a DataFrame).
+    """
+
+    def __init__(self, path: Union[str, Path], bar_minutes: int = 1, timestamp_column: str = "timestamp"):
+        self.path = str(path)
+        self.bar_minutes = bar_minutes
+        self.timestamp_column = timestamp_column
+
+    def describe(self) -> str:
+        return f"file:{self.path}:{self.bar_minutes}"
+
+    def fingerprint(self, symbol: str) -> str:
+        try:
+            st = self._file(symbol).stat()
+        except OSError:
+            return "missing"
+        return f"mtime={st.st_mtime_ns}:size={st.st_size}"
+
+    def _file(self, symbol: str) -> Path:
+        return Path(self.path.format(symbol=symbol))
+
+    def _normalise(self, df: pd.DataFrame) -> pd.DataFrame:
+        df.columns = [str(c).lower() for c in df.columns]
+        if not isinstance(df.index, pd.DatetimeIndex):
+            df = df.set_index(pd.to_datetime(df.pop(self.timestamp_column)))
+        return to_exchange_time(df[list(COLUMNS)].astype(float))
+
+    def load(self, symbol: str, start: datetime, end: datetime) -> pd.DataFrame:
+        fp = self._file(symbol)
+        if fp.suffix.lower() in (".parquet", ".pq"):
+            df = pd.read_parquet(fp)
+        else:
+            df = pd.read_csv(fp)
+        return self._normalise(df).loc[start:end]
+
+    def iter_chunks(self, symbol: str, start: datetime, end: datetime, chunk: str = "MS") -> Iterator[pd.DataFrame]:
+        """Read the file sequentially in ``FILE_CHUNK_ROWS`` blocks (rows must be in time order).
+
+        Files hold the whole span, so they are cut by rows rather than by
+        ``chunk``; the resampler does not need aligned chunks.
+        """
+        fp = self._file(symbol)
+        if fp.suffix.lower() in (".parquet", ".pq"):
+            import pyarrow.parquet as pq
+
+            blocks = (b.to_pandas() for b in pq.ParquetFile(fp).iter_batches(batch_size=FILE_CHUNK_ROWS))
+        else:
+            blocks = pd.read_csv(fp, chunksize=FILE_CHUNK_ROWS)
+        for block in blocks:
+            df = self._normalise(block)
+            if len(df) and df.index[0] > pd.Timestamp(end):
+                break
+            yield df.loc[start:end]
+
+
+class BarCacheSource(BarSource):
+    """Bars from the live bot's on-disk ``BarStore`` (``--cache-dir``)."""
+
+    def __init__(self, root: Union[str, Path] = ".bar_cache", feed: str = "iex", timeframe: str = "5Min"):
+        self.root = root
+        self.feed = feed
+        self.timeframe = timeframe
+        self.bar_minutes = _timeframe_minutes(timeframe)
+
+    def describe(self) -> str:
+        return f"cache:{Path(self.root).resolve()}:{self.feed}:{self.timeframe}"
+
+    def fingerprint(self, symbol: str) -> str:
+        # The cache only grows, so its length and last bar identify its contents
+        store = BarStore(self.root, symbol, feed=self.feed, timeframe=self.timeframe)
+        return f"rows={len(store)}:last={store.last_timestamp}"
+
+    def load(self, symbol: str, start: datetime, end: datetime) -> pd.DataFrame:
+        df = BarStore(self.root, symbol, feed=self.feed, timeframe=self.timeframe).read()
+        return to_exchange_time(df).loc[start:end]
+
+
+class QuantBookSource(BarSource):
+    """Minute bars from ``QuantBook.History`` (QuantConnect Research only)."""
+
+    regular_hours_only = True
+
+    def __init__(self, qb: Any):
+        self.qb = qb
+
+    def describe(self) -> str:
+        return "quantbook"
+
+    def load(self, symbol: str, start: datetime, end: datetime) -> pd.DataFrame:
+        from AlgorithmImports import Resolution
+
+        sym = self.qb.AddEquity(symbol, Resolution.Minute).Symbol
+        hist = self.qb.History(sym, start=start, end=end, resolution=Resolution.Minute)
+        return to_exchange_time(hist.loc[sym][list(COLUMNS)])
+
+
+def add_source_args(parser: argparse.ArgumentParser) -> None:
+    """Add the bar-source and date-range options shared by research scripts."""
+    parser.add_argument("--source", choices=["quantbook", "file", "cache"], default=None,
+                        help="Bar source (default: quantbook inside QC Research, else cache)")
+    parser.add_argument("--path", default=None, help="CSV/Parquet path for --source file; {symbol} is substituted")
+    parser.add_argument("--bar-minutes", type=int, default=1, help="Bar size stored in --path files")
+    parser.add_argument("--cache-dir", default=".bar_cache", help="Bot bar cache root for --source cache")
+    parser.add_argument("--feed", default="iex", help="Bar cache feed for --source cache")
+    parser.add_argument("--symbol", default="TSLA")
+    parser.add_argument("--start", default="2020-01-01")
+    parser.add_argument("--end", default="2024-12-31")
+    parser.add_argument("--chunk", default="MS",
+                        help="Calendar chunk for streaming minute bars (pandas frequency, e.g. MS or D; 'none' loads at once)")
+
+
+def source_from_args(args: argparse.Namespace, qb: Optional[Any] = None) -> BarSource:
+    """Build the ``BarSource`` selected by ``add_source_args`` options."""
+    name = args.source or ("quantbook" if qb is not None else "cache")
+    if name == "quantbook":
+        if qb is None:
+            raise ValueError("--source quantbook is only available inside QuantConnect Research")
+        return QuantBookSource(qb)
+    if name == "file":
+        if not args.path:
+            raise ValueError("--source file requires --path")
+        return FileSource(args.path, bar_minutes=args.bar_minutes)
+    return BarCacheSource(args.cache_dir, feed=args.feed)
+
+
+def chunk_from_args(args: argparse.Namespace) -> Optional[str]:
+    """``--chunk`` as a ``load_bars`` argument (``None`` for 'none')."""
+    return None if str(args.chunk).lower() == "none" else args.chunk
+
+
+def resample_ohlcv(df: pd.DataFrame, rule: str = "5min") -> pd.DataFrame:
+    """Aggregate OHLCV bars to ``rule``; empty buckets are dropped."""
+    return df.resample(rule).agg({
+        "open": "first",
+        "high": "max",
+        "low": "min",
+        "close": "last",
+        "volume": "sum",
+    }).dropna()
+
+
+def stream_bars(
+    source: BarSource,
+    symbol: str,
+    start: datetime,
+    end: datetime,
+    rules: Sequence[str] = ("5min", "15min"),
+    chunk: str = "MS",
+    regular_hours: bool = True,
+    sink: Optional[Callable[[str, pd.DataFrame], None]] = None,
+) -> Dict[str, pd.DataFrame]:
+    """Resample ``symbol`` to every bar size in ``rules`` one source chunk at a time.
+
+    Parameters
+    ----------
+    rules : sequence of str
+        Target bar sizes (pandas offsets, multiples of ``source.bar_minutes``).
+    chunk : str
+        Calendar chunk passed to ``BarSource.iter_chunks`` (``"MS"`` month,
+        ``"D"`` day).
+    sink : callable, optional
+        Called as ``sink(rule, bars)`` with each batch of finished bars. When
+        given, nothing is collected and the returned frames are empty, so
+        memory stays bounded by the chunk size.
+
+    Returns
+    -------
+    dict of str -> pd.DataFrame
+        Bars per rule in exchange time (empty if ``sink`` is given).
+    """
+    for rule in rules:
+        minutes = _timeframe_minutes(rule)
+        if source.bar_minutes > minutes or minutes % source.bar_minutes:
+            raise ValueError(f"Cannot build {rule} bars from {source.bar_minutes}-minute bars")
+    resampler = StreamingResampler(rules)
+    parts: Dict[str, list] = {rule: [] for rule in rules}
+
+    def emit(batches: Dict[str, pd.DataFrame]) -> None:
+        for rule, bars in batches.items():
+            if bars.empty:
+                continue
+            if sink is not None:
+                sink(rule, bars)
+            else:
+                parts[rule].append(bars)
+
+    last = None
+    for df in source.iter_chunks(symbol, start, end, chunk):
+        if regular_hours and not source.regular_hours_only:
+            df = df.between_time("09:30", "16:00", inclusive="left")
+        if last is not None:
+            # Sources whose windows share an edge may repeat the boundary bar
+            df = df[df.index > last]
+        if df.empty:
+            continue
+        last = df.index[-1]
+        emit(resampler.push(df))
+    emit(resampler.flush())
+
+    return {
+        rule: pd.concat(parts[rule]) if parts[rule] else pd.DataFrame(columns=list(COLUMNS), dtype=float)
+        for rule in rules
+    }
+
+
+def store_sink(root: Union[str, Path], symbol: str, feed: str = "iex") -> Callable[[str, pd.DataFrame], None]:
+    """``stream_bars`` sink appending each bar size to the bot's ``BarStore`` (e.g. ``5min`` -> ``5Min``)."""
+    stores: Dict[str, BarStore] = {}
+
+    def write(rule: str, bars: pd.DataFrame) -> None:
+        if rule not in stores:
+            timeframe = f"{_timeframe_minutes(rule)}Min"
+            stores[rule] = BarStore(root, symbol, feed=feed, timeframe=timeframe)
+        index = bars.index if bars.index.tz is not None else bars.index.tz_localize(EXCHANGE_TZ)
+        stores[rule].append(bars.set_axis(index))
+
+    return write
+
+
+def load_bars(
+    source: BarSource,
+    symbol: str,
+    start: datetime,
+    end: datetime,
+    bar_minutes: int = 5,
+    regular_hours: bool = True,
+    chunk: Optional[str] = "MS",
+) -> pd.DataFrame:
+    """Load ``symbol`` from ``source`` as ``bar_minutes`` bars in exchange time.
+
+    Finer source bars are streamed through ``stream_bars`` in ``chunk``
+    pieces; ``chunk=None`` loads the whole span at once instead.
+    """
+    if source.bar_minutes > bar_minutes or bar_minutes % source.bar_minutes:
+        raise ValueError(f"Cannot build {bar_minutes}-minute bars from {source.bar_minutes}-minute bars")
+    if chunk is not None and source.bar_minutes != bar_minutes:
+        rule = f"{bar_minutes}min"
+        return stream_bars(source, symbol, start, end, rules=[rule], chunk=chunk, regular_hours=regular_hours)[rule]
+    df = source.load(symbol, start, end)
+    if regular_hours and not source.regular_hours_only:
+        df = df.between_time("09:30", "16:00", inclusive="left")
+    if source.bar_minutes != bar_minutes:
+        df = resample_ohlcv(df, f"{bar_minutes}min")
+    return df
+
+
+# Columns of the backtest feature frame, in order
+BACKTEST_FEATURES = ["close", "rsi", "atr", "atr_pct", "vol_z", "volm_z", "time_of_day", "ema200_rel", "bb_z", "rsi_15m"]
+
+
+def build_features(df5: pd.DataFrame) -> pd.DataFrame:
+    """Compute the backtest feature frame (the ``BACKTEST_FEATURES`` columns) from OHLCV bars.
+
+    Uses the shared ``features.indicators`` kernels, so every value equals
+    what the live bot computes for the same bar; bars before all
+    indicators are warm are dropped.
+    """
+    feats = indicators.compute_features(
+        df5["open"].to_numpy(dtype=float),
+        df5["high"].to_numpy(dtype=float),
+        df5["low"].to_numpy(dtype=float),
+        df5["close"].to_numpy(dtype=float),
+        df5["volume"].to_numpy(dtype=float),
+        pd.DatetimeIndex(df5.index),
+    )
+    df_feat = pd.DataFrame({c: feats[c] for c in BACKTEST_FEATURES}, index=df5.index)
+    return df_feat.dropna()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stream minute bars into the bot's 5- and 15-minute bar cache")
+    add_source_args(parser)
+    parser.add_argument("--rules", default="5min,15min", help="Bar sizes to write (comma-separated)")
+    args = parser.parse_args()
+    if args.source in (None, "cache"):
+        parser.error("--source must be file or quantbook (the cache is the destination)")
+
+    chunk = chunk_from_args(args) or "MS"
+    rules = [r.strip() for r in args.rules.split(",") if r.strip()]
+    stream_bars(
+        source_from_args(args),
+        args.symbol,
+        datetime.fromisoformat(args.start),
+        datetime.fromisoformat(args.end),
+        rules=rules,
+        chunk=chunk,
+        sink=store_sink(args.cache_dir, args.symbol, feed=args.feed),
+    )
+    for rule in rules:
+        store = BarStore(args.cache_dir, args.symbol, feed=args.feed, timeframe=f"{_timeframe_minutes(rule)}Min")
+        print(f"[BARS] {args.symbol} {rule}: {len(store)} bars in {store.path}")
+
+
+if __name__ == "__main__":
+    main()
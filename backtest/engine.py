@@ -0,0 +1,465 @@
+"""
+Array-based RSI backtest engine.
+
+Replaces the per-bar ``iterrows`` loop of ``backtest_phase1_comparison.py``
+with the same strategy rules evaluated on NumPy arrays:
+
+- Filter and threshold logic (Phase 1 time/volatility/volume filters,
+  Phase 2 dynamic thresholds, trend and Bollinger filters, Phase 3 15-min
+  RSI) becomes one pass/fail mask per filter, combined into two boolean
+  masks, ``entry_ok`` and ``exit_ok``, once per run.
+- Trade pairing jumps from signal to signal: the next entry is the first
+  ``entry_ok`` bar that can afford at least one share, and the exit is the
+  first ``exit_ok`` bar past the minimum hold (``searchsorted`` on bar
+  times), unless the daily stop (or trailing stop) fires earlier inside the
+  holding window.
+- Only the position/capital recurrence is a Python loop, and it runs once
+  per trade rather than once per bar.
+
+The equity curve is filled into a preallocated array segment by segment.
+Results (trade list, equity values and metrics) are identical to the
+original loop.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backtest.intrabar import STOP, TAKE_PROFIT, IntrabarBars
+
+FEATURE_COLUMNS = ["close", "rsi", "atr", "vol_z", "volm_z", "time_of_day", "ema200_rel", "bb_z", "rsi_15m"]
+
+TRAIL_ATR_MULT = 1.5  # Phase 3.1 trailing distance, as in the live bot
+LIVE_BRACKET = {"stop_atr_mult": 1.0, "tp_atr_mult": 2.0}  # Bracket the live bot submits with each entry
+
+_NS_PER_MINUTE = 60 * 1_000_000_000
+
+
+# Filter thresholds (the values the Phase 1/2 comparison was run with)
+FILTER_DEFAULTS = {
+    "tod_start": 10.0,           # Phase 1: trade 10:00-15:30 only
+    "tod_end": 15.5,
+    "vol_z_min": 0.5,            # Phase 1: volatility regime
+    "volm_z_min": 1.0,           # Phase 1: volume confirmation (entries)
+    "rsi_buy": 25.0,             # Fixed / normal-volatility thresholds
+    "rsi_sell": 75.0,
+    "vol_z_high": 1.0,           # Phase 2: dynamic thresholds by vol_z regime
+    "vol_z_low": -0.5,
+    "rsi_buy_high_vol": 30.0,
+    "rsi_sell_high_vol": 70.0,
+    "rsi_buy_low_vol": 20.0,
+    "rsi_sell_low_vol": 80.0,
+    "ema200_rel_min": -0.05,     # Phase 2: trend filter (fraction, not percent)
+    "bb_z_max": -0.8,            # Phase 2: Bollinger confirmation
+    "rsi_15m_max": 50.0,         # Phase 3.2: 15-min RSI must not be bullish
+}
+
+# The eight strategy filters, grouped by the phase that introduced them.
+# "Gate" filters are per-bar pass/fail masks; "time_of_day" and "vol_z" gate
+# exits as well as entries. "dynamic_rsi" swaps the RSI thresholds and
+# "trailing_stop" adds an exit rule in ``simulate``.
+FILTERS = [
+    "time_of_day",
+    "vol_z",
+    "volm_z",
+    "dynamic_rsi",
+    "ema200_trend",
+    "bb",
+    "rsi_15m",
+    "trailing_stop",
+]
+PHASE_FILTERS = {
+    1: ("time_of_day", "vol_z", "volm_z"),
+    2: ("dynamic_rsi", "ema200_trend", "bb"),
+    3: ("rsi_15m", "trailing_stop"),
+}
+GATE_FILTERS = ["time_of_day", "vol_z", "volm_z", "ema200_trend", "bb", "rsi_15m"]
+EXIT_GATES = ("time_of_day", "vol_z")
+
+
+def filter_masks(df, **thresholds) -> Dict[str, np.ndarray]:
+    """Per-filter boolean arrays for every bar of ``df``.
+
+    ``df`` is a DataFrame or any mapping of column name to array. Gate
+    filters map to pass masks (True = the filter lets the bar through);
+    ``buy``/``sell`` and ``buy_dynamic``/``sell_dynamic`` are the RSI
+    threshold crossings with fixed and volatility-dependent thresholds.
+    Gates whose feature column is missing are omitted. Keyword arguments
+    override ``FILTER_DEFAULTS``.
+    """
+    unknown = set(thresholds) - set(FILTER_DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown filter parameter(s): {sorted(unknown)}")
+    p = {**FILTER_DEFAULTS, **thresholds}
+
+    def col(name):
+        return np.asarray(df[name], dtype=float)
+
+    rsi = col("rsi")
+    vol_z = col("vol_z")
+    high, low = vol_z > p["vol_z_high"], vol_z < p["vol_z_low"]
+    buy_dyn = np.where(high, p["rsi_buy_high_vol"], np.where(low, p["rsi_buy_low_vol"], p["rsi_buy"]))
+    sell_dyn = np.where(high, p["rsi_sell_high_vol"], np.where(low, p["rsi_sell_low_vol"], p["rsi_sell"]))
+    masks = {
+        "buy": rsi < float(p["rsi_buy"]),
+        "sell": rsi > float(p["rsi_sell"]),
+        "buy_dynamic": rsi < buy_dyn,
+        "sell_dynamic": rsi > sell_dyn,
+        "vol_z": ~(vol_z < p["vol_z_min"]),
+    }
+    gates = {
+        "time_of_day": ("time_of_day", lambda x: ~((x < p["tod_start"]) | (x > p["tod_end"]))),
+        "volm_z": ("volm_z", lambda x: ~(x < p["volm_z_min"])),
+        "ema200_trend": ("ema200_rel", lambda x: ~(x < p["ema200_rel_min"])),
+        "bb": ("bb_z", lambda x: ~(x > p["bb_z_max"])),
+        "rsi_15m": ("rsi_15m", lambda x: ~(x >= p["rsi_15m_max"])),
+    }
+    for name, (column, passes) in gates.items():
+        try:
+            masks[name] = passes(col(column))
+        except KeyError:
+            continue
+    return masks
+
+
+def combine_masks(masks: Dict[str, np.ndarray], enabled) -> Tuple[np.ndarray, np.ndarray]:
+    """(entry_ok, exit_ok) from ``filter_masks`` output with the ``enabled`` filters applied."""
+    enabled = set(enabled)
+    dynamic = "dynamic_rsi" in enabled
+    tradable = np.ones(len(masks["buy"]), dtype=bool)
+    for name in EXIT_GATES:
+        if name in enabled:
+            tradable &= masks[name]
+    exit_ok = tradable & masks["sell_dynamic" if dynamic else "sell"]
+    entry_ok = tradable & masks["buy_dynamic" if dynamic else "buy"]
+    for name in GATE_FILTERS:
+        if name in enabled and name not in EXIT_GATES:
+            entry_ok &= masks[name]
+    return entry_ok, exit_ok
+
+
+def enabled_filters(phase1_filters: bool = False, phase2_enhancements: bool = False, phase3_enhancements: bool = False) -> List[str]:
+    """Filter names switched on by the phase flags."""
+    flags = {1: phase1_filters, 2: phase2_enhancements, 3: phase3_enhancements}
+    return [f for phase, on in flags.items() if on for f in PHASE_FILTERS[phase]]
+
+
+def signal_masks(
+    df,
+    phase1_filters: bool = False,
+    phase2_enhancements: bool = False,
+    phase3_enhancements: bool = False,
+    **thresholds,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Return boolean (entry_ok, exit_ok) arrays for every bar of ``df``.
+
+    ``entry_ok`` marks bars where a flat book would buy (before sizing),
+    ``exit_ok`` bars where an open position may be sold (before the
+    minimum hold check). Keyword arguments override ``FILTER_DEFAULTS``.
+    """
+    masks = filter_masks(df, **thresholds)
+    return combine_masks(masks, enabled_filters(phase1_filters, phase2_enhancements, phase3_enhancements))
+
+
+def day_bounds(index: pd.DatetimeIndex) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Per-bar calendar day id, index of the day's first bar and of the next day's first bar."""
+    days = index.normalize().asi8
+    n = len(days)
+    is_first = np.empty(n, dtype=bool)
+    if n:
+        is_first[0] = True
+        is_first[1:] = days[1:] != days[:-1]
+    starts = np.flatnonzero(is_first)
+    day_id = np.cumsum(is_first) - 1
+    day_start = starts[day_id]
+    next_start = np.append(starts[1:], n)[day_id]
+    return day_id, day_start, next_start
+
+
+def simulate(
+    close: np.ndarray,
+    times_ns: np.ndarray,
+    day_id: np.ndarray,
+    day_start: np.ndarray,
+    next_day_start: np.ndarray,
+    entry_ok: np.ndarray,
+    exit_ok: np.ndarray,
+    initial_capital: float = 100000.0,
+    position_size_pct: float = 0.0025,
+    min_hold_minutes: float = 30,
+    daily_stop_pct: float = -0.01,
+    commission_bps: float = 0.5,
+    slippage_bps: float = 2.0,
+    atr: Optional[np.ndarray] = None,
+    trail_atr_mult: Optional[float] = None,
+    stop_atr_mult: Optional[float] = None,
+    tp_atr_mult: Optional[float] = None,
+    intrabar: Optional[IntrabarBars] = None,
+) -> Tuple[List[tuple], np.ndarray]:
+    """Run the position/capital state machine over precomputed signals.
+
+    With ``trail_atr_mult`` (and ``atr``) set, an open position also carries
+    the live bot's Phase 3.1 trailing stop: after each profitable bar close
+    the stop ratchets up to ``close - trail_atr_mult * atr`` (at least
+    breakeven). Without ``intrabar`` the position is sold at the first later
+    close at or below it; exit precedence within a bar is daily stop,
+    trailing stop, RSI exit.
+
+    With ``intrabar`` the bot's bracket is simulated too: a stop at
+    ``close - stop_atr_mult * atr`` and a take-profit at
+    ``close + tp_atr_mult * atr`` of the entry bar (either may be None).
+    Stop, trail and take-profit fill inside the bar at the first minute that
+    touches them, so they take precedence over close-based exits in the
+    same bar; stops pay slippage, the take-profit limit does not.
+
+    Returns
+    -------
+    trades : list of tuple
+        ``(entry_idx, exit_idx, entry_price, exit_price, shares, pnl, reason)``.
+    equity : np.ndarray
+        Pre-trade equity at every bar (same length as ``close``).
+    """
+    n = len(close)
+    equity = np.empty(n)
+    trades: List[tuple] = []
+    if n == 0:
+        return trades, equity
+
+    buy_mult = 1 + slippage_bps / 10000
+    sell_mult = 1 - slippage_bps / 10000
+    comm_rate = commission_bps / 10000
+    min_hold_ns = int(round(min_hold_minutes * _NS_PER_MINUTE))
+
+    entry_idx = np.flatnonzero(entry_ok)
+    exit_idx = np.flatnonzero(exit_ok)
+    exit_times = times_ns[exit_idx]
+
+    capital = initial_capital
+    sod_day, sod = -1, capital  # start-of-day equity for the daily stop
+    i = 0  # first bar not yet simulated
+    while i < n:
+        # Flat: first entry signal that buys at least one share
+        target = capital * position_size_pct
+        k = int(np.searchsorted(entry_idx, i))
+        chunk = 64
+        e = -1
+        while k < len(entry_idx):
+            cand = entry_idx[k:k + chunk]
+            shares = np.floor(target / (close[cand] * buy_mult))
+            hit = np.flatnonzero(shares >= 1)
+            if hit.size:
+                e = int(cand[hit[0]])
+                shares_e = int(shares[hit[0]])
+                break
+            k += chunk
+            chunk *= 2
+        if e < 0:
+            break
+        equity[i:e + 1] = capital
+        if day_id[e] != sod_day:
+            sod_day, sod = day_id[e], capital
+
+        entry_price = close[e] * buy_mult
+        entry_value = shares_e * entry_price
+        capital -= entry_value + entry_value * comm_rate
+        held = capital
+
+        # Long: first exit signal past the minimum hold, unless the daily stop fires first
+        q = int(np.searchsorted(exit_times, times_ns[e] + min_hold_ns))
+        j = int(exit_idx[q]) if q < len(exit_idx) else n
+        last = min(j, n - 1)
+        x, reason = last, "rsi_exit" if j < n else "end_of_test"
+        exit_fill = None
+        if last > e:
+            w = slice(e + 1, last + 1)
+            eq = held + shares_e * close[w]
+            sod_w = np.where(day_id[w] == sod_day, sod, held + shares_e * close[day_start[w]])
+            stop = np.flatnonzero((eq - sod_w) / sod_w <= daily_stop_pct)
+            if stop.size:
+                x, reason = e + 1 + int(stop[0]), "daily_stop"
+            if intrabar is not None and (trail_atr_mult or stop_atr_mult or tp_atr_mult):
+                touch = _bracket_exit(
+                    e, x, close, atr, entry_price, intrabar, stop_atr_mult, tp_atr_mult, trail_atr_mult
+                )
+                if touch is not None:
+                    x, reason, exit_fill = touch
+            elif trail_atr_mult is not None and x > e + 1:
+                c = close[e + 1:x + 1]
+                candidate = np.where(
+                    c > entry_price,
+                    np.maximum(c - trail_atr_mult * atr[e + 1:x + 1], entry_price - 0.01),
+                    -np.inf,
+                )
+                level = np.maximum.accumulate(candidate)
+                hit = np.flatnonzero(c[1:] <= level[:-1])
+                if hit.size and (e + 2 + int(hit[0]) < x or reason != "daily_stop"):
+                    x, reason = e + 2 + int(hit[0]), "trail_stop"
+            equity[e + 1:x + 1] = eq[:x - e]
+        if day_id[x] != sod_day:
+            sod_day, sod = day_id[x], held + shares_e * close[day_start[x]]
+
+        if exit_fill is None:
+            exit_price = close[x] * sell_mult
+        elif reason == "take_profit":
+            exit_price = exit_fill
+        else:
+            exit_price = exit_fill * sell_mult
+        exit_value = shares_e * exit_price
+        commission = exit_value * comm_rate
+        capital = held + (exit_value - commission)
+        pnl = (exit_price - entry_price) * shares_e - commission
+        if exit_fill is not None:
+            # Filled before this bar's close: the book is already flat at the close
+            equity[x] = capital
+        trades.append((e, x, entry_price, exit_price, shares_e, pnl, reason))
+        if reason == "end_of_test":
+            return trades, equity
+
+        i = x + 1
+        # A realised loss can leave the (flat) book below the daily stop for the rest of the day
+        if i < n and day_id[i] == sod_day and (capital - sod) / sod <= daily_stop_pct:
+            equity[i:next_day_start[x]] = capital
+            i = int(next_day_start[x])
+
+    equity[i:] = capital
+    return trades, equity
+
+
+def _bracket_exit(
+    e: int,
+    x: int,
+    close: np.ndarray,
+    atr: np.ndarray,
+    entry_price: float,
+    intrabar: IntrabarBars,
+    stop_atr_mult: Optional[float],
+    tp_atr_mult: Optional[float],
+    trail_atr_mult: Optional[float],
+) -> Optional[Tuple[int, str, float]]:
+    """First bracket/trailing fill in bars ``e+1..x``: (bar, reason, price before slippage)."""
+    stop0 = max(0.01, close[e] - stop_atr_mult * atr[e]) if stop_atr_mult else -np.inf
+    tp = close[e] + tp_atr_mult * atr[e] if tp_atr_mult else np.inf
+    levels = np.full(x - e, stop0)
+    if trail_atr_mult and x > e + 1:
+        c = close[e + 1:x]
+        candidate = np.where(
+            c > entry_price,
+            np.maximum(c - trail_atr_mult * atr[e + 1:x], entry_price - 0.01),
+            -np.inf,
+        )
+        # A stop raised at a bar's close protects from the next bar on
+        levels[1:] = np.maximum(stop0, np.maximum.accumulate(candidate))
+    w = slice(e + 1, x + 1)
+    touched = np.flatnonzero((intrabar.low_bar[w] <= levels) | (intrabar.high_bar[w] >= tp))
+    if not touched.size:
+        return None
+    b = int(touched[0])
+    kind, price = intrabar.first_touch(np.array([e + 1 + b]), levels[b:b + 1], np.array([tp]))
+    if kind[0] == TAKE_PROFIT:
+        return e + 1 + b, "take_profit", float(price[0])
+    if kind[0] == STOP:
+        return e + 1 + b, "trail_stop" if levels[b] > stop0 else "stop_loss", float(price[0])
+    return None
+
+
+def compute_metrics(trades_df: pd.DataFrame, equity_df: pd.DataFrame, initial_capital: float) -> Dict[str, float]:
+    """Summary metrics for a trade log and per-bar equity curve."""
+    if len(trades_df) > 0:
+        total_pnl = trades_df['pnl'].sum()
+        win_rate = (trades_df['pnl'] > 0).mean()
+        avg_win = trades_df[trades_df['pnl'] > 0]['pnl'].mean() if (trades_df['pnl'] > 0).any() else 0
+        avg_loss = trades_df[trades_df['pnl'] < 0]['pnl'].mean() if (trades_df['pnl'] < 0).any() else 0
+        profit_factor = abs(avg_win / avg_loss) if avg_loss != 0 else float('inf')
+
+        # Equity curve metrics
+        equity_df['returns'] = equity_df['equity'].pct_change()
+        sharpe = (equity_df['returns'].mean() / equity_df['returns'].std()) * np.sqrt(252 * 78) if equity_df['returns'].std() > 0 else 0  # 78 5-min bars/day
+        max_dd = ((equity_df['equity'].cummax() - equity_df['equity']) / equity_df['equity'].cummax()).max()
+
+        return {
+            'total_pnl': total_pnl,
+            'total_return_pct': (total_pnl / initial_capital) * 100,
+            'trade_count': len(trades_df),
+            'win_rate': win_rate,
+            'avg_win': avg_win,
+            'avg_loss': avg_loss,
+            'profit_factor': profit_factor,
+            'sharpe': sharpe,
+            'max_drawdown': max_dd,
+            'final_equity': equity_df['equity'].iloc[-1]
+        }
+    return {
+        'total_pnl': 0,
+        'total_return_pct': 0,
+        'trade_count': 0,
+        'win_rate': 0,
+        'avg_win': 0,
+        'avg_loss': 0,
+        'profit_factor': 0,
+        'sharpe': 0,
+        'max_drawdown': 0,
+        'final_equity': initial_capital
+    }
+
+
+def backtest_rsi(
+    df: pd.DataFrame,
+    phase1_filters: bool = False,
+    phase2_enhancements: bool = False,
+    initial_capital: float = 100000.0,
+    phase3_enhancements: bool = False,
+    **params,
+):
+    """
+    Backtest RSI strategy with optional Phase 1 filters and Phase 2/3 enhancements.
+
+    Phase 1: Time-of-day, volatility regime, volume confirmation filters
+    Phase 2: Dynamic RSI thresholds, trend filter (EMA200), Bollinger Band confirmation
+    Phase 3: 15-min RSI confirmation, 1.5x ATR trailing stop
+
+    ``df`` needs a DatetimeIndex and the columns in ``FEATURE_COLUMNS``
+    (``atr`` and ``rsi_15m`` only for Phase 3). Extra keyword arguments
+    override ``FILTER_DEFAULTS`` thresholds or the ``simulate`` defaults
+    (``position_size_pct``, ``min_hold_minutes``, ``trail_atr_mult``, ...);
+    pass ``intrabar=IntrabarBars(...)`` and ``**LIVE_BRACKET`` to fill the
+    bot's bracket and trailing stop from minute bars.
+
+    Returns (trades_df, equity_df, metrics).
+    """
+    thresholds = {k: params.pop(k) for k in list(params) if k in FILTER_DEFAULTS}
+    entry_ok, exit_ok = signal_masks(df, phase1_filters, phase2_enhancements, phase3_enhancements, **thresholds)
+    if phase3_enhancements:
+        params.setdefault("trail_atr_mult", TRAIL_ATR_MULT)
+    if any(params.get(k) for k in ("trail_atr_mult", "stop_atr_mult", "tp_atr_mult")):
+        params.setdefault("atr", df["atr"].to_numpy(dtype=float))
+    day_id, day_start, next_day_start = day_bounds(df.index)
+    trades, equity = simulate(
+        df["close"].to_numpy(dtype=float),
+        df.index.as_unit("ns").asi8,
+        day_id,
+        day_start,
+        next_day_start,
+        entry_ok,
+        exit_ok,
+        initial_capital=initial_capital,
+        **params,
+    )
+
+    index = df.index
+    trades_df = pd.DataFrame([
+        {
+            'entry_time': index[e],
+            'exit_time': index[x],
+            'entry_price': entry_price,
+            'exit_price': exit_price,
+            'shares': shares,
+            'pnl': pnl,
+            'hold_minutes': (index[x] - index[e]).total_seconds() / 60,
+            'exit_reason': reason,
+        }
+        for e, x, entry_price, exit_price, shares, pnl, reason in trades
+    ])
+    equity_df = pd.DataFrame({'time': index, 'equity': equity})
+    metrics = compute_metrics(trades_df, equity_df, initial_capital)
+    return trades_df, equity_df, metrics
@@ -0,0 +1,274 @@
+"""
+Versioned, memory-mapped store of precomputed backtest features.
+
+``build_features`` output is written once per (symbol, timeframe, feature
+set, date range) as one raw binary file per column and opened afterwards
+with ``np.memmap``: no parsing, no copy, and every process that opens the
+same entry (sweep workers, walk-forward windows, notebooks) shares the same
+page-cache pages.
+
+The feature-set hash covers the source code of the bar loader
+(``load_bars``/``stream_bars``, resampling) and of ``build_features`` and
+the ``features.indicators`` kernels plus the stored column layout, so editing
+any feature definition silently moves lookups to a new key; stale entries are never read
+and can be removed with ``prune``.
+
+Indicator columns are stored as float32. ``close`` and ``atr`` stay float64
+because they set share counts, fill prices and stop distances, where
+float32 rounding would change backtest P&L.
+
+Entries are also keyed by the bar source (``BarSource.describe``), since
+the same symbol and range from a file and from the bot's cache differ, and
+by a fingerprint of the source's data (``BarSource.fingerprint``: file
+mtime/size, or the bar cache's row count and last bar), so a file that is
+replaced or a cache the bot keeps appending to is rebuilt, not read stale.
+
+Layout:
+    <root>/<SYMBOL>/<timeframe>/<feature hash>/<source>_<start>_<end>/
+        timestamp.i8  close.f8  atr.f8  rsi.f4  ...  meta.json
+
+Usage:
+    store = FeatureStore(".feature_store")
+    features = store.get_or_build("TSLA", "5min", start, end, lambda: build_features(load_bars(...)))
+    features["rsi"]          # read-only float32 memmap
+    features.frame()         # float64 DataFrame for backtest_rsi
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from backtest import data
+from backtest.engine import day_bounds
+from features import indicators
+from market_data import resample
+
+STORE_VERSION = 1
+# Columns written by build_features, with their on-disk dtype
+STORE_COLUMNS = {
+    "close": np.float64,
+    "rsi": np.float32,
+    "atr": np.float64,
+    "atr_pct": np.float32,
+    "vol_z": np.float32,
+    "volm_z": np.float32,
+    "time_of_day": np.float32,
+    "ema200_rel": np.float32,
+    "bb_z": np.float32,
+    "rsi_15m": np.float32,
+}
+# Everything that defines the feature values: the bar loading/resampling path and the features
+FEATURE_DEFINITIONS = (
+    data.to_exchange_time,
+    data.resample_ohlcv,
+    data.stream_bars,
+    data.load_bars,
+    resample,
+    data.build_features,
+    indicators,
+)
+
+
+def feature_set_hash() -> str:
+    """Short hash of the feature definitions and stored layout."""
+    h = hashlib.sha256()
+    h.update(f"v{STORE_VERSION}".encode())
+    for name, dtype in STORE_COLUMNS.items():
+        h.update(f"{name}:{np.dtype(dtype).str}".encode())
+    for obj in FEATURE_DEFINITIONS:
+        h.update(inspect.getsource(obj).encode())
+    return h.hexdigest()[:16]
+
+
+def _ext(dtype) -> str:
+    return {"float32": "f4", "float64": "f8", "int64": "i8"}[np.dtype(dtype).name]
+
+
+def _stamp(t: datetime) -> str:
+    return pd.Timestamp(t).strftime("%Y%m%dT%H%M%S")
+
+
+def _source_tag(source: str) -> str:
+    return hashlib.sha256(source.encode()).hexdigest()[:8]
+
+
+class FeatureSet:
+    """Read-only, memory-mapped view of one stored feature entry.
+
+    Columns are accessed like a mapping (``features["rsi"]``), so the set
+    can be passed straight to ``filter_masks``/``signal_masks``.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        with open(self.path / "meta.json", "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        rows = self.meta["rows"]
+        self._times = self._map("timestamp", np.int64, rows)
+        self._cols = {c: self._map(c, dtype, rows) for c, dtype in self.meta["columns"].items()}
+
+    def _map(self, name: str, dtype, rows: int) -> np.ndarray:
+        if rows == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(self.path / f"{name}.{_ext(dtype)}", dtype=dtype, mode="r", shape=(rows,))
+
+    def __len__(self) -> int:
+        return len(self._times)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._cols
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self._cols[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._cols)
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        return pd.DatetimeIndex(np.asarray(self._times).view("datetime64[ns]"), name="timestamp")
+
+    @property
+    def spec(self) -> Dict[str, Any]:
+        """Picklable description other processes pass to ``attach``."""
+        return {"path": str(self.path)}
+
+    @staticmethod
+    def attach(spec: Dict[str, Any]) -> Tuple["FeatureSet", Dict[str, np.ndarray]]:
+        """Open the entry in ``spec``; return it and the arrays ``simulate`` needs.
+
+        Same contract as ``backtest.sweep.SharedFeatures.attach``: feature
+        columns plus ``times_ns`` and the day-boundary arrays.
+        """
+        features = FeatureSet(spec["path"])
+        arrays = dict(features._cols)
+        arrays["times_ns"] = features._times
+        arrays["day_id"], arrays["day_start"], arrays["next_day_start"] = day_bounds(features.index)
+        return features, arrays
+
+    def frame(self) -> pd.DataFrame:
+        """Copy the entry into a float64 DataFrame shaped like ``build_features`` output."""
+        return pd.DataFrame({c: np.asarray(v, dtype=np.float64) for c, v in self._cols.items()}, index=self.index)
+
+
+class FeatureStore:
+    """Precomputed feature entries under ``root``, keyed by symbol, timeframe, feature hash and range."""
+
+    def __init__(self, root: Union[str, Path] = ".feature_store"):
+        self.root = Path(root)
+        self.feature_hash = feature_set_hash()
+
+    def entry_path(self, symbol: str, timeframe: str, start: datetime, end: datetime, source: str = "") -> Path:
+        name = f"{_source_tag(source)}_{_stamp(start)}_{_stamp(end)}"
+        return self.root / symbol.upper() / timeframe / self.feature_hash / name
+
+    def open(self, symbol: str, timeframe: str, start: datetime, end: datetime, source: str = "") -> Optional[FeatureSet]:
+        """Return the stored entry, or ``None`` if it has not been built for these definitions."""
+        path = self.entry_path(symbol, timeframe, start, end, source)
+        if not (path / "meta.json").exists():
+            return None
+        return FeatureSet(path)
+
+    def write(
+        self,
+        symbol: str,
+        timeframe: str,
+        start: datetime,
+        end: datetime,
+        df_feat: pd.DataFrame,
+        source: str = "",
+    ) -> FeatureSet:
+        """Store ``df_feat`` (``build_features`` output) and return it memory-mapped."""
+        path = self.entry_path(symbol, timeframe, start, end, source)
+        missing = set(STORE_COLUMNS) - set(df_feat.columns)
+        if missing:
+            raise ValueError(f"Feature frame is missing column(s): {sorted(missing)}")
+
+        # Build in a private directory and rename it into place, so readers
+        # never see a half-written entry
+        tmp = path.parent / f".tmp-{path.name}-{os.getpid()}"
+        if tmp.exists():
+            shutil.rmtree(tmp)
+        tmp.mkdir(parents=True)
+        pd.DatetimeIndex(df_feat.index).as_unit("ns").asi8.tofile(tmp / "timestamp.i8")
+        for col, dtype in STORE_COLUMNS.items():
+            df_feat[col].to_numpy(dtype=dtype).tofile(tmp / f"{col}.{_ext(dtype)}")
+        meta = {
+            "symbol": symbol.upper(),
+            "timeframe": timeframe,
+            "start": pd.Timestamp(start).isoformat(),
+            "end": pd.Timestamp(end).isoformat(),
+            "source": source,
+            "feature_hash": self.feature_hash,
+            "rows": len(df_feat),
+            "columns": {c: np.dtype(d).name for c, d in STORE_COLUMNS.items()},
+        }
+        with open(tmp / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        try:
+            os.replace(tmp, path)
+        except OSError:
+            # Another process stored the same entry first; keep theirs
+            shutil.rmtree(tmp, ignore_errors=True)
+        return FeatureSet(path)
+
+    def get_or_build(
+        self,
+        symbol: str,
+        timeframe: str,
+        start: datetime,
+        end: datetime,
+        build: Callable[[], pd.DataFrame],
+        source: str = "",
+    ) -> FeatureSet:
+        """Open the entry, calling ``build()`` and storing its result on a miss."""
+        features = self.open(symbol, timeframe, start, end, source)
+        if features is not None:
+            return features
+        return self.write(symbol, timeframe, start, end, build(), source)
+
+    def prune(self) -> List[Path]:
+        """Delete entries built from other feature definitions; return their directories."""
+        removed = []
+        for hash_dir in self.root.glob("*/*/*"):
+            if hash_dir.is_dir() and hash_dir.name != self.feature_hash:
+                shutil.rmtree(hash_dir)
+                removed.append(hash_dir)
+        return removed
+
+
+def add_store_args(parser) -> None:
+    """Add the ``--feature-store`` option used by ``load_features``."""
+    parser.add_argument("--feature-store", default=".feature_store",
+                        help="Precomputed feature store directory ('none' to always rebuild)")
+
+
+def load_features(args, qb: Optional[Any] = None, bar_minutes: int = 5) -> Union[FeatureSet, pd.DataFrame]:
+    """Features for the ``add_source_args``/``add_store_args`` options.
+
+    Returns a memory-mapped ``FeatureSet`` (built and stored on the first
+    run), or a freshly built DataFrame when the store is disabled. Raises
+    ``ValueError`` when the source has no bars in the range.
+    """
+    start, end = datetime.fromisoformat(args.start), datetime.fromisoformat(args.end)
+    source = data.source_from_args(args, qb=qb)
+
+    def build() -> pd.DataFrame:
+        df = data.load_bars(source, args.symbol, start, end, bar_minutes=bar_minutes, chunk=data.chunk_from_args(args))
+        if df.empty:
+            raise ValueError(f"no bars for {args.symbol} in range {args.start} to {args.end} ({source.describe()})")
+        return data.build_features(df)
+
+    if str(args.feature_store).lower() == "none":
+        return build()
+    store = FeatureStore(args.feature_store)
+    key = f"{source.describe()}|{source.fingerprint(args.symbol)}"
+    return store.get_or_build(args.symbol, f"{bar_minutes}min", start, end, build, source=key)
@@ -0,0 +1,109 @@
+"""
+Intrabar order-fill resolution from minute bars.
+
+The live bot protects every entry with a bracket (stop at 1x ATR below,
+take-profit at 2x ATR above) and ratchets the stop up as a 1.5x ATR
+trailing stop. Those orders fill inside a 5-minute bar, and when a bar's
+range spans both levels its close cannot say which was hit first.
+
+``IntrabarBars`` lays the minute bars out as ``(n_bars, bar_minutes)``
+matrices aligned to the backtest bars, so a query for many (bar, stop,
+take-profit) triples is a handful of vectorized comparisons: the first
+minute whose low reaches the stop or whose high reaches the take-profit
+decides the exit. When both are touched in the same minute the stop is
+assumed first (conservative). Bars without minute data fall back to their
+own OHLC as a single "minute".
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+NO_TOUCH, STOP, TAKE_PROFIT = 0, 1, 2
+
+
+class IntrabarBars:
+    """Minute OHLC per backtest bar for first-touch queries.
+
+    Parameters
+    ----------
+    index : pd.DatetimeIndex
+        Backtest bar start times (e.g. ``df_feat.index``).
+    bars : pd.DataFrame
+        OHLC of the backtest bars (e.g. the ``load_bars`` output the features
+        were built from); used for bars with no minute data.
+    minutes : pd.DataFrame, optional
+        Minute OHLC in the same time convention as ``index``.
+    bar_minutes : int
+        Backtest bar size in minutes.
+    """
+
+    def __init__(
+        self,
+        index: pd.DatetimeIndex,
+        bars: pd.DataFrame,
+        minutes: Optional[pd.DataFrame] = None,
+        bar_minutes: int = 5,
+    ):
+        n = len(index)
+        k = bar_minutes if minutes is not None else 1
+        self.open = np.full((n, k), np.nan)
+        self.high = np.full((n, k), np.nan)
+        self.low = np.full((n, k), np.nan)
+
+        if minutes is not None and len(minutes):
+            start = minutes.index.floor(f"{bar_minutes}min")
+            row = index.get_indexer(start)
+            slot = np.asarray((minutes.index - start) // pd.Timedelta(minutes=1), dtype=np.int64)
+            ok = (row >= 0) & (slot < k)
+            for name in ("open", "high", "low"):
+                getattr(self, name)[row[ok], slot[ok]] = minutes[name].to_numpy(dtype=float)[ok]
+
+        # Bars with no minute data resolve on their own OHLC
+        empty = np.isnan(self.high).all(axis=1)
+        if empty.any():
+            own = bars.reindex(index[empty])
+            for name in ("open", "high", "low"):
+                getattr(self, name)[empty, 0] = own[name].to_numpy(dtype=float)
+
+        with np.errstate(invalid="ignore"):
+            self.high_bar = np.fmax.reduce(self.high, axis=1)
+            self.low_bar = np.fmin.reduce(self.low, axis=1)
+
+    def first_touch(self, bars: np.ndarray, stop: np.ndarray, take_profit: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Resolve which order fills first inside each queried bar.
+
+        Parameters
+        ----------
+        bars : np.ndarray of int
+            Backtest bar index per query.
+        stop, take_profit : np.ndarray of float
+            Sell-stop and sell-limit levels per query (``-inf``/``inf`` for
+            "no order").
+
+        Returns
+        -------
+        kind : np.ndarray of int
+            ``STOP``, ``TAKE_PROFIT`` or ``NO_TOUCH`` per query.
+        price : np.ndarray of float
+            Fill price before slippage: the level, or the touching minute's
+            open when it gapped through the level; NaN when not touched.
+        """
+        low, high, open_ = self.low[bars], self.high[bars], self.open[bars]
+        k = low.shape[1]
+        stop_hit = low <= stop[:, None]
+        tp_hit = high >= take_profit[:, None]
+        stop_at = np.where(stop_hit.any(axis=1), stop_hit.argmax(axis=1), k)
+        tp_at = np.where(tp_hit.any(axis=1), tp_hit.argmax(axis=1), k)
+
+        is_stop = (stop_at < k) & (stop_at <= tp_at)
+        is_tp = (tp_at < k) & (tp_at < stop_at)
+        kind = np.where(is_stop, STOP, np.where(is_tp, TAKE_PROFIT, NO_TOUCH))
+        slot_open = open_[np.arange(len(bars)), np.minimum(np.where(is_stop, stop_at, tp_at), k - 1)]
+        price = np.where(
+            is_stop,
+            np.fmin(stop, slot_open),
+            np.where(is_tp, np.fmax(take_profit, slot_open), np.nan),
+        )
+        return kind, price
@@ -0,0 +1,284 @@
+"""
+Parallel parameter sweep over the backtest filter thresholds.
+
+Features are computed once in the parent process and copied into a single
+``multiprocessing.shared_memory`` block; pool workers attach to it by name
+and wrap it in read-only NumPy views, so every combination runs against the
+same physical pages instead of a pickled copy per task. Each worker only
+receives small parameter dicts and returns a row of metrics.
+
+Results are appended to a CSV table as batches finish, one row per
+combination keyed by its canonical JSON parameters. Re-running the same
+command skips every combination already in the table, so an interrupted
+sweep resumes where it stopped.
+
+Features already held in the ``backtest.feature_store`` need no shared
+block at all: workers memory-map the stored entry themselves.
+
+Usage:
+    python -m backtest.sweep --source file --path data/{symbol}_1min.parquet \\
+        --param vol_z_min=0.2,0.5,0.8 --param volm_z_min=0.3,1.0 \\
+        --param rsi_buy=20,25,30 --out sweep_results.csv
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from backtest.engine import (
+    FEATURE_COLUMNS,
+    FILTER_DEFAULTS,
+    TRAIL_ATR_MULT,
+    compute_metrics,
+    day_bounds,
+    signal_masks,
+    simulate,
+)
+from backtest.feature_store import FeatureSet
+
+RESULT_METRICS = [
+    "sharpe",
+    "win_rate",
+    "trade_count",
+    "total_return_pct",
+    "max_drawdown",
+    "profit_factor",
+    "final_equity",
+]
+BASE_PARAMS = {"phase1_filters": True, "phase2_enhancements": True}
+_INDEX_ARRAYS = ["times_ns", "day_id", "day_start", "next_day_start"]
+
+
+class SharedFeatures:
+    """Backtest input arrays held in one shared-memory block.
+
+    Layout: a float64 ``(len(FEATURE_COLUMNS), n)`` matrix followed by an
+    int64 ``(4, n)`` matrix of bar times and day boundaries. ``spec`` is the
+    small picklable description other processes pass to ``attach``.
+    """
+
+    def __init__(self, df_feat: pd.DataFrame):
+        n = len(df_feat)
+        self.spec = {"name": None, "n": n}
+        self._shm = shared_memory.SharedMemory(create=True, size=max(1, (len(FEATURE_COLUMNS) + len(_INDEX_ARRAYS)) * n * 8))
+        self.spec["name"] = self._shm.name
+        floats, ints = _views(self._shm, n)
+        for i, col in enumerate(FEATURE_COLUMNS):
+            floats[i] = df_feat[col].to_numpy(dtype=np.float64)
+        ints[0] = df_feat.index.as_unit("ns").asi8
+        ints[1], ints[2], ints[3] = day_bounds(df_feat.index)
+
+    @staticmethod
+    def attach(spec: Dict[str, Any]) -> Tuple[shared_memory.SharedMemory, Dict[str, np.ndarray]]:
+        """Open the block named in ``spec``; return it and read-only column views."""
+        shm = shared_memory.SharedMemory(name=spec["name"])
+        floats, ints = _views(shm, spec["n"])
+        floats.flags.writeable = False
+        ints.flags.writeable = False
+        arrays = {col: floats[i] for i, col in enumerate(FEATURE_COLUMNS)}
+        arrays.update({name: ints[i] for i, name in enumerate(_INDEX_ARRAYS)})
+        return shm, arrays
+
+    def close(self) -> None:
+        self._shm.close()
+        self._shm.unlink()
+
+
+@contextmanager
+def share_features(features: Union[pd.DataFrame, FeatureSet]) -> Iterator[Dict[str, Any]]:
+    """Worker ``spec`` for ``features``: a shared-memory copy of a DataFrame, or the stored entry itself."""
+    if isinstance(features, FeatureSet):
+        yield features.spec
+        return
+    shared = SharedFeatures(features)
+    try:
+        yield shared.spec
+    finally:
+        shared.close()
+
+
+def _views(shm: shared_memory.SharedMemory, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    floats = np.ndarray((len(FEATURE_COLUMNS), n), dtype=np.float64, buffer=shm.buf)
+    ints = np.ndarray((len(_INDEX_ARRAYS), n), dtype=np.int64, buffer=shm.buf, offset=floats.nbytes)
+    return floats, ints
+
+
+def run_params(arrays: Dict[str, np.ndarray], params: Dict[str, Any], initial_capital: float = 100000.0) -> Dict[str, float]:
+    """Backtest one parameter combination on prepared arrays; return its metrics."""
+    params = {**BASE_PARAMS, **params}
+    phase3 = params.get("phase3_enhancements", False)
+    thresholds = {k: v for k, v in params.items() if k in FILTER_DEFAULTS}
+    sim_params = {k: v for k, v in params.items() if k not in FILTER_DEFAULTS and not k.startswith("phase")}
+    entry_ok, exit_ok = signal_masks(arrays, params["phase1_filters"], params["phase2_enhancements"], phase3, **thresholds)
+    if phase3:
+        sim_params.setdefault("trail_atr_mult", TRAIL_ATR_MULT)
+        sim_params["atr"] = arrays["atr"]
+    trades, equity = simulate(
+        arrays["close"],
+        arrays["times_ns"],
+        arrays["day_id"],
+        arrays["day_start"],
+        arrays["next_day_start"],
+        entry_ok,
+        exit_ok,
+        initial_capital=initial_capital,
+        **sim_params,
+    )
+    return summary_metrics(trades, equity, initial_capital)
+
+
+def summary_metrics(trades: List[tuple], equity: np.ndarray, initial_capital: float) -> Dict[str, float]:
+    """``compute_metrics`` for raw ``simulate`` output."""
+    trades_df = pd.DataFrame({"pnl": [t[5] for t in trades]})
+    return compute_metrics(trades_df, pd.DataFrame({"equity": equity}), initial_capital)
+
+
+# Per-worker state, set once by the pool initializer
+_worker: Dict[str, Any] = {}
+
+
+def init_worker(spec: Dict[str, Any]) -> None:
+    """Pool initializer: attach the shared features described by ``spec`` once per worker."""
+    attach = FeatureSet.attach if "path" in spec else SharedFeatures.attach
+    _worker["shm"], _worker["arrays"] = attach(spec)
+
+
+def worker_arrays() -> Dict[str, np.ndarray]:
+    """The feature arrays attached by ``init_worker`` in this worker process."""
+    return _worker["arrays"]
+
+
+def _run_batch(batch: List[Dict[str, Any]], initial_capital: float) -> List[Dict[str, Any]]:
+    rows = []
+    for params in batch:
+        metrics = run_params(worker_arrays(), params, initial_capital)
+        rows.append({"key": param_key(params), **params, **{m: metrics[m] for m in RESULT_METRICS}})
+    return rows
+
+
+def param_key(params: Dict[str, Any]) -> str:
+    """Canonical identifier of a parameter combination (used for resuming)."""
+    return json.dumps(params, sort_keys=True)
+
+
+def expand_grid(grid: Dict[str, List[Any]], base: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Cartesian product of ``grid`` values, each merged over ``base``."""
+    names = sorted(grid)
+    return [{**(base or {}), **dict(zip(names, values))} for values in itertools.product(*(grid[n] for n in names))]
+
+
+def _completed_keys(out: Path, fieldnames: List[str]) -> set:
+    if not out.exists() or out.stat().st_size == 0:
+        return set()
+    with out.open(newline="") as f:
+        reader = csv.DictReader(f)
+        if reader.fieldnames != fieldnames:
+            raise ValueError(f"{out} was written by a different grid; choose another --out")
+        return {row["key"] for row in reader}
+
+
+def run_sweep(
+    df_feat: Union[pd.DataFrame, FeatureSet],
+    grid: Dict[str, List[Any]],
+    out: Union[str, Path],
+    base: Optional[Dict[str, Any]] = None,
+    max_workers: Optional[int] = None,
+    batch_size: int = 4,
+    initial_capital: float = 100000.0,
+) -> pd.DataFrame:
+    """Backtest every combination in ``grid`` in parallel and return the results table.
+
+    Parameters
+    ----------
+    df_feat : pd.DataFrame or FeatureSet
+        Output of ``backtest.data.build_features``, or the same features
+        opened from the feature store.
+    grid : dict of str -> list
+        Values to try per parameter: ``FILTER_DEFAULTS`` thresholds,
+        ``simulate`` keyword arguments, or the phase flags
+        (``phase1_filters``, ``phase2_enhancements``, ``phase3_enhancements``).
+    out : str or Path
+        CSV results table; combinations already present are skipped.
+    base : dict, optional
+        Fixed parameters merged under every combination (default: both
+        phases enabled).
+    """
+    out = Path(out)
+    combos = expand_grid(grid, {**BASE_PARAMS, **(base or {})})
+    fieldnames = ["key"] + sorted(combos[0]) + RESULT_METRICS if combos else ["key"] + RESULT_METRICS
+    done = _completed_keys(out, fieldnames)
+    todo = [c for c in combos if param_key(c) not in done]
+    print(f"[SWEEP] {len(combos)} combinations, {len(combos) - len(todo)} already done, {len(todo)} to run")
+
+    if todo:
+        with share_features(df_feat) as spec, \
+                ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker, initargs=(spec,)) as pool, \
+                out.open("a", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            if f.tell() == 0:
+                writer.writeheader()
+            batches = [todo[i:i + batch_size] for i in range(0, len(todo), batch_size)]
+            futures = [pool.submit(_run_batch, b, initial_capital) for b in batches]
+            for n, fut in enumerate(as_completed(futures), 1):
+                writer.writerows(fut.result())
+                # Flush per batch so an interrupted sweep keeps what finished
+                f.flush()
+                if n % 25 == 0 or n == len(futures):
+                    print(f"[SWEEP] {min(n * batch_size, len(todo))}/{len(todo)}")
+    return pd.read_csv(out)
+
+
+def parse_param(spec: str) -> Tuple[str, List[Any]]:
+    """Parse a ``--param name=v1,v2,...`` option (JSON values, else strings)."""
+    name, _, values = spec.partition("=")
+    parsed = []
+    for v in values.split(","):
+        try:
+            parsed.append(json.loads(v))
+        except ValueError:
+            parsed.append(v)
+    return name.strip(), parsed
+
+
+def main() -> None:
+    from backtest.data import add_source_args
+    from backtest.feature_store import add_store_args, load_features
+
+    parser = argparse.ArgumentParser(description="Parallel backtest parameter sweep")
+    add_source_args(parser)
+    add_store_args(parser)
+    parser.add_argument("--grid", default=None, help="JSON file mapping parameter -> list of values")
+    parser.add_argument("--param", action="append", default=[], help="name=v1,v2,... (repeatable)")
+    parser.add_argument("--out", default="sweep_results.csv", help="Results table (CSV, resumable)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--batch-size", type=int, default=4, help="Combinations per worker task")
+    parser.add_argument("--capital", type=float, default=100000.0)
+    args = parser.parse_args()
+
+    grid: Dict[str, List[Any]] = {}
+    if args.grid:
+        with open(args.grid, "r", encoding="utf-8") as f:
+            grid.update(json.load(f))
+    grid.update(parse_param(p) for p in args.param)
+    if not grid:
+        parser.error("no parameters to sweep (use --grid or --param)")
+
+    df_feat = load_features(args)
+    print(f"[SWEEP] {len(df_feat)} bars, {os.cpu_count()} cores")
+
+    results = run_sweep(df_feat, grid, args.out, max_workers=args.workers, batch_size=args.batch_size, initial_capital=args.capital)
+    print(results.sort_values("sharpe", ascending=False).head(10).drop(columns="key").to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+Walk-forward optimisation of the backtest filter thresholds.
+
+The history is cut into rolling windows of ``train_days`` trading days
+followed by ``test_days`` out-of-sample days, advancing ``step_days`` at a
+time. In every window each grid combination is backtested on the train
+slice, the best one by ``objective`` (with at least ``min_trades`` trades)
+is kept, and that single combination is then run on the test slice.
+
+Features are computed once over the full span, so indicators in every
+window are already warmed up. They are shared with the worker processes
+through the same shared-memory block as ``backtest.sweep``; a window only
+slices those arrays, nothing is recomputed. Windows run in parallel, one
+task per window.
+
+Usage:
+    python -m backtest.walkforward --source file --path data/{symbol}_1min.parquet \\
+        --param vol_z_min=0.2,0.5,0.8 --param rsi_buy=20,25,30 \\
+        --train-days 252 --test-days 63 --out walkforward.csv
+"""
+
+import argparse
+import json
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from backtest.engine import day_bounds
+from backtest.feature_store import FeatureSet
+from backtest.sweep import (
+    BASE_PARAMS,
+    RESULT_METRICS,
+    expand_grid,
+    init_worker,
+    parse_param,
+    run_params,
+    share_features,
+    worker_arrays,
+)
+
+
+def walk_forward_windows(
+    day_id: np.ndarray,
+    train_days: int,
+    test_days: int,
+    step_days: Optional[int] = None,
+) -> List[Dict[str, int]]:
+    """Bar index bounds ``[train_lo, train_hi)`` / ``[test_lo, test_hi)`` of each window."""
+    step_days = step_days or test_days
+    starts = np.flatnonzero(np.diff(day_id, prepend=-1) != 0)
+    bounds = np.append(starts, len(day_id))
+    n_days = len(starts)
+    windows = []
+    first = 0
+    while first + train_days + test_days <= n_days:
+        split = first + train_days
+        windows.append({
+            "train_lo": int(bounds[first]),
+            "train_hi": int(bounds[split]),
+            "test_lo": int(bounds[split]),
+            "test_hi": int(bounds[split + test_days]),
+        })
+        first += step_days
+    return windows
+
+
+def slice_arrays(arrays: Dict[str, np.ndarray], lo: int, hi: int) -> Dict[str, np.ndarray]:
+    """Bars ``[lo, hi)`` of prepared arrays, with day-boundary indices rebased to the slice."""
+    out = {k: v[lo:hi] for k, v in arrays.items()}
+    out["day_start"] = np.maximum(arrays["day_start"][lo:hi] - lo, 0)
+    out["next_day_start"] = np.minimum(arrays["next_day_start"][lo:hi], hi) - lo
+    return out
+
+
+def _best_params(
+    arrays: Dict[str, np.ndarray],
+    combos: List[Dict[str, Any]],
+    objective: str,
+    min_trades: int,
+    initial_capital: float,
+):
+    best, best_metrics = None, None
+    for params in combos:
+        metrics = run_params(arrays, params, initial_capital)
+        if metrics["trade_count"] < min_trades:
+            continue
+        if best_metrics is None or metrics[objective] > best_metrics[objective]:
+            best, best_metrics = params, metrics
+    return best, best_metrics
+
+
+def _run_window(
+    window: Dict[str, int],
+    combos: List[Dict[str, Any]],
+    objective: str,
+    min_trades: int,
+    initial_capital: float,
+) -> Dict[str, Any]:
+    arrays = worker_arrays()
+    train = slice_arrays(arrays, window["train_lo"], window["train_hi"])
+    best, train_metrics = _best_params(train, combos, objective, min_trades, initial_capital)
+    row: Dict[str, Any] = {
+        "train_start": int(train["times_ns"][0]),
+        "test_start": int(arrays["times_ns"][window["test_lo"]]),
+        "test_end": int(arrays["times_ns"][window["test_hi"] - 1]),
+        "params": json.dumps(best, sort_keys=True) if best else None,
+        f"train_{objective}": train_metrics[objective] if best else np.nan,
+    }
+    if best is None:
+        # No combination traded enough in-sample: sit the test window out
+        row.update({f"test_{m}": np.nan for m in RESULT_METRICS})
+        return row
+    test = slice_arrays(arrays, window["test_lo"], window["test_hi"])
+    test_metrics = run_params(test, best, initial_capital)
+    row.update({f"test_{m}": test_metrics[m] for m in RESULT_METRICS})
+    return row
+
+
+def walk_forward(
+    df_feat: Union[pd.DataFrame, FeatureSet],
+    grid: Dict[str, List[Any]],
+    train_days: int = 252,
+    test_days: int = 63,
+    step_days: Optional[int] = None,
+    objective: str = "sharpe",
+    min_trades: int = 10,
+    base: Optional[Dict[str, Any]] = None,
+    max_workers: Optional[int] = None,
+    initial_capital: float = 100000.0,
+) -> pd.DataFrame:
+    """Optimise ``grid`` on each train window and evaluate it on the following test window.
+
+    Parameters
+    ----------
+    df_feat : pd.DataFrame or FeatureSet
+        Output of ``backtest.data.build_features`` over the full span, or the
+        same features opened from the feature store.
+    grid : dict of str -> list
+        Parameter values to search (see ``backtest.sweep.run_sweep``).
+    train_days, test_days, step_days : int
+        Window lengths in trading days; ``step_days`` defaults to
+        ``test_days`` (non-overlapping test windows).
+    objective : str
+        Metric maximised in-sample (any key of ``RESULT_METRICS``).
+    min_trades : int
+        In-sample trade count below which a combination is not eligible.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per window: dates, chosen parameters (JSON), in-sample
+        objective and out-of-sample metrics (``test_*``).
+    """
+    if objective not in RESULT_METRICS:
+        raise ValueError(f"objective must be one of {RESULT_METRICS}")
+    combos = expand_grid(grid, {**BASE_PARAMS, **(base or {})})
+    windows = walk_forward_windows(day_bounds(df_feat.index)[0], train_days, test_days, step_days)
+    if not windows:
+        raise ValueError(f"History too short for a {train_days}+{test_days} day window")
+    print(f"[WF] {len(windows)} windows x {len(combos)} combinations")
+
+    run = partial(_run_window, combos=combos, objective=objective, min_trades=min_trades, initial_capital=initial_capital)
+    with share_features(df_feat) as spec, \
+            ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker, initargs=(spec,)) as pool:
+        rows = list(pool.map(run, windows))
+
+    results = pd.DataFrame(rows)
+    for col in ("train_start", "test_start", "test_end"):
+        results[col] = pd.to_datetime(results[col])
+    return results
+
+
+def main() -> None:
+    from backtest.data import add_source_args
+    from backtest.feature_store import add_store_args, load_features
+
+    parser = argparse.ArgumentParser(description="Walk-forward optimisation of backtest thresholds")
+    add_source_args(parser)
+    add_store_args(parser)
+    parser.add_argument("--grid", default=None, help="JSON file mapping parameter -> list of values")
+    parser.add_argument("--param", action="append", default=[], help="name=v1,v2,... (repeatable)")
+    parser.add_argument("--train-days", type=int, default=252)
+    parser.add_argument("--test-days", type=int, default=63)
+    parser.add_argument("--step-days", type=int, default=None)
+    parser.add_argument("--objective", default="sharpe", choices=RESULT_METRICS)
+    parser.add_argument("--min-trades", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--capital", type=float, default=100000.0)
+    parser.add_argument("--out", default="walkforward.csv")
+    args = parser.parse_args()
+
+    grid: Dict[str, List[Any]] = {}
+    if args.grid:
+        with open(args.grid, "r", encoding="utf-8") as f:
+            grid.update(json.load(f))
+    grid.update(parse_param(p) for p in args.param)
+    if not grid:
+        parser.error("no parameters to optimise (use --grid or --param)")
+
+    results = walk_forward(
+        load_features(args),
+        grid,
+        train_days=args.train_days,
+        test_days=args.test_days,
+        step_days=args.step_days,
+        objective=args.objective,
+        min_trades=args.min_trades,
+        max_workers=args.workers,
+        initial_capital=args.capital,
+    )
+    results.to_csv(args.out, index=False)
+    print(results.drop(columns="params").to_string(index=False))
+    print(f"\n[WF] Out-of-sample: mean {args.objective} {results[f'test_{args.objective}'].mean():.2f}, "
+          f"trades {results['test_trade_count'].sum():.0f}, "
+          f"return {results['test_total_return_pct'].sum():.2f}%")
+
+
+if __name__ == "__main__":
+    main()
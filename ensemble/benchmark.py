@@ -0,0 +1,94 @@
+"""
+Micro-benchmark of expert + brain scoring.
+
+Scores ``--bars`` synthetic feature rows with the shipped models three ways
+and prints the per-bar cost of each:
+
+- separate: the three experts' ``predict_proba`` plus ``Brain.predict_proba``
+  (the path ``algo.py`` used before ``ScoringPipeline``);
+- fused: ``ScoringPipeline.evaluate`` on one feature dict per bar;
+- batch: ``ScoringPipeline.predict_proba_batch`` over the whole matrix.
+
+Also checks that the fused expert probabilities match the separate experts
+exactly, that batch matches single-bar scoring, and reports how far the
+separate brain is from the fused one (it ignores the brain weights it
+cannot resolve).
+
+Usage:
+    python -m ensemble.benchmark --bars 100000
+"""
+
+import argparse
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from ensemble.brain import Brain
+from ensemble.pipeline import ScoringPipeline
+from experts.macd_expert import MACDExpert
+from experts.rsi_expert import RSIExpert
+from experts.trend_expert import TrendExpert
+
+
+def synthetic_features(names: List[str], n: int, seed: int = 0) -> np.ndarray:
+    """Random feature rows; ``time_of_day`` in session hours / 24 (as built live), the rest standard normal."""
+    rng = np.random.default_rng(seed)
+    X = rng.normal(0.0, 1.0, (n, len(names)))
+    if "time_of_day" in names:
+        X[:, names.index("time_of_day")] = rng.uniform(9.5, 16.0, n) / 24.0
+    if "atr_pct" in names:
+        X[:, names.index("atr_pct")] = np.abs(X[:, names.index("atr_pct")]) * 0.002
+    return X
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark expert + brain scoring")
+    parser.add_argument("--bars", type=int, default=100_000)
+    parser.add_argument("--models", default="models", help="Directory with the expert and brain JSON")
+    args = parser.parse_args()
+
+    experts = {
+        "rsi": RSIExpert.load(None, f"{args.models}/rsi_expert.json"),
+        "macd": MACDExpert.load(None, f"{args.models}/macd_expert.json"),
+        "trend": TrendExpert.load(None, f"{args.models}/trend_expert.json"),
+    }
+    brain = Brain.load(None, f"{args.models}/brain.json")
+    pipeline = ScoringPipeline.from_models(experts, brain)
+
+    names = list(pipeline.feature_names)
+    X = synthetic_features(names, args.bars)
+    rows: List[Dict[str, float]] = [dict(zip(names, r)) for r in X.tolist()]
+    n = len(rows)
+
+    t0 = time.perf_counter()
+    separate = []
+    for f in rows:
+        probs = {name: e.predict_proba(f) for name, e in experts.items()}
+        regime = {"volatility": f.get("atr_pct", 0.0), "time_of_day": f.get("time_of_day", 9.5 / 24.0)}
+        separate.append((probs, brain.predict_proba(probs, regime)))
+    t_separate = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    fused = [pipeline.evaluate(f) for f in rows]
+    t_fused = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    batch = pipeline.predict_proba_batch(X)
+    t_batch = time.perf_counter() - t0
+
+    fused_p = np.array([s["p"] for s in fused])
+    experts_equal = all(s["experts"] == probs for s, (probs, _) in zip(fused, separate))
+    brain_gap = float(np.max(np.abs(fused_p - np.array([p for _, p in separate]))))
+
+    print(f"inputs: {names}")
+    print(f"{'path':<10} {'total ms':>9} {'us/bar':>8}")
+    for label, t in (("separate", t_separate), ("fused", t_fused), ("batch", t_batch)):
+        print(f"{label:<10} {t * 1e3:>9.2f} {t / n * 1e6:>8.3f}")
+    print(f"expert probs identical: {experts_equal}")
+    print(f"batch vs fused max |dp|: {float(np.max(np.abs(batch - fused_p))):.3g}")
+    print(f"separate brain vs fused max |dp| (unresolved weights): {brain_gap:.3g}")
+
+
+if __name__ == "__main__":
+    main()
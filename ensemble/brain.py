@@ -2,63 +2,80 @@
 Ensemble brain blends expert probabilities with regime features.
 Supports a tiny logistic model loaded from QC Object Store or local file.
 Falls back to equal-weight average if not available.
+
+Only the inputs in ``INPUT_NAMES`` are read here; ``ensemble.pipeline``
+fuses the experts and the brain and resolves every weight name, including
+``regime.tod_sin``/``regime.tod_cos``/``regime.vol_z``.
 """
 
-from typing import Any, Dict
-import json
-from math import exp
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
 
+from experts.logistic import CompiledLogistic
+from experts.registry import read_model
 
-def _sigmoid(z: float) -> float:
-    try:
-        return 1.0 / (1.0 + exp(-z))
-    except OverflowError:
-        return 0.0 if z < 0 else 1.0
+# Brain inputs in scoring order, with the value used when one is missing
+EXPERT_INPUTS = (("experts.rsi", "rsi"), ("experts.macd", "macd"), ("experts.trend", "trend"))
+REGIME_INPUTS = (("regime.volatility", "volatility"), ("regime.time_of_day", "time_of_day"))
+INPUT_NAMES = tuple(name for name, _ in EXPERT_INPUTS + REGIME_INPUTS)
+INPUT_DEFAULTS = (0.5, 0.5, 0.5, 0.0, 0.0)
 
 
 class Brain:
     def __init__(self, model: Any = None):
         # model: {"type": "logistic", "bias": float, "weights": {"experts.rsi": w, "experts.macd": w, "experts.trend": w, "regime.volatility": w, "regime.time_of_day": w}}
         self._model = model or {"type": "avg"}
+        # Compiled once into the fixed INPUT_NAMES order (weights the brain does not read score 0)
+        self._compiled: Optional[CompiledLogistic] = None
+        if isinstance(self._model, dict) and self._model.get("type") == "logistic":
+            weights = dict(self._model.get("weights", {}))
+            self._compiled = CompiledLogistic(
+                INPUT_NAMES,
+                [weights.get(name, 0.0) for name in INPUT_NAMES],
+                self._model.get("bias", 0.0),
+                defaults=INPUT_DEFAULTS,
+            )
+
+    @property
+    def model(self) -> Any:
+        """The loaded model JSON (compiled into ``ensemble.pipeline.ScoringPipeline``)."""
+        return self._model
 
     @classmethod
     def load(cls, obj_store: Any, key: str) -> "Brain":
-        data = None
-        if obj_store is not None:
-            try:
-                if obj_store.ContainsKey(key):
-                    raw = obj_store.ReadBytes(key)
-                    # accept both .pkl (ignored) and .json content as bytes
-                    try:
-                        data = json.loads(raw.decode("utf-8"))
-                    except Exception:
-                        data = None
-            except Exception:
-                data = None
-        if data is None:
-            try:
-                with open(key, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-            except Exception:
-                data = None
-        return cls(data)
+        """Load the model from QC Object Store or local path (see ``experts.registry.read_model``)."""
+        return cls(read_model(obj_store, key))
 
     def predict_proba(self, expert_probs: Dict[str, float], regime: Dict[str, float]) -> float:
         if not isinstance(self._model, dict):
             return 0.5
-        if self._model.get("type") == "logistic":
-            bias = float(self._model.get("bias", 0.0))
-            weights: Dict[str, float] = dict(self._model.get("weights", {}))
-            z = bias
-            # experts
-            z += float(weights.get("experts.rsi", 0.0)) * float(expert_probs.get("rsi", 0.5))
-            z += float(weights.get("experts.macd", 0.0)) * float(expert_probs.get("macd", 0.5))
-            z += float(weights.get("experts.trend", 0.0)) * float(expert_probs.get("trend", 0.5))
-            # regime
-            z += float(weights.get("regime.volatility", 0.0)) * float(regime.get("volatility", 0.0))
-            z += float(weights.get("regime.time_of_day", 0.0)) * float(regime.get("time_of_day", 0.0))
-            return float(_sigmoid(z))
+        if self._compiled is not None:
+            inputs = {name: expert_probs[key] for name, key in EXPERT_INPUTS if key in expert_probs}
+            inputs.update({name: regime[key] for name, key in REGIME_INPUTS if key in regime})
+            return self._compiled.predict_proba(inputs)
         # default: average experts
         if not expert_probs:
             return 0.5
         return float(sum(expert_probs.values()) / len(expert_probs))
+
+    def predict_proba_batch(self, X: Any, columns: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Score every row of a 2-D matrix of brain inputs.
+
+        Columns are ``INPUT_NAMES`` (expert probabilities, then regime
+        features) unless named via ``columns``/DataFrame columns; missing
+        inputs take the same defaults as ``predict_proba``. The averaging
+        fallback averages the expert columns present.
+        """
+        if not isinstance(self._model, dict):
+            return np.full(len(X), 0.5)
+        if self._compiled is not None:
+            return self._compiled.predict_proba_batch(X, columns)
+        if columns is None and hasattr(X, "columns"):
+            columns = list(X.columns)
+        X = np.asarray(X, dtype=np.float64)
+        columns = list(columns) if columns is not None else list(INPUT_NAMES[: X.shape[1]])
+        experts = [i for i, name in enumerate(columns) if name.startswith("experts.")]
+        if not experts:
+            return np.full(len(X), 0.5)
+        return X[:, experts].mean(axis=1)
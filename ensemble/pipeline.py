@@ -0,0 +1,199 @@
+"""
+Fused expert + brain scoring graph.
+
+``ScoringPipeline`` compiles the expert models and the brain into one
+graph over a single feature vector:
+
+    x --W_e, b_e--> expert logits --sigmoid--> expert probs --+
+    x --regime transforms-----------------------------------> brain logit --sigmoid--> p
+
+Every weight name is resolved once, at construction:
+
+- expert weights name feature columns; their union (in expert order) is the
+  pipeline's ``feature_names``;
+- brain weights must be ``experts.<name>`` for one of the experts or
+  ``regime.<name>`` for one of ``REGIME_INPUTS``; any other name raises
+  ``ValueError`` instead of being silently ignored.
+
+Regime inputs are derived from feature columns. ``time_of_day`` is the
+fraction of the day that ``features.feature_builder.build_features`` emits
+(hours / 24), so the training definition sin(2*pi*hours/24) is sin(2*pi*x):
+
+    regime.volatility   atr_pct
+    regime.time_of_day  time_of_day
+    regime.vol_z        vol_z
+    regime.tod_sin      sin(2*pi*time_of_day)
+    regime.tod_cos      cos(2*pi*time_of_day)
+
+``evaluate`` scores one bar from a feature dict in plain Python floats
+(cheapest for a single row); ``predict_proba_batch`` scores a matrix of
+bars with two matrix products. Missing features count as 0.0, as in the
+individual experts. An expert without a logistic model scores 0.5, and a
+brain without one averages the expert probabilities.
+
+Usage:
+    pipeline = ScoringPipeline.from_models({"rsi": rsi_expert, "macd": macd_expert, "trend": trend_expert}, brain)
+    scored = pipeline.evaluate(features)      # {"p": 0.53, "experts": {"rsi": ..., ...}}
+    p = pipeline.predict_proba_batch(df_feat) # one probability per row
+"""
+
+import math
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from experts.logistic import CompiledLogistic, sigmoid, sigmoid_array
+
+# regime input -> (source feature column, transform or None for the raw value)
+REGIME_INPUTS: Dict[str, Tuple[str, Optional[str]]] = {
+    "volatility": ("atr_pct", None),
+    "time_of_day": ("time_of_day", None),
+    "vol_z": ("vol_z", None),
+    "tod_sin": ("time_of_day", "sin"),
+    "tod_cos": ("time_of_day", "cos"),
+}
+# time_of_day is a fraction of the day (hours / 24), so one period is 1.0
+_TRANSFORMS: Dict[str, Tuple[Callable[[float], float], Callable[[np.ndarray], np.ndarray]]] = {
+    "sin": (lambda x: math.sin(2 * math.pi * x), lambda x: np.sin(2 * np.pi * x)),
+    "cos": (lambda x: math.cos(2 * math.pi * x), lambda x: np.cos(2 * np.pi * x)),
+}
+
+
+class ScoringPipeline:
+    """Feature vector -> expert probabilities -> brain probability, in one pass.
+
+    Parameters
+    ----------
+    experts : dict of str -> model dict
+        Expert name -> logistic model JSON (``{"type", "bias", "weights"}``).
+    brain : model dict
+        Brain model JSON; a logistic brain's weights are resolved against
+        the experts and ``REGIME_INPUTS``.
+    """
+
+    def __init__(self, experts: Mapping[str, Any], brain: Any):
+        self.expert_names = tuple(experts)
+        compiled = {name: CompiledLogistic.from_model(model) for name, model in experts.items()}
+
+        # Input columns: every expert feature, then any regime source column not already present
+        names: List[str] = []
+        for c in compiled.values():
+            names.extend(n for n in (c.feature_names if c is not None else ()) if n not in names)
+
+        self.brain_type = brain.get("type", "avg") if isinstance(brain, dict) else "avg"
+        brain_experts = np.zeros(len(self.expert_names))
+        regime_terms: List[Tuple[str, Optional[str], float]] = []
+        self.brain_bias = 0.0
+        if self.brain_type == "logistic":
+            self.brain_bias = float(brain.get("bias", 0.0))
+            for key, w in dict(brain.get("weights", {})).items():
+                group, _, name = key.partition(".")
+                if group == "experts" and name in self.expert_names:
+                    brain_experts[self.expert_names.index(name)] = float(w)
+                elif group == "regime" and name in REGIME_INPUTS:
+                    column, transform = REGIME_INPUTS[name]
+                    if column not in names:
+                        names.append(column)
+                    regime_terms.append((column, transform, float(w)))
+                else:
+                    known = [f"experts.{e}" for e in self.expert_names] + [f"regime.{r}" for r in REGIME_INPUTS]
+                    raise ValueError(f"Unknown brain weight {key!r}; expected one of {known}")
+        elif self.brain_type != "avg":
+            raise ValueError(f"Unsupported brain model type {self.brain_type!r}")
+
+        self.feature_names = tuple(names)
+        self.index = {n: i for i, n in enumerate(self.feature_names)}
+
+        # Expert layer: logits = x @ W + b (an expert without a model has logit 0 -> 0.5)
+        self.expert_weights = np.zeros((len(names), len(self.expert_names)))
+        self.expert_bias = np.zeros(len(self.expert_names))
+        for j, name in enumerate(self.expert_names):
+            c = compiled[name]
+            if c is not None:
+                self.expert_weights[[self.index[n] for n in c.feature_names], j] = c.weights
+                self.expert_bias[j] = c.bias
+        self.brain_expert_weights = brain_experts
+
+        # Raw regime inputs fold into one weight vector over x; transformed ones stay separate
+        self.brain_feature_weights = np.zeros(len(names))
+        self._transformed: List[Tuple[int, str, float]] = []
+        for column, transform, w in regime_terms:
+            if transform is None:
+                self.brain_feature_weights[self.index[column]] += w
+            else:
+                self._transformed.append((self.index[column], transform, w))
+
+        # Plain-float terms for single-bar evaluation
+        self._expert_terms = [
+            (name, [(n, float(w)) for n, w in zip(c.feature_names, c.weights.tolist())] if c else [], c.bias if c else 0.0)
+            for name, c in compiled.items()
+        ]
+        self._regime_terms = [(self.feature_names[i], float(w)) for i, w in enumerate(self.brain_feature_weights.tolist()) if w]
+        self._transformed_terms = [(self.feature_names[i], _TRANSFORMS[t][0], w) for i, t, w in self._transformed]
+        self._brain_expert_terms = list(zip(self.expert_names, brain_experts.tolist()))
+
+    @classmethod
+    def from_models(cls, experts: Mapping[str, Any], brain: Any) -> "ScoringPipeline":
+        """Build from loaded ``RSIExpert``/``MACDExpert``/``TrendExpert`` and ``Brain`` objects."""
+        return cls({name: e.model for name, e in experts.items()}, brain.model)
+
+    def missing_features(self, available: Sequence[str]) -> List[str]:
+        """Pipeline inputs not in ``available`` (they would score as 0.0)."""
+        have = set(available)
+        return [n for n in self.feature_names if n not in have]
+
+    def evaluate(self, features: Mapping[str, float]) -> Dict[str, Any]:
+        """Score one bar: ``{"p": brain probability, "experts": {name: probability}}``."""
+        probs = {}
+        for name, terms, bias in self._expert_terms:
+            z = bias
+            for n, w in terms:
+                z += w * float(features.get(n, 0.0))
+            probs[name] = sigmoid(z)
+        if self.brain_type != "logistic":
+            p = sum(probs.values()) / len(probs) if probs else 0.5
+            return {"p": float(p), "experts": probs}
+        z = self.brain_bias
+        for name, w in self._brain_expert_terms:
+            z += w * probs[name]
+        for n, w in self._regime_terms:
+            z += w * float(features.get(n, 0.0))
+        for n, fn, w in self._transformed_terms:
+            z += w * fn(float(features.get(n, 0.0)))
+        return {"p": float(sigmoid(z)), "experts": probs}
+
+    def predict_proba(self, features: Mapping[str, float]) -> float:
+        return self.evaluate(features)["p"]
+
+    def matrix(self, X: Any, columns: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Arrange ``X`` as ``(n, len(feature_names))`` float64 in pipeline order (missing columns = 0)."""
+        if columns is None and hasattr(X, "columns"):
+            columns = list(X.columns)
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2:
+            raise ValueError(f"Expected a 2-D feature matrix, got shape {X.shape}")
+        if columns is None:
+            if X.shape[1] != len(self.feature_names):
+                raise ValueError(f"Expected {len(self.feature_names)} columns {list(self.feature_names)}, got {X.shape[1]}")
+            return X
+        position = {name: i for i, name in enumerate(columns)}
+        out = np.zeros((X.shape[0], len(self.feature_names)))
+        for j, name in enumerate(self.feature_names):
+            if name in position:
+                out[:, j] = X[:, position[name]]
+        return out
+
+    def expert_proba_batch(self, X: Any, columns: Optional[Sequence[str]] = None) -> np.ndarray:
+        """``(n, n_experts)`` expert probabilities, columns in ``expert_names`` order."""
+        return sigmoid_array(self.matrix(X, columns) @ self.expert_weights + self.expert_bias)
+
+    def predict_proba_batch(self, X: Any, columns: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Brain probability for every row of ``X``."""
+        X = self.matrix(X, columns)
+        probs = sigmoid_array(X @ self.expert_weights + self.expert_bias)
+        if self.brain_type != "logistic":
+            return probs.mean(axis=1) if probs.shape[1] else np.full(len(X), 0.5)
+        z = probs @ self.brain_expert_weights + X @ self.brain_feature_weights + self.brain_bias
+        for i, transform, w in self._transformed:
+            z += w * _TRANSFORMS[transform][1](X[:, i])
+        return sigmoid_array(z)
@@ -0,0 +1,100 @@
+"""
+Compiled logistic models shared by the experts and the ensemble brain.
+
+A model JSON (``{"type": "logistic", "bias": b, "weights": {name: w}}``) is
+compiled once at load time into a fixed feature order, a Python weight list
+for single-row scoring and a NumPy weight vector for batches, so scoring
+no longer rebuilds the weight dict and converts every weight on each call.
+
+``predict_proba_batch`` scores a 2-D matrix (rows = bars or symbols) with
+one matrix-vector product. Its columns are either already in
+``feature_names`` order, or named via ``columns`` (a DataFrame's own
+columns are used automatically); features the matrix lacks take their
+default value.
+"""
+
+from math import exp
+from typing import Any, Dict, Mapping, Optional, Sequence
+
+import numpy as np
+
+
+def sigmoid(z: float) -> float:
+    try:
+        return 1.0 / (1.0 + exp(-z))
+    except OverflowError:
+        return 0.0 if z < 0 else 1.0
+
+
+def sigmoid_array(z: np.ndarray) -> np.ndarray:
+    """Vectorized ``sigmoid`` (saturates to 0/1 instead of overflowing)."""
+    with np.errstate(over="ignore"):
+        return 1.0 / (1.0 + np.exp(-z))
+
+
+class CompiledLogistic:
+    """``sigmoid(bias + w . x)`` over a fixed feature order.
+
+    Parameters
+    ----------
+    feature_names : sequence of str
+        Input names, in scoring order.
+    weights : sequence of float
+        One weight per name.
+    bias : float
+    defaults : sequence of float, optional
+        Value used for a feature missing from the input (0.0 by default).
+    """
+
+    def __init__(
+        self,
+        feature_names: Sequence[str],
+        weights: Sequence[float],
+        bias: float = 0.0,
+        defaults: Optional[Sequence[float]] = None,
+    ):
+        self.feature_names = tuple(feature_names)
+        self.index: Dict[str, int] = {name: i for i, name in enumerate(self.feature_names)}
+        self.bias = float(bias)
+        self.weights = np.asarray([float(w) for w in weights], dtype=np.float64)
+        self.defaults = np.zeros(len(self.feature_names)) if defaults is None else np.asarray(defaults, dtype=np.float64)
+        # Plain floats: faster than NumPy for scoring one small row
+        self._terms = list(zip(self.feature_names, self.weights.tolist(), self.defaults.tolist()))
+
+    @classmethod
+    def from_model(cls, model: Any) -> Optional["CompiledLogistic"]:
+        """Compile a logistic model dict (weights in file order); ``None`` for any other model."""
+        if not isinstance(model, dict) or model.get("type") != "logistic":
+            return None
+        weights = dict(model.get("weights", {}))
+        return cls(list(weights), list(weights.values()), model.get("bias", 0.0))
+
+    def decision(self, features: Mapping[str, float]) -> float:
+        z = self.bias
+        for name, w, default in self._terms:
+            z += w * float(features.get(name, default))
+        return z
+
+    def predict_proba(self, features: Mapping[str, float]) -> float:
+        return float(sigmoid(self.decision(features)))
+
+    def matrix(self, X: Any, columns: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Arrange ``X`` as a float64 ``(n, len(feature_names))`` matrix in scoring order."""
+        if columns is None and hasattr(X, "columns"):
+            columns = list(X.columns)
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2:
+            raise ValueError(f"Expected a 2-D feature matrix, got shape {X.shape}")
+        if columns is None:
+            if X.shape[1] != len(self.feature_names):
+                raise ValueError(f"Expected {len(self.feature_names)} columns {list(self.feature_names)}, got {X.shape[1]}")
+            return X
+        position = {name: i for i, name in enumerate(columns)}
+        out = np.empty((X.shape[0], len(self.feature_names)))
+        for j, name in enumerate(self.feature_names):
+            out[:, j] = X[:, position[name]] if name in position else self.defaults[j]
+        return out
+
+    def predict_proba_batch(self, X: Any, columns: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Probabilities for every row of ``X`` (see ``matrix`` for the column contract)."""
+        return sigmoid_array(self.matrix(X, columns) @ self.weights + self.bias)
@@ -0,0 +1,196 @@
+"""
+Shared model loading, caching and hot reload for ``models/*.json``.
+
+``read_model`` is the one ObjectStore-then-local-file JSON loader used by
+every expert and the brain.
+
+``ModelRegistry`` keeps the *compiled* form of each registered model
+(e.g. a ``ScoringPipeline`` built from four JSON files) and swaps it
+atomically when a source changes:
+
+- ``refresh()`` (throttled to ``check_interval`` seconds) stats each
+  source: the local file's mtime/size, or the ObjectStore file behind the
+  key (``GetFilePath``). Only a changed source is re-read.
+- Sources are parsed once per content hash (sha256 of the raw bytes), and
+  compiled objects are cached by the hashes of their sources, so touching a
+  file without changing it, or reverting to a previous version, rebuilds
+  nothing.
+- A new object is built completely before it replaces the old one in a
+  single reference swap; ``get()`` just returns the current reference, so an
+  in-flight decision holding it never sees a half-loaded model. A source
+  that fails to read, parse or compile (e.g. caught mid-write) keeps the
+  previous model and is retried on the next refresh.
+
+Usage:
+    registry = ModelRegistry(obj_store)
+    registry.register("scorer", ["models/rsi_expert.json", "models/brain.json"], build_scorer)
+    registry.refresh()               # cheap; call once per bar
+    scorer = registry.get("scorer")  # no I/O, no JSON parsing
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+
+def _read_bytes(obj_store: Any, key: str) -> Optional[bytes]:
+    """Raw model bytes from QC Object Store, else the local file ``key``; None if neither."""
+    if obj_store is not None:
+        try:
+            if obj_store.ContainsKey(key):
+                return bytes(obj_store.ReadBytes(key))
+        except Exception:
+            pass
+    try:
+        with open(key, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def read_model(obj_store: Any, key: str) -> Any:
+    """Load a model JSON from QC Object Store or local path; None if missing or unparsable.
+
+    key example: 'models/rsi_expert.json'
+    """
+    data = _read_bytes(obj_store, key)
+    if data is None:
+        return None
+    try:
+        return json.loads(data.decode("utf-8"))
+    except ValueError:
+        return None
+
+
+class _Entry(NamedTuple):
+    versions: Tuple[Any, ...]  # per-source change token (mtime/size, or content hash)
+    digests: Tuple[Optional[str], ...]  # per-source sha256 (None = missing)
+    value: Any
+
+
+class ModelRegistry:
+    """Compiled models built from ``models/*.json`` sources, reloaded when a source changes.
+
+    Parameters
+    ----------
+    obj_store : QC ObjectStore or None
+        Checked before the local file for every key.
+    check_interval : float
+        Minimum seconds between source checks in ``refresh()``.
+    cache_size : int
+        Parsed sources and compiled objects kept per content hash.
+    clock : callable
+        Monotonic seconds (injectable for tests).
+    """
+
+    def __init__(
+        self,
+        obj_store: Any = None,
+        check_interval: float = 5.0,
+        cache_size: int = 16,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.obj_store = obj_store
+        self.check_interval = check_interval
+        self.cache_size = cache_size
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._specs: Dict[str, Tuple[Tuple[str, ...], Callable[..., Any]]] = {}
+        self._entries: Dict[str, _Entry] = {}
+        self._parsed: "OrderedDict[str, Any]" = OrderedDict()  # sha256 -> parsed JSON
+        self._built: "OrderedDict[Tuple[str, Tuple], Any]" = OrderedDict()  # (name, digests) -> object
+        self._last_check: Optional[float] = None
+        self.reloads = 0
+        self.errors: Dict[str, str] = {}  # name -> last reload failure
+
+    def register(self, name: str, keys: Sequence[str], build: Callable[..., Any]) -> Any:
+        """Register ``build(*models)`` over the JSON at ``keys`` and build it now.
+
+        ``build`` receives one parsed model per key (None if missing). Errors
+        from this first build propagate; later reload failures keep the
+        previous object.
+        """
+        with self._lock:
+            self._specs[name] = (tuple(keys), build)
+            self._entries[name] = self._load(name, previous=None)
+            return self._entries[name].value
+
+    def get(self, name: str) -> Any:
+        """The current compiled object for ``name`` (no I/O)."""
+        return self._entries[name].value
+
+    def refresh(self, force: bool = False) -> List[str]:
+        """Reload every registration whose sources changed; return the reloaded names."""
+        now = self._clock()
+        if not force and self._last_check is not None and now - self._last_check < self.check_interval:
+            return []
+        reloaded = []
+        with self._lock:
+            self._last_check = now
+            for name in self._specs:
+                previous = self._entries[name]
+                try:
+                    entry = self._load(name, previous)
+                except Exception as e:
+                    self.errors[name] = f"{type(e).__name__}: {e}"
+                    continue
+                self.errors.pop(name, None)
+                if entry is previous:
+                    continue
+                if entry.value is not previous.value:
+                    reloaded.append(name)
+                    self.reloads += 1
+                self._entries[name] = entry  # single reference swap
+        return reloaded
+
+    def _load(self, name: str, previous: Optional[_Entry]) -> _Entry:
+        keys, build = self._specs[name]
+        versions = tuple(self._version(key) for key in keys)
+        if previous is not None and versions == previous.versions:
+            return previous
+        digests, models = [], []
+        for key in keys:
+            raw = _read_bytes(self.obj_store, key)
+            digest = hashlib.sha256(raw).hexdigest() if raw is not None else None
+            digests.append(digest)
+            models.append(self._parse(digest, raw))
+        digests_t = tuple(digests)
+        if previous is not None and digests_t == previous.digests:
+            return _Entry(versions, digests_t, previous.value)
+        value = self._cached(self._built, (name, digests_t), lambda: build(*models))
+        return _Entry(versions, digests_t, value)
+
+    def _parse(self, digest: Optional[str], raw: Optional[bytes]) -> Any:
+        if digest is None:
+            return None
+        # Raises on a partially written file, so the previous model is kept
+        return self._cached(self._parsed, digest, lambda: json.loads(raw.decode("utf-8")))
+
+    def _cached(self, cache: "OrderedDict", key: Any, make: Callable[[], Any]) -> Any:
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+        value = cache[key] = make()
+        while len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        return value
+
+    def _version(self, key: str) -> Any:
+        """Cheap change token for ``key``: file mtime/size, else the ObjectStore content hash."""
+        path = key
+        if self.obj_store is not None:
+            try:
+                if self.obj_store.ContainsKey(key):
+                    path = self.obj_store.GetFilePath(key)
+            except Exception:
+                raw = _read_bytes(self.obj_store, key)
+                return hashlib.sha256(raw).hexdigest() if raw is not None else None
+        try:
+            st = os.stat(path)
+        except (OSError, TypeError):
+            return None
+        return (st.st_mtime_ns, st.st_size)
@@ -2,46 +2,42 @@
 Trend expert model interface using simple logistic with EMA/BB features.
 """
 
-from typing import Any, Dict
-import json
-from math import exp
+from typing import Any, Dict, Optional, Sequence
 
+import numpy as np
 
-def _sigmoid(z: float) -> float:
-    try:
-        return 1.0 / (1.0 + exp(-z))
-    except OverflowError:
-        return 0.0 if z < 0 else 1.0
+from experts.logistic import CompiledLogistic
+from experts.registry import read_model
 
 
 class TrendExpert:
     def __init__(self, model: Any = None):
         self._model = model or {"type": "logistic", "bias": 0.0, "weights": {}}
+        # Compiled once: fixed feature order + weight vector (None if not a logistic model)
+        self._compiled = CompiledLogistic.from_model(self._model)
+
+    @property
+    def model(self) -> Any:
+        """The loaded model JSON (compiled into ``ensemble.pipeline.ScoringPipeline``)."""
+        return self._model
+
+    @property
+    def feature_names(self) -> tuple:
+        """Column order expected by ``predict_proba_batch``."""
+        return self._compiled.feature_names if self._compiled is not None else ()
 
     @classmethod
     def load(cls, obj_store: Any, key: str) -> "TrendExpert":
-        data = None
-        if obj_store is not None:
-            try:
-                if obj_store.ContainsKey(key):
-                    raw = obj_store.ReadBytes(key)
-                    data = json.loads(raw.decode("utf-8"))
-            except Exception:
-                data = None
-        if data is None:
-            try:
-                with open(key, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-            except Exception:
-                data = None
-        return cls(data)
+        """Load the model from QC Object Store or local path (see ``experts.registry.read_model``)."""
+        return cls(read_model(obj_store, key))
 
     def predict_proba(self, features: Dict[str, float]) -> float:
-        if not isinstance(self._model, dict) or self._model.get("type") != "logistic":
+        if self._compiled is None:
             return 0.5
-        bias = float(self._model.get("bias", 0.0))
-        weights: Dict[str, float] = dict(self._model.get("weights", {}))
-        z = bias
-        for name, w in weights.items():
-            z += float(w) * float(features.get(name, 0.0))
-        return float(_sigmoid(z))
+        return self._compiled.predict_proba(features)
+
+    def predict_proba_batch(self, X: Any, columns: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Score every row of a 2-D feature matrix (or DataFrame) in one matrix-vector product."""
+        if self._compiled is None:
+            return np.full(len(X), 0.5)
+        return self._compiled.predict_proba_batch(X, columns)
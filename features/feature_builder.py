@@ -3,6 +3,11 @@ Feature builder for indicators and simple regime features.
 
 This module will be used by the QuantConnect algorithm to compute
 and package features for experts and the ensemble brain.
+
+When the algorithm feeds a ``StreamingFeatureEngine`` (``context.engine``),
+the strategy features (RSI, ATR, vol_z, volm_z, ema200_rel, bb_z) come from
+the shared ``features.indicators`` library instead of LEAN's indicators, so
+QC sees the same values as the live bot and the research backtests.
 """
 
 from typing import Dict, Any
@@ -55,6 +60,18 @@ def build_features(context: Any) -> Dict[str, float]:
     bb_width = bb_upper - bb_lower
     bb_z = (price - bb_mid) / (0.5 * bb_width) if bb_width > 0 else 0.0
 
+    # Shared-library values for the strategy features, once the engine is warm
+    row = getattr(getattr(context, "engine", None), "latest", None)
+    vol_z = volm_z = 0.0
+    if row:
+        rsi_val = float(row["rsi"])
+        atr_val = float(row["atr"])
+        atr_pct = atr_val / price
+        ema200_rel = float(row["ema200_rel"])
+        bb_z = float(row["bb_z"])
+        vol_z = float(row["vol_z"])
+        volm_z = float(row["volm_z"])
+
     # Regime features: time-of-day and realized volatility (stub for now)
     time_of_day = context.Time.hour + context.Time.minute / 60.0 if hasattr(context, 'Time') else 9.5
     time_of_day_norm = time_of_day / 24.0  # Normalize to [0, 1]
@@ -71,6 +88,8 @@ def build_features(context: Any) -> Dict[str, float]:
         'ema50_rel': ema50_rel,
         'ema200_rel': ema200_rel,
         'bb_z': bb_z,
+        'vol_z': vol_z,
+        'volm_z': volm_z,
         'time_of_day': time_of_day_norm,
     }
 
@@ -0,0 +1,448 @@
+"""
+Shared indicator library for the live bot, the research backtests and QC.
+
+Every indicator has a batch kernel (NumPy arrays in, arrays out, NaN until
+warm) and an incremental class (one bar per ``update``, fixed state). Both
+variants perform the same floating-point operations in the same order, so
+the value the bot computes bar by bar is bit-for-bit the value the backtest
+computes for the same bar:
+
+- EMAs use the pandas ``ewm(adjust=False)`` update (a recursion, so the
+  batch kernel is a tight scalar loop shared with the incremental class).
+- Rolling mean/std sum each window in chronological order; the batch
+  kernel does it one window offset at a time across all bars.
+- Everything else is element-wise NumPy arithmetic, which rounds exactly
+  like Python floats.
+
+The definitions are the live bot's: Wilder RSI/ATR (14), 20-bar return
+volatility z-scored over 60 bars, 20-bar volume z-score, Bollinger z over
+2 standard deviations, ``ema200_rel`` as a fraction, and a Wilder 15-minute
+RSI whose forming bar uses the latest close.
+
+Usage:
+    feats = compute_features(o, h, l, c, v, times)   # dict of arrays
+    rsi14 = WilderRSI(); rsi14.update(close)         # per bar
+
+Benchmarks: ``python -m features.benchmark``.
+"""
+
+import math
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pytz
+
+RSI_PERIOD = 14
+ATR_PERIOD = 14
+VOL_WINDOW = 20          # bars of returns per volatility estimate
+VOL_Z_WINDOW = 60        # bars of volatility per z-score
+VOLM_Z_WINDOW = 20
+BB_WINDOW = 20
+BB_STD = 2.0
+TREND_EMA = 200
+RSI_15M_MINUTES = 15
+RSI_EPS = 1e-12          # added to the average loss
+Z_EPS = 1e-8             # added to standard deviations
+
+EXCHANGE_TZ = "US/Eastern"
+EASTERN = pytz.timezone(EXCHANGE_TZ)
+
+_NS_PER_MINUTE = 60_000_000_000
+
+
+# --- Scalar steps shared by both variants ---------------------------------
+
+def ema_alpha(period: Optional[int] = None, alpha: Optional[float] = None) -> float:
+    """Span-style ``2 / (period + 1)`` unless ``alpha`` is given (Wilder: ``1 / period``)."""
+    if alpha is None:
+        if period is None:
+            raise ValueError("EMA needs either period or alpha")
+        alpha = 2.0 / (period + 1.0)
+    return float(alpha)
+
+
+def _ema_loop(x: np.ndarray, alpha: float, start: int = 0) -> np.ndarray:
+    """``ewm(alpha, adjust=False).mean()`` of ``x[start:]``; NaN before ``start``."""
+    out = np.full(len(x), np.nan)
+    if start >= len(x):
+        return out
+    old_wt = 1.0 - alpha
+    denom = old_wt + alpha
+    values = x[start:].tolist()
+    res = []
+    append = res.append
+    v = values[0]
+    append(v)
+    for xi in values[1:]:
+        if v != xi:
+            v = (old_wt * v + alpha * xi) / denom
+        append(v)
+    out[start:] = res
+    return out
+
+
+# --- Batch kernels --------------------------------------------------------
+
+def ema(x: np.ndarray, period: Optional[int] = None, alpha: Optional[float] = None) -> np.ndarray:
+    """Exponential moving average of ``x`` (leading NaNs are skipped)."""
+    x = np.asarray(x, dtype=float)
+    valid = np.flatnonzero(~np.isnan(x))
+    return _ema_loop(x, ema_alpha(period, alpha), int(valid[0]) if len(valid) else len(x))
+
+
+def rsi(close: np.ndarray, period: int = RSI_PERIOD, eps: float = RSI_EPS) -> np.ndarray:
+    """Wilder RSI; NaN on the first bar."""
+    close = np.asarray(close, dtype=float)
+    if len(close) == 0:
+        return np.empty(0)
+    delta = np.empty(len(close))
+    delta[0] = np.nan
+    delta[1:] = close[1:] - close[:-1]
+    up = _ema_loop(np.where(delta > 0, delta, 0.0), 1.0 / period, 1)
+    down = _ema_loop(np.where(delta < 0, -delta, 0.0), 1.0 / period, 1) + eps
+    return 100 - (100 / (1 + up / down))
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = ATR_PERIOD) -> np.ndarray:
+    """Wilder average true range (the first bar's true range is high - low)."""
+    high, low, close = (np.asarray(a, dtype=float) for a in (high, low, close))
+    tr = high - low
+    tr[1:] = np.maximum(tr[1:], np.maximum(np.abs(high[1:] - close[:-1]), np.abs(low[1:] - close[:-1])))
+    return _ema_loop(tr, 1.0 / period)
+
+
+def rolling_mean_std(x: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Mean and sample std (ddof=1) of the trailing ``window`` values; NaN until full."""
+    x = np.asarray(x, dtype=float)
+    n = len(x)
+    mean = np.full(n, np.nan)
+    std = np.full(n, np.nan)
+    if n < window:
+        return mean, std
+    w = np.lib.stride_tricks.sliding_window_view(x, window)
+    total = w[:, 0].copy()
+    for k in range(1, window):
+        total += w[:, k]
+    m = total / window
+    ssq = np.zeros(len(m))
+    for k in range(window):
+        d = w[:, k] - m
+        ssq += d * d
+    mean[window - 1:] = m
+    std[window - 1:] = np.sqrt(ssq / (window - 1))
+    return mean, std
+
+
+def zscore(x: np.ndarray, window: int, eps: float = Z_EPS) -> np.ndarray:
+    """``(x - rolling_mean) / (rolling_std + eps)``, current value inside the window."""
+    x = np.asarray(x, dtype=float)
+    mean, std = rolling_mean_std(x, window)
+    return (x - mean) / (std + eps)
+
+
+def returns(close: np.ndarray) -> np.ndarray:
+    """Simple one-bar returns; NaN on the first bar."""
+    close = np.asarray(close, dtype=float)
+    out = np.empty(len(close))
+    out[:1] = np.nan
+    out[1:] = close[1:] / close[:-1] - 1
+    return out
+
+
+def vol_z(close: np.ndarray, vol_window: int = VOL_WINDOW, z_window: int = VOL_Z_WINDOW) -> np.ndarray:
+    """Z-score of the rolling return volatility (volatility regime)."""
+    return zscore(rolling_mean_std(returns(close), vol_window)[1], z_window)
+
+
+def bb_z(close: np.ndarray, window: int = BB_WINDOW, num_std: float = BB_STD) -> np.ndarray:
+    """Distance from the Bollinger mid-band in units of the band half-width."""
+    close = np.asarray(close, dtype=float)
+    mid, std = rolling_mean_std(close, window)
+    return (close - mid) / (num_std * std + Z_EPS)
+
+
+def ema_rel(close: np.ndarray, period: int = TREND_EMA) -> np.ndarray:
+    """Fractional distance of ``close`` above its EMA (-0.05 = 5% below)."""
+    close = np.asarray(close, dtype=float)
+    e = ema(close, period)
+    return (close - e) / e
+
+
+def time_of_day(index: pd.DatetimeIndex) -> np.ndarray:
+    """Exchange-time hours (10:30 ET = 10.5); tz-naive indexes are taken as exchange time."""
+    if index.tz is not None:
+        index = index.tz_convert(EXCHANGE_TZ)
+    return np.asarray(index.hour + index.minute / 60.0, dtype=float)
+
+
+def bucket_ids(times_ns: np.ndarray, minutes: int) -> np.ndarray:
+    """Bar bucket number of each timestamp (epoch nanoseconds) for ``minutes``-minute bars."""
+    return np.asarray(times_ns, dtype=np.int64) // (minutes * _NS_PER_MINUTE)
+
+
+def resampled_rsi(
+    close: np.ndarray,
+    bucket: np.ndarray,
+    period: int = RSI_PERIOD,
+    eps: float = RSI_EPS,
+    neutral: float = 50.0,
+) -> np.ndarray:
+    """Wilder RSI of a coarser timeframe, as seen at every fine bar.
+
+    ``bucket`` (non-decreasing) groups fine bars into coarse bars; a coarse
+    bar's close is its last fine close, and the bar containing the current
+    fine bar is still forming, so its provisional close is the current
+    close. Bars with fewer than ``period + 1`` coarse bars get ``neutral``.
+    """
+    close = np.asarray(close, dtype=float)
+    bucket = np.asarray(bucket)
+    n = len(close)
+    if n == 0:
+        return np.empty(0)
+    first = np.flatnonzero(np.diff(bucket, prepend=bucket[0] - 1))
+    k = np.cumsum(np.diff(bucket, prepend=bucket[0]) != 0)
+    c_coarse = close[np.append(first[1:], n) - 1]
+
+    # Wilder averages after each completed coarse bar (index j: bars 0..j)
+    alpha = 1.0 / period
+    delta = np.empty(len(c_coarse))
+    delta[:1] = np.nan
+    delta[1:] = c_coarse[1:] - c_coarse[:-1]
+    up = _ema_loop(np.where(delta > 0, delta, 0.0), alpha, 1)
+    down = _ema_loop(np.where(delta < 0, -delta, 0.0), alpha, 1)
+
+    valid = k >= period
+    kv = np.where(valid, k, period)
+    cur = close - c_coarse[kv - 1]
+    prev_up, prev_down = up[kv - 1], down[kv - 1]
+    gain, loss = np.maximum(cur, 0.0), np.maximum(-cur, 0.0)
+    old_wt = 1.0 - alpha
+    denom = old_wt + alpha
+    avg_up = np.where(prev_up != gain, (old_wt * prev_up + alpha * gain) / denom, prev_up)
+    avg_down = np.where(prev_down != loss, (old_wt * prev_down + alpha * loss) / denom, prev_down) + eps
+    value = 100 - (100 / (1 + avg_up / avg_down))
+    return np.where(valid, value, neutral)
+
+
+def rsi_15m(close: np.ndarray, times_ns: np.ndarray, period: int = RSI_PERIOD) -> np.ndarray:
+    """Wilder 15-minute RSI at every 5-minute bar (see ``resampled_rsi``)."""
+    return resampled_rsi(close, bucket_ids(times_ns, RSI_15M_MINUTES), period)
+
+
+def compute_features(
+    open_: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    volume: np.ndarray,
+    index: pd.DatetimeIndex,
+) -> Dict[str, np.ndarray]:
+    """The full strategy feature set for a bar series (NaN where not warm).
+
+    Keys match ``StreamingFeatureEngine`` rows (default timeframes) plus
+    ``atr_pct``.
+    """
+    close = np.asarray(close, dtype=float)
+    ema200 = ema(close, TREND_EMA)
+    mid, std = rolling_mean_std(close, BB_WINDOW)
+    atr14 = atr(high, low, close)
+    return {
+        "open": np.asarray(open_, dtype=float),
+        "high": np.asarray(high, dtype=float),
+        "low": np.asarray(low, dtype=float),
+        "close": close,
+        "volume": np.asarray(volume, dtype=float),
+        "rsi": rsi(close),
+        "atr": atr14,
+        "atr_pct": atr14 / close,
+        "ema20": ema(close, 20),
+        "ema50": ema(close, 50),
+        "ema200": ema200,
+        "bb_mid": mid,
+        "bb_upper": mid + std * BB_STD,
+        "bb_lower": mid - std * BB_STD,
+        "vol_z": vol_z(close),
+        "volm_z": zscore(volume, VOLM_Z_WINDOW),
+        "time_of_day": time_of_day(index),
+        "ema200_rel": (close - ema200) / ema200,
+        "bb_z": (close - mid) / (BB_STD * std + Z_EPS),
+        "rsi_15m": rsi_15m(close, index.as_unit("ns").asi8),
+    }
+
+
+# --- Incremental variants -------------------------------------------------
+
+class EMA:
+    """Exponential moving average, one value at a time (see ``ema``)."""
+
+    def __init__(self, period: Optional[int] = None, alpha: Optional[float] = None):
+        self.alpha = ema_alpha(period, alpha)
+        self.value: Optional[float] = None
+
+    def update(self, x: float) -> float:
+        self.value = self.peek(x)
+        return self.value
+
+    def peek(self, x: float) -> float:
+        """The value ``update(x)`` would return, without changing state."""
+        if self.value is None:
+            return float(x)
+        if self.value == x:
+            return self.value
+        old_wt = 1.0 - self.alpha
+        return (old_wt * self.value + self.alpha * x) / (old_wt + self.alpha)
+
+
+class WilderRSI:
+    """RSI with Wilder smoothing of average gains and losses (see ``rsi``)."""
+
+    def __init__(self, period: int = RSI_PERIOD, eps: float = RSI_EPS):
+        self.eps = eps
+        self._up = EMA(alpha=1.0 / period)
+        self._down = EMA(alpha=1.0 / period)
+        self._prev_close: Optional[float] = None
+        self.value: Optional[float] = None
+
+    def update(self, close: float) -> Optional[float]:
+        prev, self._prev_close = self._prev_close, float(close)
+        if prev is None:
+            return None
+        delta = close - prev
+        roll_up = self._up.update(delta if delta > 0 else 0.0)
+        roll_down = self._down.update(-delta if delta < 0 else 0.0) + self.eps
+        self.value = 100 - (100 / (1 + roll_up / roll_down))
+        return self.value
+
+
+class WilderATR:
+    """Average true range with Wilder smoothing (see ``atr``)."""
+
+    def __init__(self, period: int = ATR_PERIOD):
+        self._tr = EMA(alpha=1.0 / period)
+        self._prev_close: Optional[float] = None
+        self.value: Optional[float] = None
+
+    def update(self, high: float, low: float, close: float) -> float:
+        tr = high - low
+        if self._prev_close is not None:
+            tr = max(tr, abs(high - self._prev_close), abs(low - self._prev_close))
+        self._prev_close = float(close)
+        self.value = self._tr.update(tr)
+        return self.value
+
+
+class RollingStats:
+    """Mean and sample std (ddof=1) over the last ``window`` values (see ``rolling_mean_std``).
+
+    The window is held in a ring buffer and reduced in chronological order,
+    so the cost per bar is bounded by the window length, never by history.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self._buf: Deque[float] = deque(maxlen=window)
+        self.mean: Optional[float] = None
+        self.std: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return len(self._buf) == self.window
+
+    def update(self, x: float) -> bool:
+        self._buf.append(float(x))
+        if not self.ready:
+            return False
+        total = 0.0
+        for v in self._buf:
+            total += v
+        mean = total / self.window
+        ssq = 0.0
+        for v in self._buf:
+            d = v - mean
+            ssq += d * d
+        self.mean = mean
+        self.std = math.sqrt(ssq / (self.window - 1))
+        return True
+
+
+class RollingZScore:
+    """``(x - rolling_mean) / (rolling_std + eps)`` (see ``zscore``)."""
+
+    def __init__(self, window: int, eps: float = Z_EPS):
+        self.eps = eps
+        self._stats = RollingStats(window)
+        self.value: Optional[float] = None
+
+    def update(self, x: float) -> Optional[float]:
+        if self._stats.update(x):
+            self.value = (x - self._stats.mean) / (self._stats.std + self.eps)
+        return self.value
+
+
+class VolatilityZScore:
+    """Z-score of the rolling return volatility (see ``vol_z``)."""
+
+    def __init__(self, vol_window: int = VOL_WINDOW, z_window: int = VOL_Z_WINDOW):
+        self._ret_vol = RollingStats(vol_window)
+        self._z = RollingZScore(z_window)
+        self._prev_close: Optional[float] = None
+        self.value: Optional[float] = None
+
+    def update(self, close: float) -> Optional[float]:
+        if self._prev_close is not None and self._ret_vol.update(close / self._prev_close - 1):
+            self.value = self._z.update(self._ret_vol.std)
+        self._prev_close = float(close)
+        return self.value
+
+
+class ResampledRSI:
+    """Wilder RSI of a coarser timeframe, updated with every fine bar (see ``resampled_rsi``).
+
+    ``update(bucket, close)`` takes the coarse bar number of the fine bar
+    (``bucket_ids``); the coarse bar it belongs to stays provisional until a
+    fine bar from a later bucket arrives.
+    """
+
+    def __init__(self, period: int = RSI_PERIOD, eps: float = RSI_EPS, neutral: float = 50.0):
+        self.period = period
+        self.eps = eps
+        self.neutral = neutral
+        self._up = EMA(alpha=1.0 / period)
+        self._down = EMA(alpha=1.0 / period)
+        self._bucket: Optional[int] = None
+        self._count = 0                 # coarse bars seen, including the forming one
+        self._last_close: Optional[float] = None   # close of the latest completed coarse bar
+        self._forming_close: Optional[float] = None
+        self.value: float = neutral
+
+    def update(self, bucket: int, close: float) -> float:
+        if bucket != self._bucket:
+            if self._forming_close is not None:
+                # The previous coarse bar is complete: fold its change in
+                if self._last_close is not None:
+                    delta = self._forming_close - self._last_close
+                    self._up.update(delta if delta > 0 else 0.0)
+                    self._down.update(-delta if delta < 0 else 0.0)
+                self._last_close = self._forming_close
+            self._bucket = bucket
+            self._count += 1
+        self._forming_close = float(close)
+
+        if self._count <= self.period:
+            self.value = self.neutral
+            return self.value
+        cur = close - self._last_close
+        avg_up = self._up.peek(cur if cur > 0 else 0.0)
+        avg_down = self._down.peek(-cur if cur < 0 else 0.0) + self.eps
+        self.value = 100 - (100 / (1 + avg_up / avg_down))
+        return self.value
+
+
+def exchange_time_of_day(ts: datetime) -> float:
+    """``time_of_day`` for one timestamp (naive = exchange time)."""
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(EASTERN)
+    return ts.hour + ts.minute / 60.0
@@ -0,0 +1,203 @@
+"""
+Persisted snapshots of the streaming indicator state, for warm restarts.
+
+A snapshot holds everything ``StreamingFeatureEngine`` needs to carry on
+exactly where it stopped: the last bar timestamp, every EMA value and
+Wilder accumulator, the rolling-window buffers, the undo copy for a revised
+last bar and the latest feature row, plus a small ``strategy`` dict the
+caller owns (last entry time, trailing-stop level, ...). A restarted bot
+restores it and only replays the bars that closed while it was down,
+instead of re-warming from weeks of history.
+
+Floats are written with ``repr`` precision by ``json``, so a restored engine
+produces bit-for-bit the rows the original would have produced.
+
+A snapshot is rejected (``SnapshotError``) rather than half-trusted when:
+- its SHA-256 checksum does not match (truncated or edited file),
+- it was written by another snapshot version, another symbol or another
+  set of higher timeframes,
+- the indicator definitions changed since it was written (the signature
+  covers the source of ``features.indicators`` and ``features.streaming``),
+- its state does not have exactly the shape of a fresh engine's state,
+- it is older than ``max_age`` (when given).
+
+File format: the hex checksum on the first line, the JSON payload after it.
+Files are replaced atomically, so a crash mid-write leaves the previous
+snapshot intact.
+
+Usage:
+    save_snapshot(path, engine, "TSLA", strategy={"last_entry_time": ...})
+    strategy = load_snapshot(path, engine, "TSLA")   # None if no file
+"""
+
+import hashlib
+import inspect
+import json
+import os
+from collections import deque
+from datetime import datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+import pandas as pd
+
+from features import indicators, streaming
+from features.streaming import StreamingFeatureEngine, _IndicatorState
+
+SNAPSHOT_VERSION = 1
+
+
+class SnapshotError(ValueError):
+    """A snapshot that cannot be trusted to restore the engine."""
+
+
+def engine_signature(engine: StreamingFeatureEngine) -> str:
+    """Short hash of the indicator definitions and the engine's timeframes."""
+    return _signature(tuple(engine.timeframes))
+
+
+@lru_cache(maxsize=None)
+def _signature(timeframes: tuple) -> str:
+    h = hashlib.sha256()
+    h.update(f"v{SNAPSHOT_VERSION}:{list(timeframes)}".encode())
+    for module in (indicators, streaming):
+        h.update(inspect.getsource(module).encode())
+    return h.hexdigest()[:16]
+
+
+def _export(obj: Any) -> Any:
+    """Indicator object tree -> JSON-compatible structure."""
+    if isinstance(obj, deque):
+        return [_export(v) for v in obj]
+    if isinstance(obj, (list, tuple)):
+        return [_export(v) for v in obj]
+    if isinstance(obj, dict):
+        return {str(k): _export(v) for k, v in obj.items()}
+    if hasattr(obj, "__dict__"):
+        return {k: _export(v) for k, v in vars(obj).items()}
+    return obj
+
+
+def _restore(template: Any, data: Any, where: str) -> Any:
+    """Fill a freshly built object tree from ``data``, checking it has the same shape."""
+    if isinstance(template, deque):
+        if not isinstance(data, list) or len(data) > template.maxlen:
+            raise SnapshotError(f"Bad buffer at {where}")
+        return deque((_restore(0.0, v, where) for v in data), maxlen=template.maxlen)
+    if isinstance(template, tuple):
+        if list(template) != data:
+            raise SnapshotError(f"Mismatched settings at {where}: {data} != {list(template)}")
+        return template
+    if isinstance(template, dict):
+        if not isinstance(data, dict) or set(data) != {str(k) for k in template}:
+            raise SnapshotError(f"Mismatched keys at {where}")
+        return {k: _restore(v, data[str(k)], f"{where}[{k}]") for k, v in template.items()}
+    if hasattr(template, "__dict__"):
+        fields = vars(template)
+        if not isinstance(data, dict) or set(data) != set(fields):
+            raise SnapshotError(f"Mismatched fields at {where}")
+        for k, v in fields.items():
+            setattr(template, k, _restore(v, data[k], f"{where}.{k}"))
+        return template
+    if data is not None and (isinstance(data, bool) or not isinstance(data, (int, float))):
+        raise SnapshotError(f"Expected a number at {where}, got {type(data).__name__}")
+    return data
+
+
+def dumps_snapshot(engine: StreamingFeatureEngine, symbol: str, strategy: Optional[Dict[str, Any]] = None) -> str:
+    """Serialize the engine (and caller ``strategy`` state) to snapshot text."""
+    payload = {
+        "version": SNAPSHOT_VERSION,
+        "signature": engine_signature(engine),
+        "symbol": symbol.upper(),
+        "last_timestamp": None if engine.last_timestamp is None else pd.Timestamp(engine.last_timestamp).isoformat(),
+        "latest": engine.latest,
+        "state": _export(engine._state),
+        "before_last": None if engine._before_last is None else _export(engine._before_last),
+        "strategy": strategy or {},
+    }
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(body.encode()).hexdigest() + "\n" + body
+
+
+def loads_snapshot(
+    text: str,
+    engine: StreamingFeatureEngine,
+    symbol: str,
+    now: Optional[datetime] = None,
+    max_age: Optional[timedelta] = None,
+) -> Dict[str, Any]:
+    """Validate snapshot text and restore it into ``engine``; return its ``strategy`` dict.
+
+    Raises ``SnapshotError`` (leaving ``engine`` untouched) if the snapshot
+    fails any check. ``max_age`` is measured from the last bar to ``now``
+    (both in the same timezone convention as the bars fed to the engine).
+    """
+    checksum, _, body = text.partition("\n")
+    if hashlib.sha256(body.encode()).hexdigest() != checksum.strip():
+        raise SnapshotError("Checksum mismatch (truncated or modified snapshot)")
+    try:
+        payload = json.loads(body)
+    except ValueError as e:
+        raise SnapshotError(f"Unreadable snapshot: {e}") from e
+
+    if payload.get("version") != SNAPSHOT_VERSION:
+        raise SnapshotError(f"Snapshot version {payload.get('version')} != {SNAPSHOT_VERSION}")
+    if payload.get("symbol") != symbol.upper():
+        raise SnapshotError(f"Snapshot is for {payload.get('symbol')}, not {symbol.upper()}")
+    if payload.get("signature") != engine_signature(engine):
+        raise SnapshotError("Indicator definitions or timeframes changed since the snapshot was written")
+
+    last_ts = None if payload["last_timestamp"] is None else pd.Timestamp(payload["last_timestamp"])
+    if max_age is not None and last_ts is not None:
+        ref = pd.Timestamp(now if now is not None else datetime.now(last_ts.tzinfo))
+        if ref - last_ts > max_age:
+            raise SnapshotError(f"Snapshot is stale (last bar {last_ts}, older than {max_age})")
+
+    state = _restore(_IndicatorState(engine.timeframes), payload["state"], "state")
+    before_last = None
+    if payload["before_last"] is not None:
+        before_last = _restore(_IndicatorState(engine.timeframes), payload["before_last"], "before_last")
+    latest = payload["latest"]
+    if latest is not None and not isinstance(latest, dict):
+        raise SnapshotError("Bad latest row")
+
+    engine._state = state
+    engine._before_last = before_last
+    engine.last_timestamp = last_ts
+    engine.latest = latest
+    return payload["strategy"]
+
+
+def save_snapshot(
+    path: Union[str, Path],
+    engine: StreamingFeatureEngine,
+    symbol: str,
+    strategy: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Atomically write the engine snapshot to ``path``."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp-{os.getpid()}")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(dumps_snapshot(engine, symbol, strategy))
+    os.replace(tmp, path)
+
+
+def load_snapshot(
+    path: Union[str, Path],
+    engine: StreamingFeatureEngine,
+    symbol: str,
+    now: Optional[datetime] = None,
+    max_age: Optional[timedelta] = None,
+) -> Optional[Dict[str, Any]]:
+    """Restore ``engine`` from ``path``; ``None`` if there is no snapshot yet.
+
+    Raises ``SnapshotError`` if the file exists but fails validation.
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return loads_snapshot(f.read(), engine, symbol, now=now, max_age=max_age)
@@ -0,0 +1,203 @@
+"""
+Incremental (streaming) indicators for the live Alpaca bot.
+
+Every indicator keeps a small, fixed amount of state and is updated one bar
+at a time, so reading the latest feature row costs the same whether 200 bars
+or 20,000 bars of history have been loaded. The indicators are the
+incremental variants from ``features.indicators``, so each row is
+bit-for-bit the row ``compute_features`` (and the backtest) produces for the
+same bar.
+
+Higher-timeframe RSIs (15-minute by default, optionally 1-hour or any other
+bar size) are aggregated from the same 5-minute bars by
+``MultiTimeframeRSI``: one Wilder state per timeframe, folded forward when
+a higher-timeframe bar completes, so confirmation costs O(1) per bar
+instead of a resample of the whole history.
+
+Usage:
+    engine = StreamingFeatureEngine(timeframes=(15, 60))
+    engine.warm_up(df)                 # one-off, O(history)
+    row = engine.update(ts, o, h, l, c, v)   # per new bar, O(1)
+    if row is not None:
+        rsi_val, rsi_15m = row["rsi"], row["rsi_15m"]
+"""
+
+import copy
+from datetime import datetime
+from typing import Any, Dict, Optional, Sequence
+
+import pandas as pd
+
+from features.indicators import (
+    BB_STD,
+    BB_WINDOW,
+    EMA,
+    RSI_15M_MINUTES,
+    TREND_EMA,
+    VOLM_Z_WINDOW,
+    Z_EPS,
+    ResampledRSI,
+    RollingStats,
+    RollingZScore,
+    VolatilityZScore,
+    WilderATR,
+    WilderRSI,
+    exchange_time_of_day,
+)
+
+
+class MultiTimeframeRSI:
+    """Wilder RSI of several higher timeframes, fed with the base bars.
+
+    Each timeframe keeps one ``ResampledRSI``; its current bar is still
+    forming (its close is the latest base close) until a base bar from the
+    next bucket arrives. Values match ``features.indicators.resampled_rsi``
+    over the same bars. Keys are ``rsi_<minutes>m``.
+    """
+
+    def __init__(self, timeframes: Sequence[int] = (RSI_15M_MINUTES,)):
+        self.timeframes = tuple(int(m) for m in timeframes)
+        self._rsi = {m: ResampledRSI() for m in self.timeframes}
+        self._ns = {m: m * 60_000_000_000 for m in self.timeframes}
+
+    def update(self, ts: datetime, close: float) -> Dict[str, float]:
+        t_ns = pd.Timestamp(ts).value
+        return {f"rsi_{m}m": self._rsi[m].update(t_ns // self._ns[m], close) for m in self.timeframes}
+
+
+class StreamingFeatureEngine:
+    """Phase 1+2 feature set for the live bot, maintained bar by bar.
+
+    ``update`` returns the same columns as one row of
+    ``features.indicators.compute_features`` once every indicator is warm,
+    else None, with one ``rsi_<minutes>m`` column per entry of
+    ``timeframes``. A bar whose timestamp equals the last one seen replaces
+    it (Alpaca revises the still-forming bar), and older bars are ignored.
+    """
+
+    def __init__(self, timeframes: Sequence[int] = (RSI_15M_MINUTES,)) -> None:
+        self.timeframes = tuple(timeframes)
+        self._state = _IndicatorState(self.timeframes)
+        self._before_last: Optional[_IndicatorState] = None
+        self.last_timestamp: Optional[datetime] = None
+        self.latest: Optional[Dict[str, float]] = None
+
+    @property
+    def bars_seen(self) -> int:
+        return self._state.bars
+
+    def reset(self) -> None:
+        self.__init__(self.timeframes)
+
+    def update(
+        self,
+        ts: datetime,
+        open_: float,
+        high: float,
+        low: float,
+        close: float,
+        volume: float,
+    ) -> Optional[Dict[str, float]]:
+        return self._advance(ts, (open_, high, low, close, volume), keep_undo=True)
+
+    def warm_up(self, df: Any) -> Optional[Dict[str, float]]:
+        """Feed a bar DataFrame (UTC index; open/high/low/close/volume) in order.
+
+        Rows older than ``last_timestamp`` are skipped, so calling this again
+        with an overlapping window only pays for the new bars.
+        """
+        if self.last_timestamp is not None and len(df):
+            df = df.iloc[df.index.searchsorted(self.last_timestamp):]
+        rows = zip(
+            df.index,
+            df["open"].to_numpy(dtype=float).tolist(),
+            df["high"].to_numpy(dtype=float).tolist(),
+            df["low"].to_numpy(dtype=float).tolist(),
+            df["close"].to_numpy(dtype=float).tolist(),
+            df["volume"].to_numpy(dtype=float).tolist(),
+        )
+        last = len(df) - 1
+        for i, (ts, *bar) in enumerate(rows):
+            # Only the newest bar can still be revised, so only it needs an undo copy
+            self._advance(ts, bar, keep_undo=i == last)
+        return self.latest
+
+    def _advance(self, ts: datetime, bar: Any, keep_undo: bool) -> Optional[Dict[str, float]]:
+        if self.last_timestamp is not None:
+            if ts < self.last_timestamp:
+                return self.latest
+            if ts == self.last_timestamp:
+                if self._before_last is None:
+                    return self.latest
+                # Revised bar: roll back to the state before it and re-apply
+                self._state = copy.deepcopy(self._before_last)
+                keep_undo = False
+        if keep_undo:
+            self._before_last = copy.deepcopy(self._state)
+        elif ts != self.last_timestamp:
+            self._before_last = None
+        self.last_timestamp = ts
+        self.latest = self._state.apply(ts, *bar)
+        return self.latest
+
+
+class _IndicatorState:
+    """All mutable indicator state behind ``StreamingFeatureEngine``."""
+
+    def __init__(self, timeframes: Sequence[int]) -> None:
+        self.bars = 0
+        self.rsi = WilderRSI()
+        self.atr = WilderATR()
+        self.ema20 = EMA(20)
+        self.ema50 = EMA(50)
+        self.ema200 = EMA(TREND_EMA)
+        self.bb = RollingStats(BB_WINDOW)
+        self.vol_z = VolatilityZScore()
+        self.volm_z = RollingZScore(VOLM_Z_WINDOW)
+        self.higher = MultiTimeframeRSI(timeframes)
+
+    def apply(
+        self,
+        ts: datetime,
+        open_: float,
+        high: float,
+        low: float,
+        close: float,
+        volume: float,
+    ) -> Optional[Dict[str, float]]:
+        self.bars += 1
+        rsi_val = self.rsi.update(close)
+        atr_val = self.atr.update(high, low, close)
+        ema20 = self.ema20.update(close)
+        ema50 = self.ema50.update(close)
+        ema200 = self.ema200.update(close)
+        vol_z = self.vol_z.update(close)
+        bb_ready = self.bb.update(close)
+        volm_z = self.volm_z.update(volume)
+        higher = self.higher.update(ts, close)
+
+        if rsi_val is None or not bb_ready or vol_z is None or volm_z is None:
+            return None
+
+        bb_mid, bb_std = self.bb.mean, self.bb.std
+        return {
+            "open": open_,
+            "high": high,
+            "low": low,
+            "close": close,
+            "volume": volume,
+            "rsi": rsi_val,
+            "atr": atr_val,
+            "ema20": ema20,
+            "ema50": ema50,
+            "ema200": ema200,
+            "bb_mid": bb_mid,
+            "bb_upper": bb_mid + bb_std * BB_STD,
+            "bb_lower": bb_mid - bb_std * BB_STD,
+            "vol_z": vol_z,
+            "volm_z": volm_z,
+            "time_of_day": exchange_time_of_day(ts),
+            "ema200_rel": (close - ema200) / ema200,
+            "bb_z": (close - bb_mid) / (BB_STD * bb_std + Z_EPS),
+            **higher,
+        }
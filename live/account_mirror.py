@@ -0,0 +1,205 @@
+"""
+In-memory mirror of the Alpaca account, positions and open orders.
+
+The decision path reads positions, open stop orders, last fill times and
+equity from this mirror instead of calling REST for each symbol. Once per
+cycle ``sync`` pulls only what changed:
+
+- FILL account activities newer than a ``transaction_time`` cursor
+  (``get_activities(after=...)``) update positions, cash and last fill times.
+- Open orders are re-listed only when something could have changed them
+  (a fill, or an order we submitted/replaced/closed via ``mark_orders_dirty``).
+- Every ``reconcile_every`` the whole state is rebuilt from
+  ``get_account``/``list_positions``/``list_orders`` to correct any drift.
+
+Equity between reconciliations is cash plus positions marked at the latest
+bar closes (``update_mark``), so sizing needs no per-cycle account call.
+"""
+
+import threading
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+import pandas as pd
+
+
+class AccountMirror:
+    """Incrementally maintained account/position/order state."""
+
+    def __init__(
+        self,
+        api: Any,
+        reconcile_every: timedelta = timedelta(minutes=15),
+        fill_lookback: timedelta = timedelta(days=2),
+        page_size: int = 100,
+        now: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+    ):
+        self.api = api
+        self._now = now
+        self.reconcile_every = reconcile_every
+        self.fill_lookback = fill_lookback
+        self.page_size = page_size
+        self._lock = threading.Lock()
+
+        self._cash = 0.0
+        self._positions: Dict[str, Tuple[float, float]] = {}  # symbol -> (qty, avg_entry_price)
+        self._marks: Dict[str, float] = {}
+        self._open_orders: Dict[str, Any] = {}  # order id -> Order
+        self._last_fill: Dict[str, datetime] = {}
+
+        self._cursor: Optional[str] = None
+        self._seen_ids: Set[str] = set()
+        self._seen_order: Deque[str] = deque()
+        self._orders_dirty = True
+        self._last_reconcile: Optional[datetime] = None
+        self.rest_calls = 0  # REST requests made by the last sync()
+
+    def sync(self) -> None:
+        """Bring the mirror up to date; cheap unless a reconciliation is due."""
+        self.rest_calls = 0
+        now = self._now()
+        if self._last_reconcile is None or now - self._last_reconcile >= self.reconcile_every:
+            self.reconcile(now)
+            return
+        if self._pull_fills() and not self._orders_dirty:
+            # A fill can cancel a bracket sibling or leave a new child leg open
+            self._orders_dirty = True
+        if self._orders_dirty:
+            self._refresh_open_orders()
+
+    def reconcile(self, now: Optional[datetime] = None) -> None:
+        """Rebuild account, positions and open orders from scratch."""
+        now = now or self._now()
+        # Fills up to here are in the snapshot below; later ones are applied on top
+        snapshot_at = self._now()
+        acct = self.api.get_account()
+        positions = self.api.list_positions()
+        self.rest_calls += 2
+        with self._lock:
+            self._cash = float(acct.cash)
+            self._positions = {p.symbol: (float(p.qty), float(p.avg_entry_price)) for p in positions}
+            for p in positions:
+                self._marks[p.symbol] = float(p.current_price)
+        if self._cursor is None:
+            # Seed last fill times (min-hold check) from the recent fill history
+            self._cursor = (now - self.fill_lookback).isoformat()
+        self._pull_fills(positions_as_of=snapshot_at)
+        self._refresh_open_orders()
+        self._last_reconcile = now
+
+    def _pull_fills(self, positions_as_of: Optional[datetime] = None) -> bool:
+        """Apply FILL activities after the cursor; return True if any were new.
+
+        Fills at or before ``positions_as_of`` are already in the reconciled
+        positions and cash, so they only update the last fill times.
+        """
+        new = False
+        page_token = None
+        while True:
+            acts = self.api.get_activities(
+                activity_types="FILL",
+                after=self._cursor,
+                direction="asc",
+                page_size=self.page_size,
+                page_token=page_token,
+            )
+            self.rest_calls += 1
+            for act in acts:
+                if act.id in self._seen_ids:
+                    continue
+                self._remember(act.id)
+                when = pd.Timestamp(act.transaction_time).to_pydatetime()
+                self.apply_fill(
+                    symbol=act.symbol,
+                    side=act.side,
+                    qty=float(act.qty),
+                    price=float(act.price),
+                    when=when,
+                    update_position=positions_as_of is None or when > positions_as_of,
+                )
+                self._cursor = pd.Timestamp(act.transaction_time).isoformat()
+                new = True
+            if len(acts) < self.page_size:
+                return new
+            page_token = acts[-1].id
+
+    def _remember(self, activity_id: str) -> None:
+        self._seen_ids.add(activity_id)
+        self._seen_order.append(activity_id)
+        if len(self._seen_order) > 5000:
+            self._seen_ids.discard(self._seen_order.popleft())
+
+    def _refresh_open_orders(self) -> None:
+        orders = self.api.list_orders(status="open", limit=500, nested=True)
+        self.rest_calls += 1
+        flat: Dict[str, Any] = {}
+        for o in orders:
+            flat[o.id] = o
+            for leg in getattr(o, "legs", None) or []:
+                flat[leg.id] = leg
+        with self._lock:
+            self._open_orders = flat
+            self._orders_dirty = False
+
+    def apply_fill(
+        self,
+        symbol: str,
+        side: str,
+        qty: float,
+        price: float,
+        when: datetime,
+        update_position: bool = True,
+    ) -> None:
+        """Apply one execution (from an activity or a trade-update stream)."""
+        signed = qty if side == "buy" else -qty
+        with self._lock:
+            prev = self._last_fill.get(symbol)
+            if prev is None or when > prev:
+                self._last_fill[symbol] = when
+            if not update_position:
+                return
+            self._cash -= signed * price
+            old_qty, old_avg = self._positions.get(symbol, (0.0, 0.0))
+            new_qty = old_qty + signed
+            if abs(new_qty) < 1e-9:
+                self._positions.pop(symbol, None)
+            elif old_qty == 0 or (old_qty > 0) != (new_qty > 0):
+                # Opened, or flipped through zero: the fill price is the new basis
+                self._positions[symbol] = (new_qty, price)
+            elif abs(new_qty) > abs(old_qty):
+                avg = (old_avg * abs(old_qty) + price * qty) / abs(new_qty)
+                self._positions[symbol] = (new_qty, avg)
+            else:
+                self._positions[symbol] = (new_qty, old_avg)
+            self._marks[symbol] = price
+
+    def mark_orders_dirty(self) -> None:
+        """Call after submitting, replacing or cancelling orders."""
+        with self._lock:
+            self._orders_dirty = True
+
+    def update_mark(self, symbol: str, price: float) -> None:
+        with self._lock:
+            self._marks[symbol] = price
+
+    @property
+    def equity(self) -> float:
+        with self._lock:
+            return self._cash + sum(
+                qty * self._marks.get(sym, avg) for sym, (qty, avg) in self._positions.items()
+            )
+
+    def position(self, symbol: str) -> Tuple[float, Optional[float]]:
+        """Return (qty, avg_entry_price); (0.0, None) when flat."""
+        with self._lock:
+            qty, avg = self._positions.get(symbol, (0.0, None))
+        return qty, avg
+
+    def open_orders(self, symbol: str) -> List[Any]:
+        with self._lock:
+            return [o for o in self._open_orders.values() if o.symbol == symbol]
+
+    def last_fill_time(self, symbol: str) -> Optional[datetime]:
+        with self._lock:
+            return self._last_fill.get(symbol)
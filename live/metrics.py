@@ -0,0 +1,166 @@
+"""
+Hot-path latency metrics for the live bot.
+
+Each stage of a decision cycle (account sync, bar fetch, features, position
+and order lookups, trailing-stop update, order submit, ...) is timed with
+the monotonic ``time.perf_counter`` clock and recorded in a per-stage
+``LatencyHistogram``: a rolling window of the most recent samples for
+p50/p95/p99, plus cumulative count and sum.
+
+Metrics are exported in the Prometheus text format, both to a file (written
+atomically; compatible with node_exporter's textfile collector) and, when
+``MetricsServer`` is started, on a local HTTP ``/metrics`` endpoint.
+
+A latency budget (seconds from bar close to order submission) can be set;
+``check_budget`` records the observed value and counts overruns.
+
+Usage:
+    metrics = LatencyMetrics(budget=2.0)
+    with metrics.stage("bar_fetch"):
+        bars = fetch(...)
+    metrics.write("bot_metrics.prom")
+    server = MetricsServer(metrics, port=9108)   # http://127.0.0.1:9108/metrics
+"""
+
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, Optional, Union
+
+QUANTILES = (0.5, 0.95, 0.99)
+METRIC = "bot_stage_latency_seconds"
+
+
+class LatencyHistogram:
+    """Rolling-window quantiles plus cumulative count/sum of latency samples (seconds)."""
+
+    def __init__(self, window: int = 2048):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q: float) -> float:
+        """Nearest-rank quantile of the rolling window (NaN when empty)."""
+        if not self._samples:
+            return math.nan
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+class LatencyMetrics:
+    """Per-stage latency histograms, thread-safe (decisions run in worker threads)."""
+
+    def __init__(self, window: int = 2048, budget: Optional[float] = None):
+        self.window = window
+        self.budget = budget
+        self.budget_exceeded = 0
+        self._stages: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            hist = self._stages.get(stage)
+            if hist is None:
+                hist = self._stages[stage] = LatencyHistogram(self.window)
+            hist.observe(seconds)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the enclosed block as ``name`` (recorded even if it raises)."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t0)
+
+    def timed(self, name: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Call ``fn(*args, **kwargs)`` timed as ``name`` (for ``asyncio.to_thread``)."""
+        with self.stage(name):
+            return fn(*args, **kwargs)
+
+    def check_budget(self, seconds: float) -> bool:
+        """Record a bar-close-to-submit latency; return False if it is over budget."""
+        self.observe("bar_close_to_submit", seconds)
+        if self.budget is None or seconds <= self.budget:
+            return True
+        with self._lock:
+            self.budget_exceeded += 1
+        return False
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = [
+            f"# HELP {METRIC} Decision-cycle stage latency (quantiles over the last {self.window} samples).",
+            f"# TYPE {METRIC} summary",
+        ]
+        with self._lock:
+            for name in sorted(self._stages):
+                hist = self._stages[name]
+                for q in QUANTILES:
+                    lines.append(f'{METRIC}{{stage="{name}",quantile="{q}"}} {_fmt(hist.quantile(q))}')
+                lines.append(f'{METRIC}_sum{{stage="{name}"}} {_fmt(hist.sum)}')
+                lines.append(f'{METRIC}_count{{stage="{name}"}} {hist.count}')
+            if self.budget is not None:
+                lines += [
+                    "# HELP bot_latency_budget_seconds Budget from bar close to order submission.",
+                    "# TYPE bot_latency_budget_seconds gauge",
+                    f"bot_latency_budget_seconds {_fmt(self.budget)}",
+                ]
+            lines += [
+                "# HELP bot_latency_budget_exceeded_total Order submissions skipped for exceeding the budget.",
+                "# TYPE bot_latency_budget_exceeded_total counter",
+                f"bot_latency_budget_exceeded_total {self.budget_exceeded}",
+            ]
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Union[str, Path]) -> None:
+        """Atomically write ``render()`` to ``path``."""
+        path = Path(path)
+        tmp = path.with_name(f".{path.name}.tmp-{os.getpid()}")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp, path)
+
+
+def _fmt(value: float) -> str:
+    return "NaN" if math.isnan(value) else repr(float(value))
+
+
+class MetricsServer:
+    """Serve ``metrics.render()`` on ``http://<host>:<port>/metrics`` from a daemon thread."""
+
+    def __init__(self, metrics: LatencyMetrics, port: int, host: str = "127.0.0.1"):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args) -> None:
+                pass  # keep scrapes out of the bot's console
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,446 @@
+"""
+Deterministic replay of the live bot against recorded bars.
+
+``MockAlpaca`` stands in for the Alpaca ``REST`` client: it implements the
+calls the bot makes (``get_bars_iter``, ``get_account``, ``list_positions``,
+``get_activities``, ``list_orders``, ``submit_order``, ``replace_order``,
+``close_position``, ``get_calendar``) on top of recorded 5-minute bars and
+a simulated clock, and simulates fills:
+
+- market orders (including bracket parents and ``close_position``) fill at
+  the open of the first bar that closes after they were submitted;
+- once a bracket parent fills, its stop-loss and take-profit legs are live
+  and fill when a bar's low reaches the stop / its high reaches the limit
+  (at the open instead if the bar gaps through). When one bar touches both,
+  the stop is assumed first, as in ``backtest.intrabar``; the other leg is
+  cancelled (OCO);
+- fills are reported with the close time of the bar they happened in, which
+  is when the simulated broker learns of them.
+
+Only bars that have closed by the simulated time are served, so the bot
+never sees the future. ``SimClock`` replaces the wall clock: the bot's
+scheduler ``sleep`` advances simulated time instead of waiting, so weeks of
+sessions run through the real ``run_cycle``/``decide`` code in seconds.
+Given the same bars and arguments, a replay produces the same fills.
+
+Usage:
+    python -m live.replay --source file --path data/{symbol}_1min.csv \\
+        --symbols TSLA,AAPL --start 2024-03-01 --end 2024-03-29 --fills-out fills.csv -- --cap 0.01
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import sys
+import threading
+import time
+from datetime import date, datetime, time as dtime, timedelta
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+BAR = pd.Timedelta(minutes=5)
+EXCHANGE_TZ = "US/Eastern"
+OPEN_STATUSES = ("new", "held")
+
+
+class ReplayFinished(Exception):
+    """Raised by ``SimClock.sleep`` once simulated time passes the replay end."""
+
+
+class MockAPIError(Exception):
+    """Request rejected by the mock broker (mirrors ``alpaca_trade_api`` APIError)."""
+
+
+class SimClock:
+    """Simulated UTC clock: ``sleep`` advances time instantly."""
+
+    def __init__(self, start: datetime, end: datetime):
+        self._now = pd.Timestamp(start).tz_convert("UTC").to_pydatetime()
+        self.end = pd.Timestamp(end).tz_convert("UTC").to_pydatetime()
+
+    def now(self) -> datetime:
+        return self._now
+
+    def sleep(self, seconds: float) -> None:
+        self._now += timedelta(seconds=seconds)
+        if self._now > self.end:
+            raise ReplayFinished()
+
+
+class MockAlpaca:
+    """In-process stand-in for ``alpaca_trade_api.REST`` backed by recorded bars.
+
+    Parameters
+    ----------
+    bars : dict of str -> pd.DataFrame
+        5-minute OHLCV bars per symbol, indexed by bar start (tz-aware).
+    clock : SimClock
+        Source of the simulated time.
+    cash : float
+        Starting cash.
+    """
+
+    def __init__(self, bars: Dict[str, pd.DataFrame], clock: SimClock, cash: float = 100_000.0):
+        self.clock = clock
+        self._lock = threading.RLock()
+        self._bars: Dict[str, Dict[str, Any]] = {}
+        for sym, df in bars.items():
+            df = df.sort_index()
+            index = pd.DatetimeIndex(df.index).tz_convert("UTC")
+            self._bars[sym.upper()] = {
+                "ends": (index + BAR).as_unit("ns").asi8,
+                "starts": index.as_unit("ns").asi8,
+                "ohlc": df[["open", "high", "low", "close"]].to_numpy(dtype=float),
+                "records": [
+                    {"t": t, "o": o, "h": h, "l": lo, "c": c, "v": v, "S": sym.upper()}
+                    for t, o, h, lo, c, v in zip(
+                        index, *(df[k].to_numpy(dtype=float).tolist() for k in ("open", "high", "low", "close", "volume"))
+                    )
+                ],
+                "done": 0,  # bars already run through the fill simulation
+            }
+        self.cash = float(cash)
+        self._positions: Dict[str, List[float]] = {}  # symbol -> [qty, avg_entry_price]
+        self._marks: Dict[str, float] = {}
+        self._orders: Dict[str, SimpleNamespace] = {}
+        self._seq: Dict[str, int] = {}
+        self.fills: List[Dict[str, Any]] = []
+        self.calls: Dict[str, int] = {}
+        self.cycles = 0  # distinct simulated times at which bars were requested
+        self._last_request: Optional[datetime] = None
+
+    # --- simulation -------------------------------------------------------
+
+    def _count(self, name: str) -> None:
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def _catch_up(self) -> None:
+        """Run every bar that has closed by now through the fill simulation."""
+        now_ns = pd.Timestamp(self.clock.now()).value
+        events = []
+        for sym, b in self._bars.items():
+            stop = int(np.searchsorted(b["ends"], now_ns, side="right"))
+            events.extend((int(b["ends"][i]), sym, i) for i in range(b["done"], stop))
+            b["done"] = max(b["done"], stop)
+        for _, sym, i in sorted(events):
+            self._process_bar(sym, i)
+
+    def _process_bar(self, sym: str, i: int) -> None:
+        b = self._bars[sym]
+        o, h, l, c = (float(x) for x in b["ohlc"][i])
+        end = pd.Timestamp(int(b["ends"][i]), tz="UTC")
+        orders = [od for od in self._orders.values() if od.symbol == sym and od.status == "new"]
+
+        for od in orders:
+            if od.type == "market" and od.submitted_at < end:
+                self._fill(od, o, end)
+                for leg in od.legs:
+                    leg.status = "new"
+        # Legs that became live at this bar's open can trigger within it
+        live = [od for od in self._orders.values() if od.symbol == sym and od.status == "new" and od.type != "market"]
+        for od in sorted(live, key=lambda od: od.type != "stop"):  # stop first when both touch
+            if od.status != "new":
+                continue
+            sell = od.side == "sell"
+            if od.type == "stop" and (l <= od.stop_price if sell else h >= od.stop_price):
+                price = min(od.stop_price, o) if sell else max(od.stop_price, o)
+            elif od.type == "limit" and (h >= od.limit_price if sell else l <= od.limit_price):
+                price = max(od.limit_price, o) if sell else min(od.limit_price, o)
+            else:
+                continue
+            self._fill(od, price, end)
+            for sibling in self._orders.values():
+                if sibling.parent_id == od.parent_id and od.parent_id and sibling.status in OPEN_STATUSES:
+                    sibling.status = "canceled"
+        self._marks[sym] = float(c)
+
+    def _fill(self, od: SimpleNamespace, price: float, when: pd.Timestamp) -> None:
+        qty = float(od.qty)
+        signed = qty if od.side == "buy" else -qty
+        pos = self._positions.setdefault(od.symbol, [0.0, 0.0])
+        new_qty = pos[0] + signed
+        if abs(new_qty) < 1e-9:
+            del self._positions[od.symbol]
+        elif pos[0] == 0 or (pos[0] > 0) != (new_qty > 0):
+            self._positions[od.symbol] = [new_qty, price]
+        elif abs(new_qty) > abs(pos[0]):
+            self._positions[od.symbol] = [new_qty, (pos[1] * abs(pos[0]) + price * qty) / abs(new_qty)]
+        else:
+            pos[0] = new_qty
+        self.cash -= signed * price
+        od.status, od.filled_avg_price, od.filled_at = "filled", price, when
+        self.fills.append({
+            "id": f"fill-{len(self.fills) + 1}",
+            "order_id": od.id,
+            "symbol": od.symbol,
+            "side": od.side,
+            "qty": qty,
+            "price": float(price),
+            "transaction_time": when.isoformat(),
+            "type": od.type,
+        })
+
+    def _new_order(self, symbol: str, qty: float, side: str, type_: str, **fields: Any) -> SimpleNamespace:
+        n = self._seq[symbol] = self._seq.get(symbol, 0) + 1
+        od = SimpleNamespace(
+            id=f"{symbol}-{n}", symbol=symbol, qty=qty, side=side, type=type_,
+            limit_price=None, stop_price=None, status="new", legs=[], parent_id=None,
+            submitted_at=pd.Timestamp(self.clock.now()), filled_at=None, filled_avg_price=None,
+        )
+        for k, v in fields.items():
+            setattr(od, k, v)
+        self._orders[od.id] = od
+        return od
+
+    @staticmethod
+    def _view(od: SimpleNamespace) -> SimpleNamespace:
+        view = SimpleNamespace(**vars(od))
+        view.legs = [SimpleNamespace(**vars(leg)) for leg in od.legs]
+        return view
+
+    # --- REST surface -----------------------------------------------------
+
+    def get_bars_iter(self, symbol: Any, timeframe: Any, start: str, end: str, **kwargs: Any) -> List[dict]:
+        """Closed bars with start in ``[start, end]`` (raw v2 dicts; ``timeframe`` is the recorded one)."""
+        with self._lock:
+            self._count("get_bars")
+            if self.clock.now() != self._last_request:
+                self._last_request = self.clock.now()
+                self.cycles += 1
+            self._catch_up()
+            lo, hi = pd.Timestamp(start).value, pd.Timestamp(end).value
+            now_ns = pd.Timestamp(self.clock.now()).value
+            out = []
+            for sym in ([symbol] if isinstance(symbol, str) else symbol):
+                b = self._bars.get(sym.upper())
+                if b is None:
+                    continue
+                i = int(np.searchsorted(b["starts"], lo, side="left"))
+                j = int(np.searchsorted(b["starts"], hi, side="right"))
+                j = min(j, int(np.searchsorted(b["ends"], now_ns, side="right")))
+                out.extend(b["records"][i:j])
+            return out
+
+    def get_account(self) -> SimpleNamespace:
+        with self._lock:
+            self._count("get_account")
+            self._catch_up()
+            equity = self.cash + sum(q * self._marks.get(s, avg) for s, (q, avg) in self._positions.items())
+            return SimpleNamespace(cash=self.cash, equity=equity, buying_power=self.cash, status="ACTIVE")
+
+    def list_positions(self) -> List[SimpleNamespace]:
+        with self._lock:
+            self._count("list_positions")
+            self._catch_up()
+            return [
+                SimpleNamespace(symbol=s, qty=q, avg_entry_price=avg, current_price=self._marks.get(s, avg))
+                for s, (q, avg) in sorted(self._positions.items())
+            ]
+
+    def get_position(self, symbol: str) -> SimpleNamespace:
+        for p in self.list_positions():
+            if p.symbol == symbol:
+                return p
+        raise MockAPIError("position does not exist")
+
+    def get_activities(
+        self,
+        activity_types: str = "FILL",
+        after: Optional[str] = None,
+        direction: str = "asc",
+        page_size: int = 100,
+        page_token: Optional[str] = None,
+        **kwargs: Any,
+    ) -> List[SimpleNamespace]:
+        with self._lock:
+            self._count("get_activities")
+            self._catch_up()
+            acts = self.fills
+            if after is not None:
+                cut = pd.Timestamp(after)
+                acts = [f for f in acts if pd.Timestamp(f["transaction_time"]) > cut]
+            if page_token is not None:
+                ids = [f["id"] for f in acts]
+                acts = acts[ids.index(page_token) + 1:] if page_token in ids else []
+            return [SimpleNamespace(**f) for f in acts[:page_size]]
+
+    def list_orders(self, status: str = "open", limit: int = 50, nested: bool = False, **kwargs: Any) -> List[SimpleNamespace]:
+        with self._lock:
+            self._count("list_orders")
+            self._catch_up()
+            out = []
+            for od in self._orders.values():
+                if od.parent_id is not None and self._orders[od.parent_id].status in OPEN_STATUSES:
+                    continue  # shown nested under its pending parent
+                if status != "open" or od.status in OPEN_STATUSES:
+                    out.append(self._view(od))
+            return out[:limit]
+
+    def submit_order(
+        self,
+        symbol: str,
+        qty: float,
+        side: str,
+        type: str = "market",
+        time_in_force: str = "day",
+        limit_price: Optional[float] = None,
+        stop_price: Optional[float] = None,
+        order_class: Optional[str] = None,
+        take_profit: Optional[dict] = None,
+        stop_loss: Optional[dict] = None,
+        **kwargs: Any,
+    ) -> SimpleNamespace:
+        with self._lock:
+            self._count("submit_order")
+            self._catch_up()
+            if type != "market":
+                raise MockAPIError(f"order type {type!r} is not simulated for entries")
+            od = self._new_order(symbol, qty, side, type, order_class=order_class)
+            if order_class == "bracket":
+                exit_side = "sell" if side == "buy" else "buy"
+                tp = self._new_order(symbol, qty, exit_side, "limit", limit_price=float(take_profit["limit_price"]),
+                                     parent_id=od.id, status="held")
+                sl = self._new_order(symbol, qty, exit_side, "stop", stop_price=float(stop_loss["stop_price"]),
+                                     parent_id=od.id, status="held")
+                od.legs = [tp, sl]
+            return self._view(od)
+
+    def replace_order(
+        self,
+        order_id: str,
+        qty: Optional[float] = None,
+        limit_price: Optional[float] = None,
+        stop_price: Optional[float] = None,
+        time_in_force: Optional[str] = None,
+        **kwargs: Any,
+    ) -> SimpleNamespace:
+        with self._lock:
+            self._count("replace_order")
+            self._catch_up()
+            old = self._orders.get(order_id)
+            if old is None or old.status not in OPEN_STATUSES:
+                raise MockAPIError(f"order {order_id} is not open")
+            new = self._new_order(
+                old.symbol, float(qty if qty is not None else old.qty), old.side, old.type,
+                limit_price=float(limit_price) if limit_price is not None else old.limit_price,
+                stop_price=float(stop_price) if stop_price is not None else old.stop_price,
+                parent_id=old.parent_id, status=old.status,
+            )
+            old.status = "replaced"
+            if old.parent_id is not None:
+                parent = self._orders[old.parent_id]
+                parent.legs = [new if leg is old else leg for leg in parent.legs]
+            return self._view(new)
+
+    def close_position(self, symbol: str) -> SimpleNamespace:
+        """Cancel the symbol's open exit orders and sell the position at the next bar's open."""
+        with self._lock:
+            self._count("close_position")
+            self._catch_up()
+            qty = self._positions.get(symbol, [0.0])[0]
+            if qty == 0:
+                raise MockAPIError("position does not exist")
+            for od in self._orders.values():
+                if od.symbol == symbol and od.status in OPEN_STATUSES:
+                    od.status = "canceled"
+            return self._view(self._new_order(symbol, abs(qty), "sell" if qty > 0 else "buy", "market"))
+
+    def get_calendar(self, start: str, end: str) -> List[SimpleNamespace]:
+        """Sessions of the recorded days in ``[start, end]``; closes follow each day's last bar."""
+        lo, hi = date.fromisoformat(start), date.fromisoformat(end)
+        closes: Dict[date, dtime] = {}
+        for b in self._bars.values():
+            ends = pd.DatetimeIndex(b["ends"].view("datetime64[ns]")).tz_localize("UTC").tz_convert(EXCHANGE_TZ)
+            for ts in ends:
+                closes[ts.date()] = max(closes.get(ts.date(), ts.time()), ts.time())
+        return [
+            SimpleNamespace(date=pd.Timestamp(d), open=dtime(9, 30), close=close)
+            for d, close in sorted(closes.items())
+            if lo <= d <= hi
+        ]
+
+
+def load_replay_bars(args: argparse.Namespace, symbols: List[str], start: datetime, end: datetime) -> Dict[str, pd.DataFrame]:
+    """Regular-session 5-minute bars (UTC index) per symbol from the ``add_source_args`` source."""
+    from backtest import data
+
+    source = data.source_from_args(args)
+    out = {}
+    for sym in symbols:
+        df = data.load_bars(source, sym, start, end, bar_minutes=5, chunk=data.chunk_from_args(args))
+        out[sym] = df.set_axis(pd.DatetimeIndex(df.index).tz_localize(EXCHANGE_TZ).tz_convert("UTC"))
+    return out
+
+
+def write_fills(path: str, fills: List[Dict[str, Any]]) -> None:
+    fields = ["id", "order_id", "symbol", "side", "type", "qty", "price", "transaction_time"]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(fills)
+
+
+def main() -> None:
+    from backtest.data import add_source_args
+    from scripts.alpaca_rsi_bot import main as bot_main
+
+    parser = argparse.ArgumentParser(
+        description="Replay recorded bars through the live bot with a mock Alpaca broker",
+        epilog="Arguments after '--' are passed to the bot (e.g. -- --cap 0.01 --rsi-1h-max 60).",
+    )
+    add_source_args(parser)
+    parser.add_argument("--symbols", default="", help="comma-separated watchlist (overrides --symbol)")
+    parser.add_argument("--cash", type=float, default=100_000.0)
+    parser.add_argument("--history-days", type=int, default=14, help="bot warm-up window (loaded before --start)")
+    parser.add_argument("--fills-out", default=None, help="write simulated fills to this CSV (for regression diffs)")
+    parser.add_argument("--log-file", default="replay_log.csv", help="bot trade log for the replay")
+    parser.add_argument("--metrics-file", default="replay_metrics.prom", help="bot latency metrics for the replay")
+    parser.add_argument("--quiet", action="store_true", help="hide the bot's per-cycle console output")
+    argv, bot_extra = sys.argv[1:], []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, bot_extra = argv[:split], argv[split + 1:]
+    args = parser.parse_args(argv)
+
+    symbols = [s.strip().upper() for s in args.symbols.split(",") if s.strip()] or [args.symbol.upper()]
+    start = pd.Timestamp(args.start).tz_localize(EXCHANGE_TZ)
+    end = pd.Timestamp(args.end).tz_localize(EXCHANGE_TZ) + pd.Timedelta(days=1)
+    load_start = (start - pd.Timedelta(days=args.history_days + 1)).tz_localize(None).to_pydatetime()
+    bars = load_replay_bars(args, symbols, load_start, end.tz_localize(None).to_pydatetime())
+    for sym, df in bars.items():
+        print(f"[REPLAY] {sym}: {len(df)} bars {df.index.min()} -> {df.index.max()}")
+
+    clock = SimClock(start, end)
+    api = MockAlpaca(bars, clock, cash=args.cash)
+    bot_argv = [
+        "--symbols", ",".join(symbols), "--loop", "--no-cache", "--no-state",
+        "--history-days", str(args.history_days), "--log-file", args.log_file,
+        "--metrics-file", args.metrics_file, *bot_extra,
+    ]
+    t0 = time.perf_counter()
+    out = io.StringIO() if args.quiet else None
+    try:
+        with contextlib.redirect_stdout(out) if out is not None else contextlib.nullcontext():
+            bot_main(bot_argv, api=api, clock=clock)
+    except ReplayFinished:
+        pass
+    wall = time.perf_counter() - t0
+
+    equity = api.get_account().equity
+    span = clock.now() - start.tz_convert("UTC").to_pydatetime()
+    print(
+        f"[REPLAY] {span} simulated in {wall:.2f}s ({span.total_seconds() / max(wall, 1e-9):,.0f}x real time): "
+        f"{api.cycles} cycle(s), {api.calls.get('submit_order', 0)} entr(ies), "
+        f"{len(api.fills)} fill(s), equity {equity:,.2f} ({equity / args.cash - 1:+.3%})"
+    )
+    if args.fills_out:
+        write_fills(args.fills_out, api.fills)
+        print(f"[REPLAY] Fills written to {args.fills_out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Bar-close aligned scheduling for the live bot's ``--loop`` mode.
+
+Instead of sleeping a fixed interval after each cycle (which drifts against
+bar boundaries), the scheduler wakes exactly at each bar close plus a short
+settle delay, and only inside regular trading sessions. Nights, weekends
+and exchange holidays are slept through in one go, and early closes are
+honoured when the session list comes from Alpaca's ``/calendar``.
+
+Usage:
+    scheduler = BarCloseScheduler(MarketCalendar(api), interval_minutes=5, settle_seconds=3)
+    while True:
+        bar_close = scheduler.wait_for_next_close()
+        run_once()
+        lag = scheduler.record_decision(bar_close)
+"""
+
+import time
+from datetime import date, datetime, time as dtime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pytz
+
+EASTERN = pytz.timezone("US/Eastern")
+REGULAR_OPEN = dtime(9, 30)
+REGULAR_CLOSE = dtime(16, 0)
+
+
+def _session_utc(day: date, open_t: dtime, close_t: dtime) -> Tuple[datetime, datetime]:
+    open_et = EASTERN.localize(datetime.combine(day, open_t))
+    close_et = EASTERN.localize(datetime.combine(day, close_t))
+    return open_et.astimezone(timezone.utc), close_et.astimezone(timezone.utc)
+
+
+class MarketCalendar:
+    """Regular-session open/close times (UTC) by trading day.
+
+    Sessions are read from Alpaca's ``get_calendar`` when an API client is
+    given, which covers holidays and early closes. Without one, or if the
+    request fails, weekdays 09:30-16:00 ET are assumed.
+    """
+
+    def __init__(self, api: Any = None, lookahead_days: int = 14):
+        self.api = api
+        self.lookahead_days = lookahead_days
+        self._sessions: Dict[date, Tuple[datetime, datetime]] = {}
+        self._loaded_until: Optional[date] = None
+
+    def _load(self, start: date) -> None:
+        end = start + timedelta(days=self.lookahead_days)
+        sessions: Dict[date, Tuple[datetime, datetime]] = {}
+        if self.api is not None:
+            try:
+                for c in self.api.get_calendar(start=start.isoformat(), end=end.isoformat()):
+                    day = c.date.date()
+                    sessions[day] = _session_utc(day, c.open, c.close)
+            except Exception as e:
+                print(f"[WARNING] Market calendar unavailable, assuming weekday sessions: {e}")
+                sessions = {}
+        if not sessions:
+            day = start
+            while day <= end:
+                if day.weekday() < 5:
+                    sessions[day] = _session_utc(day, REGULAR_OPEN, REGULAR_CLOSE)
+                day += timedelta(days=1)
+        self._sessions.update(sessions)
+        self._loaded_until = end
+
+    def next_session(self, now: datetime) -> Tuple[datetime, datetime]:
+        """Return (open, close) of the current session, or of the next one if closed."""
+        day = now.astimezone(EASTERN).date()
+        for _ in range(4):
+            # Keep at least a week of sessions loaded ahead of the day in question
+            if self._loaded_until is None or day + timedelta(days=7) > self._loaded_until:
+                self._load(day)
+            for d in sorted(k for k in self._sessions if k >= day):
+                open_, close = self._sessions[d]
+                if close > now:
+                    return open_, close
+            day = self._loaded_until + timedelta(days=1)
+        raise RuntimeError("No upcoming market session found")
+
+
+class LagStats:
+    """Running summary of bar-close-to-decision lag in seconds."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.last = 0.0
+        self.total = 0.0
+        self.max = 0.0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.last = seconds
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+
+class BarCloseScheduler:
+    """Wake at each bar close (plus ``settle_seconds``) inside market sessions.
+
+    Bar closes are aligned to the session open, every ``interval_minutes``,
+    strictly before the session close so orders still land in the session.
+    """
+
+    def __init__(
+        self,
+        calendar: MarketCalendar,
+        interval_minutes: int = 5,
+        settle_seconds: float = 3.0,
+        now: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.calendar = calendar
+        self.step = timedelta(minutes=interval_minutes)
+        self.settle = timedelta(seconds=settle_seconds)
+        self._now = now
+        self._sleep = sleep
+        self.lag = LagStats()
+
+    def next_bar_close(self, now: datetime) -> datetime:
+        """First bar close strictly after ``now`` in the current or next session."""
+        while True:
+            open_, close = self.calendar.next_session(now)
+            if now < open_:
+                candidate = open_ + self.step
+            else:
+                candidate = open_ + ((now - open_) // self.step + 1) * self.step
+            if candidate < close:
+                return candidate
+            # Past the last bar of this session: look from the close onward
+            now = close
+
+    def wait_for_next_close(self) -> datetime:
+        """Sleep until the next bar close + settle delay; return that bar close."""
+        now = self._now()
+        bar_close = self.next_bar_close(now)
+        wake = bar_close + self.settle
+        if wake - now > timedelta(hours=1):
+            print(f"[SCHED] Market closed, sleeping until {wake.isoformat()}")
+        while True:
+            remaining = (wake - self._now()).total_seconds()
+            if remaining <= 0:
+                return bar_close
+            # Sleep in bounded slices so suspend/clock jumps can't overshoot by hours
+            self._sleep(min(remaining, 900.0))
+
+    def record_decision(self, bar_close: datetime) -> float:
+        """Record and return the lag (seconds) from ``bar_close`` to now."""
+        lag = (self._now() - bar_close).total_seconds()
+        self.lag.add(lag)
+        return lag
@@ -0,0 +1,127 @@
+"""
+Buffered, non-blocking CSV trade log.
+
+``append`` only puts a row on an in-process queue; a background thread owns
+one long-lived file handle, writes rows in bounded batches and flushes on
+an interval, when a batch fills, and on ``close``. The decision path (and
+order submission in particular) never waits on disk I/O.
+
+Rotation:
+- size: when the file exceeds ``max_bytes`` it is renamed to
+  ``<stem>.<UTC timestamp><suffix>`` and a fresh file (with header) started.
+- daily (optional): the same happens at the first write of each UTC day.
+
+If the queue is ever full the row is dropped and counted in ``dropped``
+rather than blocking the caller.
+"""
+
+import csv
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional, Union
+
+_STOP = object()
+
+
+class TradeLogWriter:
+    """Background-thread CSV writer with batching, periodic flush and rotation."""
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        header: List[str],
+        flush_interval: float = 1.0,
+        max_batch: int = 256,
+        max_queue: int = 10000,
+        max_bytes: int = 50 * 1024 * 1024,
+        rotate_daily: bool = False,
+    ):
+        self.path = Path(path)
+        self.header = header
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_bytes = max_bytes
+        self.rotate_daily = rotate_daily
+        self.dropped = 0
+        self.written = 0
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._file = None
+        self._writer = None
+        self._day: Optional[str] = None
+        self._thread = threading.Thread(target=self._run, name="trade-log-writer", daemon=True)
+        self._thread.start()
+
+    def append(self, row: list) -> None:
+        """Enqueue one CSV row; never blocks."""
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Flush everything queued so far and stop the writer thread."""
+        if not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _open(self) -> None:
+        is_new = not self.path.exists() or self.path.stat().st_size == 0
+        self._file = self.path.open("a", newline="")
+        self._writer = csv.writer(self._file)
+        if is_new:
+            self._writer.writerow(self.header)
+        self._day = datetime.now(timezone.utc).strftime("%Y%m%d")
+
+    def _rotate_if_needed(self) -> None:
+        today = datetime.now(timezone.utc).strftime("%Y%m%d")
+        too_big = self._file.tell() >= self.max_bytes
+        new_day = self.rotate_daily and today != self._day
+        if not (too_big or new_day):
+            return
+        self._file.close()
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        os.replace(self.path, self.path.with_name(f"{self.path.stem}.{stamp}{self.path.suffix}"))
+        self._open()
+
+    def _write_batch(self, batch: list) -> None:
+        if self._file is None:
+            self._open()
+        self._rotate_if_needed()
+        self._writer.writerows(batch)
+        self._file.flush()
+        self.written += len(batch)
+
+    def _flush(self, batch: list) -> None:
+        try:
+            self._write_batch(batch)
+        except Exception as e:
+            print(f"[WARNING] Trade log write failed ({len(batch)} rows): {e}")
+
+    def _run(self) -> None:
+        batch: list = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                break
+            if item is not None:
+                batch.append(item)
+            due = time.monotonic() >= deadline
+            if batch and (due or len(batch) >= self.max_batch):
+                self._flush(batch)
+                batch = []
+            if due:
+                deadline = time.monotonic() + self.flush_interval
+        if batch:
+            self._flush(batch)
+        if self._file is not None:
+            self._file.close()
@@ -0,0 +1,118 @@
+"""
+Local on-disk bar store for the live bot.
+
+One directory per feed/timeframe/symbol holding one append-only binary file
+per column (int64 UTC nanoseconds for timestamps, float64 for OHLCV) plus a
+small ``meta.json`` with the committed row count. Readers only trust rows up
+to that count, so a crash mid-append never exposes a torn row; the next
+append simply overwrites the uncommitted tail.
+
+Layout:
+    <root>/<feed>/<timeframe>/<SYMBOL>/
+        timestamp.i8  open.f8  high.f8  low.f8  close.f8  volume.f8  meta.json
+
+Only closed bars belong in the store; the still-forming bar is returned to
+the caller by ``fetch_bars`` but never persisted.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ("open", "high", "low", "close", "volume")
+
+
+class BarStore:
+    """Append-only columnar bar history for a single symbol/feed/timeframe."""
+
+    def __init__(
+        self,
+        root: Union[str, Path],
+        symbol: str,
+        feed: str = "iex",
+        timeframe: str = "5Min",
+    ):
+        self.symbol = symbol
+        self.path = Path(root) / feed / timeframe / symbol.upper()
+        self._ts: Optional[np.ndarray] = None
+        self._cols: dict = {}
+
+    def _file(self, name: str) -> Path:
+        ext = "i8" if name == "timestamp" else "f8"
+        return self.path / f"{name}.{ext}"
+
+    def _committed_rows(self) -> int:
+        try:
+            with open(self.path / "meta.json", "r", encoding="utf-8") as f:
+                return int(json.load(f).get("rows", 0))
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _commit(self, rows: int) -> None:
+        tmp = self.path / "meta.json.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"symbol": self.symbol, "rows": rows}, f)
+        os.replace(tmp, self.path / "meta.json")
+
+    def _load(self) -> None:
+        if self._ts is not None:
+            return
+        rows = self._committed_rows()
+        if rows == 0:
+            self._ts = np.empty(0, dtype=np.int64)
+            self._cols = {c: np.empty(0, dtype=np.float64) for c in COLUMNS}
+            return
+        self._ts = np.fromfile(self._file("timestamp"), dtype=np.int64, count=rows)
+        self._cols = {c: np.fromfile(self._file(c), dtype=np.float64, count=rows) for c in COLUMNS}
+
+    def __len__(self) -> int:
+        self._load()
+        return len(self._ts)
+
+    @property
+    def last_timestamp(self) -> Optional[pd.Timestamp]:
+        self._load()
+        if len(self._ts) == 0:
+            return None
+        return pd.Timestamp(int(self._ts[-1]), tz="UTC")
+
+    def read(self, start: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """Return cached bars (UTC index) at or after ``start``."""
+        self._load()
+        i = 0
+        if start is not None:
+            i = int(np.searchsorted(self._ts, pd.Timestamp(start).value, side="left"))
+        index = pd.DatetimeIndex(self._ts[i:].astype("datetime64[ns]"), tz="UTC", name="timestamp")
+        return pd.DataFrame({c: self._cols[c][i:] for c in COLUMNS}, index=index)
+
+    def append(self, df: pd.DataFrame) -> int:
+        """Append bars strictly newer than the last cached one; return rows written."""
+        self._load()
+        if df.empty:
+            return 0
+        ts = df.index.tz_convert("UTC").as_unit("ns").asi8
+        if len(self._ts):
+            keep = ts > self._ts[-1]
+            df, ts = df[keep], ts[keep]
+        if len(ts) == 0:
+            return 0
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        rows = len(self._ts)
+        new_cols = {c: df[c].to_numpy(dtype=np.float64) for c in COLUMNS}
+        for name, values in [("timestamp", ts)] + list(new_cols.items()):
+            fp = self._file(name)
+            with open(fp, "r+b" if fp.exists() else "wb") as f:
+                # Drop any uncommitted tail left behind by an interrupted append
+                f.seek(rows * values.itemsize)
+                f.truncate()
+                f.write(np.ascontiguousarray(values).tobytes())
+        self._commit(rows + len(ts))
+
+        self._ts = np.concatenate([self._ts, ts])
+        self._cols = {c: np.concatenate([self._cols[c], new_cols[c]]) for c in COLUMNS}
+        return len(ts)
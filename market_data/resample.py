@@ -0,0 +1,103 @@
+"""
+Streaming OHLCV resampler.
+
+Aggregates bars (typically minutes) into one or more larger bar sizes
+chunk by chunk, so a multi-year minute history never has to be in memory
+at once. Each ``push`` aggregates its chunk with NumPy ``reduceat`` and
+returns the bars that are complete; the last, possibly unfinished bucket of
+every bar size is carried over and merged with the start of the next chunk
+(OHLCV aggregation is associative, so the carried bar is just one more input
+row). ``flush`` emits the carried bars at the end of the stream.
+
+Chunks must arrive in time order; they need not be aligned to bar or day
+boundaries.
+
+Usage:
+    resampler = StreamingResampler(["5min", "15min"])
+    for chunk in minute_chunks:
+        for rule, bars in resampler.push(chunk).items():
+            sink(rule, bars)
+    for rule, bars in resampler.flush().items():
+        sink(rule, bars)
+"""
+
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+OHLCV = ("open", "high", "low", "close", "volume")
+
+
+class _Carry:
+    """The open (unfinished) bar of one bar size."""
+
+    __slots__ = ("bucket", "values")
+
+    def __init__(self, bucket: int, values: np.ndarray):
+        self.bucket = bucket
+        self.values = values  # open, high, low, close, volume
+
+
+class StreamingResampler:
+    """Incrementally aggregate time-ordered OHLCV chunks into larger bars."""
+
+    def __init__(self, rules: Iterable[str] = ("5min",)):
+        self.rules = list(rules)
+        self._step = {r: pd.Timedelta(r).value for r in self.rules}
+        self._carry: Dict[str, Optional[_Carry]] = {r: None for r in self.rules}
+        self._last_ts: Optional[int] = None
+        self._tz = None
+        self._unit = "ns"
+
+    def push(self, chunk: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        """Add a chunk of bars; return the bars completed so far, per rule."""
+        chunk = chunk.dropna(subset=["close"])
+        if chunk.empty:
+            return {r: self._frame(np.empty(0, dtype=np.int64), np.empty((0, 5))) for r in self.rules}
+        index = pd.DatetimeIndex(chunk.index)
+        self._tz, self._unit = index.tz, index.unit
+        ts = index.as_unit("ns").asi8
+        if self._last_ts is not None and ts[0] <= self._last_ts:
+            raise ValueError("Chunks must be in strictly increasing time order")
+        self._last_ts = int(ts[-1])
+        values = np.column_stack([chunk[c].to_numpy(dtype=float) for c in OHLCV])
+        return {r: self._push_rule(r, ts, values) for r in self.rules}
+
+    def flush(self) -> Dict[str, pd.DataFrame]:
+        """Emit the unfinished bar of every rule and reset the carry-over."""
+        out = {}
+        for r in self.rules:
+            carry = self._carry[r]
+            self._carry[r] = None
+            if carry is None:
+                out[r] = self._frame(np.empty(0, dtype=np.int64), np.empty((0, 5)))
+            else:
+                out[r] = self._frame(np.array([carry.bucket]), carry.values[None, :])
+        return out
+
+    def _push_rule(self, rule: str, ts: np.ndarray, values: np.ndarray) -> pd.DataFrame:
+        step = self._step[rule]
+        buckets = ts - ts % step
+        carry = self._carry[rule]
+        if carry is not None:
+            buckets = np.concatenate([[carry.bucket], buckets])
+            values = np.vstack([carry.values, values])
+
+        starts = np.flatnonzero(np.diff(buckets, prepend=buckets[0] - 1))
+        agg = np.empty((len(starts), 5))
+        agg[:, 0] = values[starts, 0]
+        agg[:, 1] = np.maximum.reduceat(values[:, 1], starts)
+        agg[:, 2] = np.minimum.reduceat(values[:, 2], starts)
+        agg[:, 3] = values[np.append(starts[1:], len(values)) - 1, 3]
+        agg[:, 4] = np.add.reduceat(values[:, 4], starts)
+
+        # The last bucket may continue in the next chunk
+        self._carry[rule] = _Carry(int(buckets[starts[-1]]), agg[-1].copy())
+        return self._frame(buckets[starts[:-1]], agg[:-1])
+
+    def _frame(self, buckets: np.ndarray, agg: np.ndarray) -> pd.DataFrame:
+        index = pd.DatetimeIndex(buckets.astype("datetime64[ns]"), name="timestamp").as_unit(self._unit)
+        if self._tz is not None:
+            index = index.tz_localize("UTC").tz_convert(self._tz)
+        return pd.DataFrame(agg, index=index, columns=list(OHLCV))
@@ -19,7 +19,7 @@ Usage:
             "atr": 2.55,
             "vol_z": 0.82,
             "volm_z": 1.23,
-            "ema200_rel": -2.3,
+            "ema200_rel": -0.023,
             "bb_z": -0.95,
             "time_of_day": 10.5,
         }
@@ -30,13 +30,53 @@ Config (environment variables):
     ML_SHADOW_LOG_ONLY: "true" to only log, skip prediction (default: true)
     ML_SHADOW_PREDICT: "true" to run ML prediction if model exists (default: false)
     ML_SHADOW_LOG_PATH: path to log file (default: ml_shadow_log.jsonl)
+    ML_SHADOW_MODEL_PATH: model for predictions (default: models/shadow_model.pkl)
+    ML_SHADOW_TIMEOUT_MS: longest the caller waits for one prediction (default: 5)
+    ML_SHADOW_QUEUE_SIZE: log rows buffered before new ones are dropped (default: 10000)
+    ML_SHADOW_FSYNC_SEC: seconds between fsyncs of the log files (default: 1.0)
+
+Logging:
+    ``shadow_log`` only enqueues its rows on a bounded in-process queue. A
+    background thread serializes them, appends each batch to the JSONL
+    files (kept open) and fsyncs every ML_SHADOW_FSYNC_SEC. When the queue
+    is full the row is dropped and counted (``log_stats()``) instead of
+    blocking the trade path. Rows still queued at exit are written by an
+    atexit hook; ``flush()`` waits until everything queued so far is on disk.
+
+Prediction:
+    The model is loaded once per file version (path + mtime + size) into a
+    process-wide cache. Supported formats, by extension:
+      .json  logistic model JSON ({"type": "logistic", "bias", "weights"}, as in models/)
+      .txt   LightGBM native model (Booster.save_model)
+      .pkl   pickled LightGBM/sklearn classifier (only load models you trained)
+    Features are scored in the model's own column order (JSON weight order,
+    or the feature names saved with the LightGBM model); missing ones are 0.0.
+
+    Loading and scoring run on a single background worker. The caller waits
+    at most ML_SHADOW_TIMEOUT_MS and gets None on timeout, so order
+    submission is never held up by shadow inference; while the worker is
+    still busy (e.g. loading the model) new predictions are skipped rather
+    than queued. Call ``preload()`` at startup to load the model early.
 """
 
+import atexit
+import hashlib
 import json
 import os
+import pickle
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import IO, Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from experts.logistic import CompiledLogistic, sigmoid
+
+APPROVE_THRESHOLD = 0.55
 
 
 def _get_config(key: str, default: str) -> str:
@@ -65,7 +105,7 @@ def shadow_log(
     Log trade signal + features for ML training dataset collection.
     
     This function:
-    1. Writes one JSON row to ml_shadow_log.jsonl (training dataset)
+    1. Queues one JSON row for ml_shadow_log.jsonl (training dataset; written in the background)
     2. Optionally runs ML prediction if ML_SHADOW_PREDICT=true and model exists
     3. Returns prediction dict if computed, else None
     4. Never raises exceptions (wrapped in try/except to protect trade execution)
@@ -107,13 +147,12 @@ def shadow_log(
             "planned_tp": round(planned_tp, 2),
             "planned_sl": round(planned_sl, 2),
             "max_hold_bars": max_hold_bars,
-            "features": features,
+            "features": dict(features),
         }
         
-        # Append to JSONL file (one JSON object per line)
+        # Queue for the JSONL file (one JSON object per line); serialized and written off the trade path
         log_path = Path(_get_config("ML_SHADOW_LOG_PATH", "ml_shadow_log.jsonl"))
-        with open(log_path, "a") as f:
-            f.write(json.dumps(log_entry) + "\n")
+        _get_writer().enqueue(log_path, log_entry)
         
         # Optional: run ML prediction if enabled and model exists
         prediction = None
@@ -121,63 +160,347 @@ def shadow_log(
             prediction = _run_prediction(features)
             if prediction:
                 # Log prediction alongside features
-                with open(log_path.parent / "ml_predictions.jsonl", "a") as f:
-                    pred_entry = {
-                        "signal_id": signal_id,
-                        "timestamp": timestamp.isoformat(),
-                        **prediction,
-                    }
-                    f.write(json.dumps(pred_entry) + "\n")
+                pred_entry = {
+                    "signal_id": signal_id,
+                    "timestamp": timestamp.isoformat(),
+                    **prediction,
+                }
+                _get_writer().enqueue(log_path.parent / "ml_predictions.jsonl", pred_entry)
         
         return prediction
     
     except Exception as e:
         # CRITICAL: Never let ML logging break trade execution
         # Log error and continue silently
-        try:
-            error_log = Path("ml_shadow_errors.log")
-            with open(error_log, "a") as f:
-                f.write(f"{datetime.now().isoformat()} | ERROR: {e}\n")
-        except:
-            pass  # Even error logging failed - give up silently
-        
+        _log_error(e)
         return None
 
 
+def _log_error(e: Exception) -> None:
+    try:
+        error_log = Path("ml_shadow_errors.log")
+        with open(error_log, "a") as f:
+            f.write(f"{datetime.now().isoformat()} | ERROR: {e}\n")
+    except:
+        pass  # Even error logging failed - give up silently
+
+
+class ShadowPredictor:
+    """A loaded shadow model that scores features in a fixed column order.
+
+    Parameters
+    ----------
+    columns : sequence of str
+        Feature names in the order the model expects.
+    score : callable
+        Maps one feature row (list of floats in ``columns`` order) to P(profitable).
+    version : str
+        Model version reported with each prediction.
+    """
+
+    def __init__(self, columns: Sequence[str], score: Callable[[list], float], version: str):
+        self.columns = tuple(columns)
+        self._score = score
+        self.version = version
+
+    @classmethod
+    def load(cls, path: Path) -> "ShadowPredictor":
+        """Load a ``.json`` logistic, ``.txt`` LightGBM or ``.pkl`` classifier model."""
+        raw = path.read_bytes()
+        digest = hashlib.sha256(raw).hexdigest()[:12]
+        suffix = path.suffix.lower()
+        if suffix == ".json":
+            model = json.loads(raw.decode("utf-8"))
+            compiled = CompiledLogistic.from_model(model)
+            if compiled is None:
+                raise ValueError(f"{path}: expected a logistic model JSON")
+            weights, bias = compiled.weights.tolist(), compiled.bias
+            return cls(
+                compiled.feature_names,
+                lambda x: sigmoid(bias + sum(w * v for w, v in zip(weights, x))),
+                str(model.get("version", digest)),
+            )
+        if suffix == ".txt":
+            import lightgbm as lgb  # optional: only needed for LightGBM models
+
+            booster = lgb.Booster(model_str=raw.decode("utf-8"))
+            return cls(booster.feature_name(), lambda x: float(booster.predict(np.asarray([x]))[0]), digest)
+        if suffix == ".pkl":
+            model = pickle.loads(raw)
+            columns = getattr(model, "feature_names_in_", None)
+            if columns is None:
+                columns = getattr(model, "feature_name_", None)
+            if columns is None:
+                raise ValueError(f"{path}: pickled model does not record its feature names")
+            return cls(
+                [str(c) for c in columns],
+                lambda x: float(model.predict_proba(np.asarray([x]))[0][1]),
+                str(getattr(model, "version", digest)),
+            )
+        raise ValueError(f"{path}: unsupported model format {suffix!r}")
+
+    def predict(self, features: Dict[str, float]) -> float:
+        """P(profitable) for one feature dict."""
+        return float(self._score([float(features.get(c, 0.0)) for c in self.columns]))
+
+
+_cache_lock = threading.Lock()  # held by the worker while loading
+_submit_lock = threading.Lock()  # never held for long: callers take it before submit_order
+_cache: Dict[str, Tuple[Tuple[int, int], ShadowPredictor]] = {}  # path -> ((mtime_ns, size), predictor)
+_executor: Optional[ThreadPoolExecutor] = None
+_pending: Optional[Future] = None
+_stats = {"predictions": 0, "timeouts": 0, "skipped_busy": 0, "errors": 0}
+
+
+def _get_predictor(model_path: Path) -> Optional[ShadowPredictor]:
+    """The cached predictor for ``model_path``, (re)loaded only when the file changes."""
+    try:
+        st = model_path.stat()
+    except OSError:
+        return None
+    version = (st.st_mtime_ns, st.st_size)
+    key = str(model_path)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        predictor = ShadowPredictor.load(model_path)
+        _cache[key] = (version, predictor)
+        return predictor
+
+
+def _submit(fn: Callable[[], Any]) -> Optional[Future]:
+    """Run ``fn`` on the shadow worker; None if it is still busy with earlier work."""
+    global _executor, _pending
+    with _submit_lock:
+        if _pending is not None and not _pending.done():
+            return None
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ml-shadow")
+        _pending = _executor.submit(fn)
+        return _pending
+
+
+def _count(stat: str) -> None:
+    with _submit_lock:
+        _stats[stat] += 1
+
+
+def _model_path() -> Path:
+    return Path(_get_config("ML_SHADOW_MODEL_PATH", "models/shadow_model.pkl"))
+
+
+def preload() -> None:
+    """Start loading the shadow model in the background (no-op unless predictions are enabled)."""
+    if _get_config("ML_SHADOW_PREDICT", "false").lower() in ("true", "1", "yes"):
+        _submit(lambda: _get_predictor(_model_path()))
+
+
+def prediction_stats() -> Dict[str, int]:
+    """Counts of completed, timed-out, skipped and failed shadow predictions."""
+    return dict(_stats)
+
+
 def _run_prediction(features: Dict[str, float]) -> Optional[Dict[str, Any]]:
     """
-    Run ML prediction if model exists.
-    
-    This is a placeholder for Phase 4.2+ when a trained model is available.
-    For now, returns None (log-only mode).
+    Run ML prediction if model exists, waiting at most ML_SHADOW_TIMEOUT_MS.
     
     Args:
         features: Feature dict with keys: rsi, atr, vol_z, volm_z, ema200_rel, bb_z, time_of_day
     
     Returns:
-        Optional dict with prediction results, or None if no model available
+        Optional dict with prediction results, or None if no model is available,
+        the worker is busy, or the prediction missed its time budget
     """
-    # Check if model file exists
-    model_path = Path(_get_config("ML_SHADOW_MODEL_PATH", "models/shadow_model.pkl"))
+    model_path = _model_path()
     if not model_path.exists():
         return None
-    
-    # Placeholder for future implementation
-    # TODO: Load model, extract features in correct order, call predict_proba()
-    # For now, return None to indicate model not ready
-    return None
-    
-    # Future implementation (Phase 4.2+):
-    # import pickle
-    # with open(model_path, "rb") as f:
-    #     model = pickle.load(f)
-    # 
-    # # Extract features in model's expected order
-    # X = [features.get(k, 0.0) for k in model.feature_names_]
-    # prob = model.predict_proba([X])[0][1]  # P(profitable)
-    # 
-    # return {
-    #     "ml_prob": round(prob, 4),
-    #     "ml_signal": "APPROVE" if prob > 0.55 else "REJECT",
-    #     "ml_model_version": model.version,
-    # }
+    timeout = float(_get_config("ML_SHADOW_TIMEOUT_MS", "5")) / 1000.0
+
+    t0 = time.perf_counter()
+    features = dict(features)  # the worker may still read it after a timeout
+    future = _submit(lambda: _score(model_path, features))
+    if future is None:
+        _count("skipped_busy")
+        return None
+    try:
+        result = future.result(timeout=timeout)
+    except FutureTimeout:
+        _count("timeouts")
+        return None
+    except Exception:
+        _count("errors")
+        raise
+    if result is None:
+        return None
+    prob, version = result
+    _count("predictions")
+    return {
+        "ml_prob": round(prob, 4),
+        "ml_signal": "APPROVE" if prob > APPROVE_THRESHOLD else "REJECT",
+        "ml_model_version": version,
+        "ml_latency_ms": round((time.perf_counter() - t0) * 1000.0, 3),
+    }
+
+
+def _score(model_path: Path, features: Dict[str, float]) -> Optional[Tuple[float, str]]:
+    predictor = _get_predictor(model_path)
+    if predictor is None:
+        return None
+    return predictor.predict(features), predictor.version
+
+
+_STOP = object()
+
+
+class ShadowWriter:
+    """Bounded queue of JSONL rows, written by a background thread in batches.
+
+    Parameters
+    ----------
+    max_queue : int
+        Rows buffered before ``enqueue`` starts dropping.
+    fsync_interval : float
+        Seconds between fsyncs of the files written since the last one.
+    batch_size : int
+        Most rows written per batch.
+    """
+
+    def __init__(self, max_queue: int = 10_000, fsync_interval: float = 1.0, batch_size: int = 256):
+        self.fsync_interval = fsync_interval
+        self.batch_size = batch_size
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.errors = 0
+        self._thread = threading.Thread(target=self._run, name="ml-shadow-writer", daemon=True)
+        self._thread.start()
+
+    def enqueue(self, path: Path, entry: Dict[str, Any]) -> bool:
+        """Queue one row for ``path``; drop it (and count) if the queue is full."""
+        try:
+            self._queue.put_nowait((path, entry))
+            return True
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until every row queued so far is written and fsynced."""
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Write what is queued, fsync and stop the thread."""
+        if self._thread.is_alive():
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                return
+            self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"written": self.written, "dropped": self.dropped, "batches": self.batches,
+                    "errors": self.errors, "queued": self._queue.qsize()}
+
+    def _run(self) -> None:
+        files: Dict[Path, IO[str]] = {}
+        unsynced: set = set()
+        last_sync = time.monotonic()
+        while True:
+            try:
+                batch = [self._queue.get(timeout=self.fsync_interval)]
+            except queue.Empty:
+                batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            lines: Dict[Path, List[str]] = {}
+            waiters: List[threading.Event] = []
+            stop = False
+            for item in batch:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    path, entry = item
+                    try:
+                        row = json.dumps(entry)
+                    except Exception as e:
+                        # One unserializable row (e.g. a numpy scalar) must not stop the writer
+                        with self._lock:
+                            self.errors += 1
+                        _log_error(e)
+                        continue
+                    lines.setdefault(path, []).append(row)
+            for path, rows in lines.items():
+                try:
+                    f = files.get(path)
+                    if f is None:
+                        f = files[path] = open(path, "a")
+                    f.write("\n".join(rows) + "\n")
+                    f.flush()
+                    unsynced.add(path)
+                    with self._lock:
+                        self.written += len(rows)
+                        self.batches += 1
+                except Exception as e:
+                    with self._lock:
+                        self.errors += 1
+                    _log_error(e)
+
+            now = time.monotonic()
+            if unsynced and (waiters or stop or now - last_sync >= self.fsync_interval):
+                for path in unsynced:
+                    try:
+                        os.fsync(files[path].fileno())
+                    except Exception as e:
+                        _log_error(e)
+                unsynced.clear()
+                last_sync = now
+            for done in waiters:
+                done.set()
+            if stop:
+                for f in files.values():
+                    f.close()
+                return
+
+
+_writer: Optional[ShadowWriter] = None
+_writer_lock = threading.Lock()
+
+
+def _get_writer() -> ShadowWriter:
+    """The process-wide shadow log writer, started on first use (drained at exit)."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = ShadowWriter(
+                    max_queue=int(_get_config("ML_SHADOW_QUEUE_SIZE", "10000")),
+                    fsync_interval=float(_get_config("ML_SHADOW_FSYNC_SEC", "1.0")),
+                )
+                atexit.register(_writer.close)
+    return _writer
+
+
+def flush(timeout: float = 5.0) -> bool:
+    """Wait until all queued shadow log rows are on disk (True if nothing is pending)."""
+    return True if _writer is None else _writer.flush(timeout)
+
+
+def log_stats() -> Dict[str, int]:
+    """Rows written, dropped (queue full), batches, write errors and currently queued."""
+    return {} if _writer is None else _writer.stats()
@@ -24,17 +24,32 @@ Usage:
 """
 
 import argparse
-import csv
+import asyncio
 import os
+import sys
 import time
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from typing import Any
 
 import numpy as np
 import pandas as pd
-import pytz
 from alpaca_trade_api.rest import REST, TimeFrame, TimeFrameUnit
 
+# Ensure repo root is on sys.path so the bot can import local packages
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from features.snapshot import SnapshotError, load_snapshot, save_snapshot
+from features.streaming import StreamingFeatureEngine
+from market_data.bar_store import BarStore
+from market_data.history import fetch_history
+from live.account_mirror import AccountMirror
+from live.metrics import LatencyMetrics, MetricsServer
+from live.scheduler import BarCloseScheduler, MarketCalendar
+from live.trade_log import TradeLogWriter
+
 
 def require_env(name: str) -> str:
     val = os.getenv(name)
@@ -43,120 +58,6 @@ def require_env(name: str) -> str:
     return val
 
 
-def rsi(series: pd.Series, period: int = 14) -> pd.Series:
-    delta = series.diff()
-    up = delta.clip(lower=0)
-    down = (-delta).clip(lower=0)
-    roll_up = up.ewm(alpha=1 / period, adjust=False).mean()
-    roll_down = down.ewm(alpha=1 / period, adjust=False).mean() + 1e-12
-    rs = roll_up / roll_down
-    return 100 - (100 / (1 + rs))
-
-
-def atr(df: pd.DataFrame, period: int = 14) -> pd.Series:
-    hl = df["high"] - df["low"]
-    hc = (df["high"] - df["close"].shift()).abs()
-    lc = (df["low"] - df["close"].shift()).abs()
-    tr = pd.concat([hl, hc, lc], axis=1).max(axis=1)
-    return tr.ewm(alpha=1 / period, adjust=False).mean()
-
-
-def ema(series: pd.Series, period: int) -> pd.Series:
-    return series.ewm(span=period, adjust=False).mean()
-
-
-def bollinger_bands(series: pd.Series, period: int = 20, num_std: float = 2.0) -> tuple:
-    """Returns (middle_band, upper_band, lower_band)"""
-    middle = series.rolling(window=period).mean()
-    std = series.rolling(window=period).std()
-    upper = middle + (std * num_std)
-    lower = middle - (std * num_std)
-    return middle, upper, lower
-
-
-def calculate_features(df: pd.DataFrame) -> pd.DataFrame:
-    """Calculate all Phase 1+2 features"""
-    # Basic indicators
-    df["rsi"] = rsi(df["close"])
-    df["atr"] = atr(df)
-    df["ema20"] = ema(df["close"], 20)
-    df["ema50"] = ema(df["close"], 50)
-    df["ema200"] = ema(df["close"], 200)
-    
-    # Bollinger Bands
-    df["bb_mid"], df["bb_upper"], df["bb_lower"] = bollinger_bands(df["close"], 20, 2.0)
-    
-    # Phase 1 features
-    # Volatility z-score (20-period rolling)
-    returns = df["close"].pct_change()
-    vol = returns.rolling(20).std()
-    vol_mean = vol.rolling(60).mean()
-    vol_std = vol.rolling(60).std() + 1e-8
-    df["vol_z"] = (vol - vol_mean) / vol_std
-    
-    # Volume z-score (20-period rolling)
-    vol_mean_qty = df["volume"].rolling(20).mean()
-    vol_std_qty = df["volume"].rolling(20).std() + 1e-8
-    df["volm_z"] = (df["volume"] - vol_mean_qty) / vol_std_qty
-    
-    # Time of day (hours since midnight in US/Eastern, e.g., 10:30 AM ET = 10.5)
-    # Convert UTC index to US/Eastern
-    eastern = pytz.timezone('US/Eastern')
-    df_et = df.index.tz_convert(eastern)
-    df["time_of_day"] = df_et.hour + df_et.minute / 60.0
-    
-    # Phase 2 features
-    # EMA200 relative position (%)
-    df["ema200_rel"] = ((df["close"] - df["ema200"]) / df["ema200"]) * 100
-    
-    # BB z-score
-    bb_width = df["bb_upper"] - df["bb_lower"] + 1e-8
-    df["bb_z"] = (df["close"] - df["bb_mid"]) / (bb_width / 2)
-    
-    return df.dropna()
-
-
-def calculate_rsi_15min(df_5min: pd.DataFrame) -> float:
-    """
-    Phase 3.2: Calculate 15-min RSI from 5-min bars.
-    Uses pandas resample to consolidate 5-min → 15-min, then computes RSI(14).
-    
-    Returns 50.0 (neutral) if insufficient data or calculation fails.
-    """
-    try:
-        # Resample 5-min bars to 15-min bars
-        df_15min = df_5min.resample('15T').agg({
-            'open': 'first',
-            'high': 'max',
-            'low': 'min',
-            'close': 'last',
-            'volume': 'sum',
-        }).dropna()
-        
-        if len(df_15min) < 15:  # Need at least 15 bars for RSI(14)
-            return 50.0
-        
-        # Calculate RSI on 15-min bars
-        delta = df_15min['close'].diff()
-        gain = delta.where(delta > 0, 0.0).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0.0)).rolling(window=14).mean()
-        
-        rs = gain / (loss + 1e-9)
-        rsi = 100.0 - (100.0 / (1.0 + rs))
-        
-        # Get latest 15-min RSI value
-        latest_rsi = rsi.iloc[-1]
-        
-        if pd.isna(latest_rsi):
-            return 50.0
-        
-        return float(latest_rsi)
-        
-    except Exception as e:
-        print(f"[WARNING] Failed to calculate 15-min RSI: {e}")
-        return 50.0  # Neutral fallback
-
-
 def get_dynamic_rsi_thresholds(vol_z: float) -> tuple:
     """
     Phase 2: Dynamic RSI thresholds based on volatility regime
@@ -172,96 +73,253 @@ def get_dynamic_rsi_thresholds(vol_z: float) -> tuple:
         return 25.0, 75.0  # Normal: baseline thresholds
 
 
-def fetch_bars(api: REST, symbol: str, days: int = 14, feed: str = "iex") -> pd.DataFrame:
-    end = datetime.now(timezone.utc)
-    start = end - timedelta(days=days)
-    bars = api.get_bars(
-        symbol,
-        TimeFrame(5, TimeFrameUnit.Minute),
-        start=start.isoformat(),
-        end=end.isoformat(),
-        adjustment="raw",
-        limit=1000,
-        feed=feed,
-    )
-    if not bars:
+BAR_MINUTES = 5
+
+
+def _delta_start(store: BarStore | None, start: datetime) -> datetime:
+    """First timestamp that still has to be downloaded for this store."""
+    if store is not None:
+        last_cached = store.last_timestamp
+        if last_cached is not None and last_cached >= start:
+            return last_cached + timedelta(minutes=BAR_MINUTES)
+    return start
+
+
+def _merge_with_store(
+    df: pd.DataFrame,
+    store: BarStore | None,
+    start: datetime,
+    end: datetime,
+    include_partial: bool,
+) -> pd.DataFrame:
+    """Persist newly closed bars and return the full window for one symbol."""
+    closed = df.index + pd.Timedelta(minutes=BAR_MINUTES) <= end
+    if store is not None:
+        store.append(df[closed])
+        cached = store.read(start=start)
+        df = pd.concat([cached, df[~closed]]) if include_partial and (~closed).any() else cached
+    elif not include_partial:
+        df = df[closed]
+    return df
+
+
+def fetch_bars(
+    api: REST,
+    symbol: str,
+    days: int = 14,
+    feed: str = "iex",
+    store: BarStore | None = None,
+    include_partial: bool = True,
+    end: datetime | None = None,
+) -> pd.DataFrame:
+    """Return the last ``days`` of 5-min bars, including the still-forming bar.
+
+    Single-symbol ``fetch_bars_multi``; raises if no bars come back.
+    """
+    stores = {symbol: store} if store is not None else None
+    df = fetch_bars_multi(api, [symbol], days, feed, stores, include_partial, end)[symbol]
+    if df.empty:
         raise RuntimeError("No bars returned")
-    records = []
-    for b in bars:
-        ts = getattr(b, "t", None) or getattr(b, "timestamp", None)
-        idx = pd.to_datetime(ts, utc=True)
-        records.append(
-            {
-                "timestamp": idx,
-                "open": float(getattr(b, "o", getattr(b, "open", 0.0))),
-                "high": float(getattr(b, "h", getattr(b, "high", 0.0))),
-                "low": float(getattr(b, "l", getattr(b, "low", 0.0))),
-                "close": float(getattr(b, "c", getattr(b, "close", 0.0))),
-                "volume": float(getattr(b, "v", getattr(b, "volume", 0.0))),
-            }
-        )
-    df = pd.DataFrame.from_records(records).set_index("timestamp").sort_index()
     return df
 
 
-def latest_filled_order_time(api: REST, symbol: str) -> datetime | None:
-    since = (datetime.now(timezone.utc) - timedelta(days=2)).isoformat()
-    orders = api.list_orders(status="all", after=since, symbols=[symbol])
-    filled = [o for o in orders if getattr(o, "filled_at", None)]
-    if not filled:
-        return None
-    latest = max(pd.to_datetime(o.filled_at, utc=True) for o in filled)
-    return latest
+def fetch_bars_multi(
+    api: REST,
+    symbols: list,
+    days: int = 14,
+    feed: str = "iex",
+    stores: dict | None = None,
+    include_partial: bool = True,
+    end: datetime | None = None,
+) -> dict:
+    """Return the last ``days`` of 5-min bars per symbol, batched across a watchlist.
+
+    The window is downloaded in parallel chunks with no row limit, so long
+    warm-ups are not truncated. With a ``stores`` entry, only bars newer than
+    that symbol's last cached timestamp are requested; newly closed bars are
+    appended to the store and the rest of the window is served from disk.
+    Symbols are grouped by the first timestamp they still need, with one
+    multi-symbol request per group and chunk, so a cold symbol (new or
+    never-filling ticker) does not make the warm ones re-download the whole
+    window. Pass ``include_partial=False`` to get closed bars only. ``end``
+    defaults to now.
+
+    Returns a dict of symbol -> DataFrame; a symbol with no bars maps to an
+    empty frame rather than raising, so one bad ticker can't sink the cycle.
+    """
+    stores = stores or {}
+    end = end or datetime.now(timezone.utc)
+    start = end - timedelta(days=days)
+    groups: dict = {}
+    for sym in symbols:
+        groups.setdefault(_delta_start(stores.get(sym), start), []).append(sym)
+    frames = {}
+    for fetch_start, group in groups.items():
+        frames.update(
+            fetch_history(
+                api,
+                group,
+                start=fetch_start,
+                end=end,
+                timeframe=TimeFrame(BAR_MINUTES, TimeFrameUnit.Minute),
+                feed=feed,
+            )
+        )
+    return {
+        sym: _merge_with_store(frames[sym], stores.get(sym), start, end, include_partial)
+        for sym in symbols
+    }
+
+
+class SymbolState:
+    """Per-symbol state carried across cycles (bar cache, indicators, timings).
+
+    With a ``snapshot_path``, the indicator state, last entry time and
+    trailing-stop level are saved after every decision and restored at
+    start-up, so a restart only replays the bars it missed.
+    """
 
+    def __init__(
+        self,
+        symbol: str,
+        store: BarStore | None = None,
+        timeframes: tuple = (15,),
+        snapshot_path: Path | None = None,
+    ):
+        self.symbol = symbol
+        self.store = store
+        # Incremental indicators (incl. higher-timeframe RSIs): warmed once from history, then O(1) per new bar
+        self.engine = StreamingFeatureEngine(timeframes=timeframes)
+        self.last_latency = 0.0
+        self.last_entry_time: datetime | None = None
+        self.trail_stop: float | None = None
+        self.snapshot_path = snapshot_path
+        if snapshot_path is not None:
+            self._restore()
+
+    def _restore(self) -> None:
+        try:
+            strategy = load_snapshot(self.snapshot_path, self.engine, self.symbol)
+        except SnapshotError as e:
+            print(f"[SNAPSHOT] [{self.symbol}] Discarding {self.snapshot_path}: {e}")
+            return
+        if strategy is None:
+            return
+        if strategy.get("last_entry_time"):
+            self.last_entry_time = datetime.fromisoformat(strategy["last_entry_time"])
+        self.trail_stop = strategy.get("trail_stop")
+        print(f"[SNAPSHOT] [{self.symbol}] Restored indicators through {self.engine.last_timestamp}")
 
-def main() -> None:
+    def save_snapshot(self) -> None:
+        if self.snapshot_path is None or self.engine.last_timestamp is None:
+            return
+        strategy = {
+            "last_entry_time": self.last_entry_time.isoformat() if self.last_entry_time else None,
+            "trail_stop": self.trail_stop,
+        }
+        save_snapshot(self.snapshot_path, self.engine, self.symbol, strategy)
+
+
+def main(argv: list | None = None, api: Any = None, clock: Any = None) -> None:
+    """Run the bot.
+
+    ``api`` and ``clock`` are for replays (see ``live.replay``): a stand-in
+    for the Alpaca ``REST`` client, and an object with ``now()`` (UTC) and
+    ``sleep(seconds)`` that replaces the wall clock. By default the real
+    REST client is built from the environment and the wall clock is used.
+    """
     p = argparse.ArgumentParser(description="Alpaca RSI bot with Phase 1+2 enhancements")
     p.add_argument("--symbol", default="TSLA")
+    p.add_argument("--symbols", default="", help="comma-separated watchlist evaluated concurrently (overrides --symbol)")
+    p.add_argument("--max-concurrency", type=int, default=8, help="max symbols evaluated at once")
     p.add_argument("--cap", type=float, default=0.0025, help="max fraction of equity per trade (default 0.25%)")
     p.add_argument("--min-hold-min", type=int, default=30, help="minimum hold time in minutes")
-    p.add_argument("--sleep-min", type=int, default=5, help="loop interval minutes (if --loop set)")
+    p.add_argument("--sleep-min", type=int, default=5, help="loop interval minutes, aligned to bar closes (if --loop set)")
+    p.add_argument("--settle-sec", type=float, default=3.0, help="seconds to wait after each bar close before deciding")
     p.add_argument("--feed", default="iex", help="data feed (iex for free paper keys)")
     p.add_argument("--loop", action="store_true", help="keep running every sleep-min")
     p.add_argument("--log-file", default="alpaca_rsi_log.csv", help="CSV log file path")
-    args = p.parse_args()
-
-    key = require_env("ALPACA_API_KEY")
-    secret = require_env("ALPACA_SECRET_KEY")
-    base = os.getenv("ALPACA_BASE_URL", "https://paper-api.alpaca.markets")
-
-    api = REST(key, secret, base_url=base)
-
-    log_path = Path(args.log_file)
-
-    def append_log(action: str, price: float, rsi_val: float, qty: float, note: str = "") -> None:
-        is_new = not log_path.exists()
-        with log_path.open("a", newline="") as f:
-            writer = csv.writer(f)
-            if is_new:
-                writer.writerow(
-                    [
-                        "timestamp",
-                        "symbol",
-                        "action",
-                        "price",
-                        "rsi",
-                        "qty",
-                        "note",
-                    ]
-                )
-            writer.writerow(
-                [
-                    datetime.now(timezone.utc).isoformat(),
-                    args.symbol,
-                    action,
-                    f"{price:.4f}",
-                    f"{rsi_val:.2f}",
-                    qty,
-                    note,
-                ]
-            )
+    p.add_argument("--log-max-mb", type=int, default=50, help="rotate the CSV log beyond this size")
+    p.add_argument("--log-rotate-daily", action="store_true", help="also rotate the CSV log at each UTC day")
+    p.add_argument("--history-days", type=int, default=14, help="days of bar history to warm up from")
+    p.add_argument("--cache-dir", default=".bar_cache", help="on-disk bar cache directory")
+    p.add_argument("--no-cache", action="store_true", help="fetch the full window every cycle")
+    p.add_argument("--reconcile-min", type=int, default=15, help="minutes between full account/order reconciliations")
+    p.add_argument("--rsi-1h-max", type=float, default=None,
+                   help="also require the 1-hour RSI below this for entries (off by default)")
+    p.add_argument("--state-dir", default=".bot_state", help="per-symbol indicator/strategy snapshots for warm restarts")
+    p.add_argument("--no-state", action="store_true", help="do not save or restore snapshots")
+    p.add_argument("--metrics-file", default="bot_metrics.prom",
+                   help="per-stage latency metrics (Prometheus text), rewritten every cycle ('none' to disable)")
+    p.add_argument("--metrics-port", type=int, default=0, help="serve http://127.0.0.1:<port>/metrics (0 = off)")
+    p.add_argument("--latency-budget-ms", type=float, default=None,
+                   help="skip entries submitted later than this after the bar close (--loop only)")
+    args = p.parse_args(argv)
+
+    if api is None:
+        key = require_env("ALPACA_API_KEY")
+        secret = require_env("ALPACA_SECRET_KEY")
+        base = os.getenv("ALPACA_BASE_URL", "https://paper-api.alpaca.markets")
+        api = REST(key, secret, base_url=base)
+
+    utcnow = clock.now if clock is not None else lambda: datetime.now(timezone.utc)
+    sleep = clock.sleep if clock is not None else time.sleep
+
+    # Local account/position/order state; REST is only hit for deltas and periodic reconciliation
+    mirror = AccountMirror(api, reconcile_every=timedelta(minutes=args.reconcile_min), now=utcnow)
+
+    # Trade log rows are queued and written by a background thread (no disk I/O on the decision path)
+    trade_log = TradeLogWriter(
+        args.log_file,
+        header=["timestamp", "symbol", "action", "price", "rsi", "qty", "note"],
+        max_bytes=args.log_max_mb * 1024 * 1024,
+        rotate_daily=args.log_rotate_daily,
+    )
+
+    # Per-stage latency histograms (p50/p95/p99), exported to a file and optionally over HTTP
+    metrics = LatencyMetrics(budget=None if args.latency_budget_ms is None else args.latency_budget_ms / 1000.0)
+    metrics_server = MetricsServer(metrics, args.metrics_port) if args.metrics_port else None
+    if metrics_server is not None:
+        print(f"[METRICS] Serving http://127.0.0.1:{metrics_server.port}/metrics")
+
+    # Load the shadow model in the background so the first signal's prediction fits its budget
+    try:
+        from ml.shadow import is_enabled, preload
+
+        if is_enabled():
+            preload()
+    except Exception as e:
+        print(f"[ML SHADOW WARNING] {e} - continuing without preload")
+
+    symbols = [s.strip().upper() for s in args.symbols.split(",") if s.strip()] or [args.symbol]
+    # Higher-timeframe RSIs maintained incrementally from the 5-min bars
+    timeframes = (15, 60) if args.rsi_1h_max is not None else (15,)
+    # Closed bars persist across cycles and restarts; each cycle fetches only the delta
+    states = [
+        SymbolState(
+            sym,
+            None if args.no_cache else BarStore(args.cache_dir, sym, feed=args.feed),
+            timeframes,
+            None if args.no_state else Path(args.state_dir) / f"{sym}.json",
+        )
+        for sym in symbols
+    ]
+
+    def append_log(symbol: str, action: str, price: float, rsi_val: float, qty: float, note: str = "") -> None:
+        trade_log.append(
+            [
+                utcnow().isoformat(),
+                symbol,
+                action,
+                f"{price:.4f}",
+                f"{rsi_val:.2f}",
+                qty,
+                note,
+            ]
+        )
 
     def maybe_update_trailing_stop(
+        state: SymbolState,
         entry_price: float,
         current_price: float,
         atr_val: float,
@@ -273,6 +331,7 @@ def main() -> None:
         
         Called every 5-min bar check when position is open.
         """
+        symbol = state.symbol
         # Only trail if profitable
         unrealized_pnl = current_price - entry_price
         if unrealized_pnl <= 0:
@@ -284,16 +343,18 @@ def main() -> None:
         
         # Get current stop-loss order
         try:
-            orders = api.list_orders(status='open', symbols=[args.symbol])
+            with metrics.stage("order_lookup"):
+                orders = mirror.open_orders(symbol)
             stop_orders = [o for o in orders if o.stop_price is not None]
             if not stop_orders:
-                append_log("trail_warning", current_price, 0, pos_qty, "No stop-loss order found")
+                append_log(symbol, "trail_warning", current_price, 0, pos_qty, "No stop-loss order found")
                 return
             
             stop_order = stop_orders[0]
-            old_stop_price = float(stop_order.stop_price)
+            # The last level we set guards against a stale order cache moving the stop back down
+            old_stop_price = max(float(stop_order.stop_price), state.trail_stop or 0.0)
         except Exception as e:
-            append_log("trail_error", current_price, 0, pos_qty, f"Failed to get stop order: {e}")
+            append_log(symbol, "trail_error", current_price, 0, pos_qty, f"Failed to get stop order: {e}")
             return
         
         # Only move stop UP, never down
@@ -307,36 +368,41 @@ def main() -> None:
         
         # Sanity check: never move stop above current price
         if new_stop_price >= current_price:
-            append_log("trail_error", current_price, 0, pos_qty, "Invalid stop: above current price")
+            append_log(symbol, "trail_error", current_price, 0, pos_qty, "Invalid stop: above current price")
             return
         
         # Update stop-loss order
         try:
-            api.replace_order(
-                order_id=stop_order.id,
-                qty=stop_order.qty,
-                time_in_force='day',
-                stop_price=round(new_stop_price, 2),
-            )
+            with metrics.stage("trailing_stop_update"):
+                api.replace_order(
+                    order_id=stop_order.id,
+                    qty=stop_order.qty,
+                    time_in_force='day',
+                    stop_price=round(new_stop_price, 2),
+                )
+            mirror.mark_orders_dirty()
+            state.trail_stop = new_stop_price
             profit_secured = new_stop_price - entry_price
             msg = f"Stop ${old_stop_price:.2f} → ${new_stop_price:.2f} (profit secured: ${profit_secured:.2f})"
-            print(f"[TRAIL] {msg}")
-            append_log("trail_update", current_price, 0, pos_qty, msg)
+            print(f"[TRAIL] [{symbol}] {msg}")
+            append_log(symbol, "trail_update", current_price, 0, pos_qty, msg)
         except Exception as e:
-            append_log("trail_error", current_price, 0, pos_qty, f"Failed to update stop: {e}")
+            append_log(symbol, "trail_error", current_price, 0, pos_qty, f"Failed to update stop: {e}")
             # Original stop still active, safe to continue
 
-    def run_once() -> None:
-        acct = api.get_account()
-        equity = float(acct.equity)
-
-        df = fetch_bars(api, args.symbol, days=14, feed=args.feed)
-        df = calculate_features(df)
-        
+    def decide(state: SymbolState, df: pd.DataFrame, equity: float) -> None:
+        symbol = state.symbol
         if df.empty:
+            raise RuntimeError("No bars returned")
+        if state.engine.last_timestamp is not None and state.engine.last_timestamp < df.index[0]:
+            # History gap longer than the fetch window: rebuild from scratch
+            state.engine.reset()
+        with metrics.stage("features"):
+            latest = state.engine.warm_up(df)
+
+        if latest is None:
             raise RuntimeError("Not enough data after feature calculation")
 
-        latest = df.iloc[-1]
         price = float(latest["close"])
         rsi_val = float(latest["rsi"])
         atr_val = float(latest["atr"])
@@ -349,32 +415,27 @@ def main() -> None:
         # Get dynamic RSI thresholds based on volatility regime
         rsi_low, rsi_high = get_dynamic_rsi_thresholds(vol_z)
         
-        # Phase 3.2: Calculate 15-min RSI for multi-timeframe confirmation
-        rsi_15m = calculate_rsi_15min(df)
+        # Phase 3.2: 15-min RSI for multi-timeframe confirmation (aggregated incrementally by the engine)
+        rsi_15m = float(latest["rsi_15m"])
 
-        # Enforce min hold by checking last filled order time
-        last_fill = latest_filled_order_time(api, args.symbol)
-        now = datetime.now(timezone.utc)
+        # Enforce min hold by checking last filled order time (or our own last entry, e.g. right after a restart)
+        last_fill = mirror.last_fill_time(symbol) or state.last_entry_time
+        now = utcnow()
         if last_fill and (now - last_fill) < timedelta(minutes=args.min_hold_min):
             msg = f"Skipping: min hold not met (last fill {last_fill})"
-            print(msg)
-            append_log("skip_min_hold", price, rsi_val, 0, msg)
+            print(f"[{symbol}] {msg}")
+            append_log(symbol, "skip_min_hold", price, rsi_val, 0, msg)
             return
 
         # Current position?
-        pos_qty = 0.0
-        entry_price = None
-        try:
-            pos = api.get_position(args.symbol)
-            pos_qty = float(pos.qty)
-            entry_price = float(pos.avg_entry_price)
-        except Exception:
-            pos_qty = 0.0
+        with metrics.stage("position_lookup"):
+            pos_qty, entry_price = mirror.position(symbol)
 
         if pos_qty != 0:
             # Phase 3.1: Update trailing stop if profitable
             if pos_qty > 0 and entry_price is not None:
                 maybe_update_trailing_stop(
+                    state,
                     entry_price=entry_price,
                     current_price=price,
                     atr_val=atr_val,
@@ -383,65 +444,73 @@ def main() -> None:
             
             # If already long and RSI > exit threshold, flatten
             if pos_qty > 0 and rsi_val > rsi_high:
-                api.close_position(args.symbol)
+                with metrics.stage("order_exit"):
+                    api.close_position(symbol)
+                mirror.mark_orders_dirty()
                 msg = f"Exit: RSI {rsi_val:.2f} > {rsi_high:.0f}"
-                print(msg)
-                append_log("exit_rsi", price, rsi_val, pos_qty, msg)
+                print(f"[{symbol}] {msg}")
+                append_log(symbol, "exit_rsi", price, rsi_val, pos_qty, msg)
             else:
                 msg = f"Holding position {pos_qty}, RSI {rsi_val:.2f}"
-                print(msg)
-                append_log("holding", price, rsi_val, pos_qty, msg)
+                print(f"[{symbol}] {msg}")
+                append_log(symbol, "holding", price, rsi_val, pos_qty, msg)
             return
 
         # Flat: consider entry with Phase 1+2 filters
+        state.trail_stop = None
         
         # Phase 1 Filter 1: Time-of-day (10:00 AM to 3:30 PM ET)
         if time_of_day < 10.0 or time_of_day > 15.5:
             msg = f"No entry: outside trading hours (time_of_day={time_of_day:.2f})"
-            print(msg)
-            append_log("skip_time_of_day", price, rsi_val, 0, msg)
+            print(f"[{symbol}] {msg}")
+            append_log(symbol, "skip_time_of_day", price, rsi_val, 0, msg)
             return
         
         # Phase 1 Filter 2: Volatility regime (vol_z > 0.2) - TEMPORARILY LOOSENED FOR TESTING
         if vol_z < 0.2:
             msg = f"No entry: low volatility regime (vol_z={vol_z:.2f})"
-            print(msg)
-            append_log("skip_volatility", price, rsi_val, 0, msg)
+            print(f"[{symbol}] {msg}")
+            append_log(symbol, "skip_volatility", price, rsi_val, 0, msg)
             return
         
         # Phase 1 Filter 3: Volume confirmation (volm_z > 0.3) - TEMPORARILY LOOSENED FOR TESTING
         if volm_z < 0.3:
             msg = f"No entry: insufficient volume (volm_z={volm_z:.2f})"
-            print(msg)
-            append_log("skip_volume", price, rsi_val, 0, msg)
+            print(f"[{symbol}] {msg}")
+            append_log(symbol, "skip_volume", price, rsi_val, 0, msg)
             return
         
         # RSI threshold check (dynamic based on volatility)
         if rsi_val >= rsi_low:
             msg = f"No entry: RSI {rsi_val:.2f} >= {rsi_low:.0f} (vol_z={vol_z:.2f})"
-            print(msg)
-            append_log("skip_rsi", price, rsi_val, 0, msg)
+            print(f"[{symbol}] {msg}")
+            append_log(symbol, "skip_rsi", price, rsi_val, 0, msg)
             return
         
         # Phase 3.2: Multi-timeframe RSI filter (15-min must be bearish/neutral)
         if rsi_15m >= 50.0:
             msg = f"No entry: 5m RSI {rsi_val:.2f} oversold but 15m RSI {rsi_15m:.2f} still bullish"
-            print(msg)
-            append_log("skip_multi_tf", price, rsi_val, 0, msg)
+            print(f"[{symbol}] {msg}")
+            append_log(symbol, "skip_multi_tf", price, rsi_val, 0, msg)
+            return
+        if args.rsi_1h_max is not None and latest["rsi_60m"] >= args.rsi_1h_max:
+            msg = f"No entry: 5m RSI {rsi_val:.2f} oversold but 1h RSI {latest['rsi_60m']:.2f} >= {args.rsi_1h_max:.0f}"
+            print(f"[{symbol}] {msg}")
+            append_log(symbol, "skip_multi_tf", price, rsi_val, 0, msg)
             return
         
         # Phase 2 Filter 1: Trend filter (don't catch falling knives)
-        if ema200_rel < -5.0:
-            msg = f"No entry: strong downtrend (ema200_rel={ema200_rel:.2f}%)"
-            print(msg)
-            append_log("skip_trend", price, rsi_val, 0, msg)
+        if ema200_rel < -0.05:
+            msg = f"No entry: strong downtrend (ema200_rel={ema200_rel:.2%})"
+            print(f"[{symbol}] {msg}")
+            append_log(symbol, "skip_trend", price, rsi_val, 0, msg)
             return
         
         # Phase 2 Filter 2: Bollinger Band confirmation (double oversold)
         if bb_z > -0.8:
             msg = f"No entry: BB not oversold (bb_z={bb_z:.2f})"
-            print(msg)
-            append_log("skip_bb", price, rsi_val, 0, msg)
+            print(f"[{symbol}] {msg}")
+            append_log(symbol, "skip_bb", price, rsi_val, 0, msg)
             return
 
         # All filters passed - calculate position size
@@ -449,8 +518,8 @@ def main() -> None:
         qty = int(notional / max(price, 1e-6))
         if qty <= 0:
             msg = "No entry: qty computed as 0"
-            print(msg)
-            append_log("no_entry_qty0", price, rsi_val, qty, msg)
+            print(f"[{symbol}] {msg}")
+            append_log(symbol, "no_entry_qty0", price, rsi_val, qty, msg)
             return
 
         stop_price = max(0.01, price - atr_val)
@@ -464,13 +533,13 @@ def main() -> None:
             from ml.shadow import is_enabled, shadow_log
             
             if is_enabled():
-                signal_id = f"trade_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                signal_id = f"trade_{utcnow().strftime('%Y%m%d_%H%M%S')}"
                 max_hold_bars = int(30 / 5)  # 30 min hold / 5 min bars = 6 bars
                 
                 ml_prediction = shadow_log(
                     signal_id=signal_id,
-                    timestamp=datetime.now(),
-                    symbol=args.symbol,
+                    timestamp=utcnow(),
+                    symbol=symbol,
                     side="buy",
                     entry_ref_price=price,
                     qty=qty,
@@ -499,36 +568,123 @@ def main() -> None:
             print(f"[ML SHADOW WARNING] {e} - continuing with trade")
         # ========================================================
 
-        o = api.submit_order(
-            symbol=args.symbol,
-            qty=qty,
-            side="buy",
-            type="market",
-            time_in_force="day",
-            order_class="bracket",
-            take_profit={"limit_price": round(tp_price, 2)},
-            stop_loss={"stop_price": round(stop_price, 2)},
-        )
+        if bar_close is not None:
+            # Latency budget: a signal acted on too long after its bar closed is stale
+            since_close = (utcnow() - bar_close).total_seconds()
+            if not metrics.check_budget(since_close):
+                msg = f"No entry: {since_close * 1000:.0f}ms after bar close exceeds budget {args.latency_budget_ms:.0f}ms"
+                print(f"[{symbol}] {msg}")
+                append_log(symbol, "skip_latency_budget", price, rsi_val, qty, msg)
+                return
+
+        with metrics.stage("order_submit"):
+            o = api.submit_order(
+                symbol=symbol,
+                qty=qty,
+                side="buy",
+                type="market",
+                time_in_force="day",
+                order_class="bracket",
+                take_profit={"limit_price": round(tp_price, 2)},
+                stop_loss={"stop_price": round(stop_price, 2)},
+            )
+        mirror.mark_orders_dirty()
+        state.last_entry_time = utcnow()
         msg = (
-            f"✅ ENTERED {qty} {args.symbol} @ ~{price:.2f} | "
+            f"✅ ENTERED {qty} {symbol} @ ~{price:.2f} | "
             f"RSI {rsi_val:.2f} (thresh={rsi_low:.0f}/{rsi_high:.0f}) | "
             f"vol_z={vol_z:.2f} | volm_z={volm_z:.2f} | "
-            f"ema200_rel={ema200_rel:.2f}% | bb_z={bb_z:.2f} | "
+            f"ema200_rel={ema200_rel:.2%} | bb_z={bb_z:.2f} | "
             f"TP {tp_price:.2f} | SL {stop_price:.2f} | ORDER {o.id}"
         )
-        print(msg)
-        append_log("enter", price, rsi_val, qty, msg)
-
-    while True:
-        try:
-            run_once()
-        except Exception as e:
-            err_msg = f"ERROR: {e}"
-            print(err_msg)
-            append_log("error", 0.0, 0.0, 0, err_msg)
-        if not args.loop:
-            break
-        time.sleep(max(60, args.sleep_min * 60))
+        print(f"[{symbol}] {msg}")
+        append_log(symbol, "enter", price, rsi_val, qty, msg)
+
+    async def evaluate(state: SymbolState, df: pd.DataFrame, equity: float, sem: asyncio.Semaphore) -> None:
+        async with sem:
+            t0 = time.perf_counter()
+            try:
+                await asyncio.to_thread(metrics.timed, "decide", decide, state, df, equity)
+                await asyncio.to_thread(metrics.timed, "snapshot_save", state.save_snapshot)
+            except Exception as e:
+                err_msg = f"ERROR: {e}"
+                print(f"[{state.symbol}] {err_msg}")
+                append_log(state.symbol, "error", 0.0, 0.0, 0, err_msg)
+            finally:
+                state.last_latency = time.perf_counter() - t0
+
+    async def run_cycle() -> None:
+        """One decision cycle: shared account sync, batched bars, concurrent per-symbol decisions."""
+        t0 = time.perf_counter()
+        _, bars = await asyncio.gather(
+            asyncio.to_thread(metrics.timed, "account_sync", mirror.sync),
+            asyncio.to_thread(
+                metrics.timed,
+                "bar_fetch",
+                fetch_bars_multi,
+                api,
+                symbols,
+                days=args.history_days,
+                feed=args.feed,
+                stores={s.symbol: s.store for s in states if s.store is not None},
+                # On the bar-close schedule, decide on the bar that just closed
+                include_partial=not args.loop,
+                end=utcnow(),
+            ),
+        )
+        for sym, df in bars.items():
+            if not df.empty:
+                mirror.update_mark(sym, float(df["close"].iloc[-1]))
+        equity = mirror.equity
+        t_fetch = time.perf_counter() - t0
+
+        sem = asyncio.Semaphore(max(1, args.max_concurrency))
+        await asyncio.gather(*(evaluate(s, bars[s.symbol], equity, sem) for s in states))
+
+        latencies = sorted(s.last_latency for s in states)
+        slowest = max(states, key=lambda s: s.last_latency)
+        print(
+            f"[CYCLE] {len(states)} symbol(s) in {time.perf_counter() - t0:.2f}s "
+            f"(account+bars {t_fetch:.2f}s, {mirror.rest_calls} account REST call(s), "
+            f"decide p50 {latencies[len(latencies) // 2]:.3f}s, max {slowest.last_latency:.3f}s {slowest.symbol})"
+        )
+        metrics.observe("cycle", time.perf_counter() - t0)
+
+    scheduler = BarCloseScheduler(
+        MarketCalendar(api),
+        interval_minutes=max(BAR_MINUTES, args.sleep_min),
+        settle_seconds=args.settle_sec,
+        now=utcnow,
+        sleep=sleep,
+    )
+    bar_close = None  # first cycle runs immediately to warm the cache and indicators
+    try:
+        while True:
+            try:
+                asyncio.run(run_cycle())
+            except Exception as e:
+                err_msg = f"ERROR: {e}"
+                print(err_msg)
+                for sym in symbols:
+                    append_log(sym, "error", 0.0, 0.0, 0, err_msg)
+            if args.metrics_file.lower() != "none":
+                metrics.write(args.metrics_file)
+            if bar_close is not None:
+                lag = scheduler.record_decision(bar_close)
+                print(
+                    f"[SCHED] Bar close {bar_close:%H:%M} UTC -> decision +{lag:.2f}s "
+                    f"(mean {scheduler.lag.mean:.2f}s, max {scheduler.lag.max:.2f}s)"
+                )
+            if not args.loop:
+                break
+            bar_close = scheduler.wait_for_next_close()
+    finally:
+        # Flush-on-shutdown, including Ctrl+C
+        trade_log.close()
+        if metrics_server is not None:
+            metrics_server.close()
+        if trade_log.dropped:
+            print(f"[WARNING] Trade log dropped {trade_log.dropped} row(s) (queue full)")
 
 
 if __name__ == "__main__":
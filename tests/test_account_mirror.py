@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pandas as pd
+
+from live.account_mirror import AccountMirror
+
+T0 = datetime(2024, 3, 4, 15, 0, tzinfo=timezone.utc)
+
+
+class FakeAPI:
+    """Broker with one fill already in the positions and one landing just after they were listed."""
+
+    def __init__(self):
+        self.fills = [
+            SimpleNamespace(id="f1", symbol="TSLA", side="buy", qty="10", price="100",
+                            transaction_time=(T0 - timedelta(minutes=5)).isoformat()),
+            SimpleNamespace(id="f2", symbol="TSLA", side="buy", qty="5", price="102",
+                            transaction_time=(T0 + timedelta(seconds=1)).isoformat()),
+        ]
+
+    def get_account(self):
+        return SimpleNamespace(cash="99000")
+
+    def list_positions(self):
+        return [SimpleNamespace(symbol="TSLA", qty="10", avg_entry_price="100", current_price="101")]
+
+    def get_activities(self, after=None, page_size=100, **kwargs):
+        return [f for f in self.fills if pd.Timestamp(f.transaction_time) > pd.Timestamp(after)][:page_size]
+
+    def list_orders(self, **kwargs):
+        return []
+
+
+def test_fill_after_the_positions_snapshot_is_applied_once():
+    clock = [T0]
+    mirror = AccountMirror(FakeAPI(), now=lambda: clock[0])
+    mirror.sync()
+
+    qty, avg = mirror.position("TSLA")
+    assert qty == 15.0
+    assert avg == (100 * 10 + 102 * 5) / 15
+    assert mirror.last_fill_time("TSLA") == T0 + timedelta(seconds=1)
+
+    clock[0] = T0 + timedelta(minutes=5)
+    mirror.sync()
+    assert mirror.position("TSLA")[0] == 15.0
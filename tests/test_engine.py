@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from backtest.data import build_features
+from backtest.engine import backtest_rsi
+from features.benchmark import synthetic_bars
+
+
+def reference_backtest(df, phase1_filters=False, phase2_enhancements=False, initial_capital=100000.0):
+    """The original per-bar ``iterrows`` loop, kept as the oracle for ``simulate``."""
+    capital, position, entry_price, entry_time = initial_capital, 0, 0, None
+    trades, equity_curve = [], []
+    start_of_day_equity, current_day = capital, None
+    position_size_pct, min_hold_minutes, daily_stop_pct = 0.0025, 30, -0.01
+    commission_bps, slippage_bps = 0.5, 2.0
+
+    def close_trade(idx, price, reason):
+        nonlocal capital, position, entry_price, entry_time
+        exit_price = price * (1 - slippage_bps / 10000)
+        exit_value = position * exit_price
+        commission = exit_value * (commission_bps / 10000)
+        capital += exit_value - commission
+        trades.append((entry_time, idx, entry_price, exit_price, position,
+                       (exit_price - entry_price) * position - commission, reason))
+        position, entry_price, entry_time = 0, 0, None
+
+    for idx, row in df.iterrows():
+        if current_day is None or idx.date() != current_day:
+            current_day = idx.date()
+            start_of_day_equity = capital + (position * row.close if position > 0 else 0)
+        current_equity = capital + (position * row.close if position > 0 else 0)
+        if (current_equity - start_of_day_equity) / start_of_day_equity <= daily_stop_pct:
+            if position > 0:
+                close_trade(idx, row.close, "daily_stop")
+            equity_curve.append(current_equity)
+            continue
+        if phase1_filters and (row.time_of_day < 10.0 or row.time_of_day > 15.5 or row.vol_z < 0.5):
+            equity_curve.append(current_equity)
+            continue
+        rsi_buy, rsi_sell = 25, 75
+        if phase2_enhancements:
+            if row.vol_z > 1.0:
+                rsi_buy, rsi_sell = 30, 70
+            elif row.vol_z < -0.5:
+                rsi_buy, rsi_sell = 20, 80
+        if position > 0 and row.rsi > rsi_sell:
+            if entry_time and (idx - entry_time).total_seconds() / 60 >= min_hold_minutes:
+                close_trade(idx, row.close, "rsi_exit")
+        if position == 0 and row.rsi < rsi_buy:
+            if (phase1_filters and row.volm_z < 1.0) or (
+                phase2_enhancements and (row.ema200_rel < -0.05 or row.bb_z > -0.8)
+            ):
+                equity_curve.append(current_equity)
+                continue
+            entry_price = row.close * (1 + slippage_bps / 10000)
+            position = int(current_equity * position_size_pct / entry_price)
+            if position > 0:
+                entry_value = position * entry_price
+                capital -= entry_value + entry_value * (commission_bps / 10000)
+                entry_time = idx
+        equity_curve.append(current_equity)
+    if position > 0:
+        close_trade(df.index[-1], df.iloc[-1].close, "end_of_test")
+    return trades, np.array(equity_curve)
+
+
+@pytest.fixture(scope="module")
+def features():
+    bars = synthetic_bars(8_000, seed=11)
+    # A low price so the 0.25% position buys several whole shares
+    bars[["open", "high", "low", "close"]] /= 4
+    return build_features(bars.tz_convert("America/New_York"))
+
+
+@pytest.mark.parametrize("phase1,phase2", [(False, False), (True, False), (False, True), (True, True)])
+def test_simulate_matches_reference_loop(features, phase1, phase2):
+    trades_df, equity_df, _ = backtest_rsi(features, phase1_filters=phase1, phase2_enhancements=phase2)
+    ref_trades, ref_equity = reference_backtest(features, phase1, phase2)
+
+    assert len(ref_trades) > 0
+    got = list(trades_df[["entry_time", "exit_time", "entry_price", "exit_price", "shares", "pnl", "exit_reason"]]
+               .itertuples(index=False, name=None))
+    assert got == ref_trades
+    np.testing.assert_array_equal(equity_df["equity"].to_numpy(), ref_equity)
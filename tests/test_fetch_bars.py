@@ -0,0 +1,38 @@
+import pandas as pd
+
+from features.benchmark import synthetic_bars
+from live.replay import MockAlpaca, SimClock
+from market_data.bar_store import BarStore
+from scripts.alpaca_rsi_bot import fetch_bars, fetch_bars_multi
+
+
+class SpyAlpaca(MockAlpaca):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.requests = []
+
+    def get_bars_iter(self, symbol, timeframe, start, end, **kwargs):
+        self.requests.append((tuple(symbol) if not isinstance(symbol, str) else (symbol,), pd.Timestamp(start)))
+        return super().get_bars_iter(symbol, timeframe, start, end, **kwargs)
+
+
+def test_cold_symbol_does_not_widen_the_warm_fetch(tmp_path):
+    bars = synthetic_bars(78 * 10, seed=1)
+    clock = SimClock(bars.index[-40], bars.index[-1])
+    api = SpyAlpaca({"TSLA": bars}, clock)
+    stores = {sym: BarStore(tmp_path, sym) for sym in ("TSLA", "BAD")}
+
+    first = fetch_bars_multi(api, ["TSLA", "BAD"], days=7, stores=stores, include_partial=False, end=clock.now())
+    assert first["BAD"].empty and not first["TSLA"].empty
+    cached_through = stores["TSLA"].last_timestamp
+
+    clock.sleep(30 * 60)
+    api.requests.clear()
+    second = fetch_bars_multi(api, ["TSLA", "BAD"], days=7, stores=stores, include_partial=False, end=clock.now())
+    warm = [start for syms, start in api.requests if "TSLA" in syms]
+    assert warm and all("BAD" not in syms for syms, start in api.requests if "TSLA" in syms)
+    assert min(warm) > cached_through
+    assert second["TSLA"].index[-1] == cached_through + pd.Timedelta(minutes=30)
+
+    single = fetch_bars(api, "TSLA", days=7, store=stores["TSLA"], include_partial=False, end=clock.now())
+    pd.testing.assert_frame_equal(single, second["TSLA"])
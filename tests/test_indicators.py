@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from features import indicators as ind
+from features.benchmark import synthetic_bars
+from features.streaming import StreamingFeatureEngine
+
+
+@pytest.fixture(scope="module")
+def bars():
+    return synthetic_bars(3_000, seed=3)
+
+
+def _batch(df):
+    return ind.compute_features(*(df[k].to_numpy() for k in ("open", "high", "low", "close", "volume")), df.index)
+
+
+def test_streaming_rows_equal_batch_features_bit_for_bit(bars):
+    batch = _batch(bars)
+    engine = StreamingFeatureEngine()
+    warm = 0
+    for i, (ts, bar) in enumerate(zip(bars.index, bars[["open", "high", "low", "close", "volume"]].to_numpy().tolist())):
+        row = engine.update(ts, *bar)
+        if row is None:
+            continue
+        warm += 1
+        for key, value in row.items():
+            assert value == batch[key][i] or (np.isnan(value) and np.isnan(batch[key][i])), (key, i)
+    assert warm > 2_000
+
+
+def test_revised_last_bar_replaces_it(bars):
+    head, last = bars.iloc[:-1], bars.iloc[-1]
+    revised = StreamingFeatureEngine()
+    revised.warm_up(head)
+    ohlcv = [float(last[k]) for k in ("open", "high", "low", "close", "volume")]
+    revised.update(bars.index[-1], ohlcv[0], ohlcv[1] * 1.01, ohlcv[2], ohlcv[3] * 1.01, ohlcv[4])
+    row = revised.update(bars.index[-1], *ohlcv)
+
+    fresh = StreamingFeatureEngine()
+    assert fresh.warm_up(bars) == row
+
+
+def test_incremental_kernels_match_batch(bars):
+    close = bars["close"].to_numpy()
+    rsi = ind.WilderRSI()
+    streamed = np.array([np.nan if (v := rsi.update(c)) is None else v for c in close.tolist()])
+    np.testing.assert_array_equal(streamed, ind.rsi(close))
+
+    ema = ind.EMA(200)
+    np.testing.assert_array_equal([ema.update(c) for c in close.tolist()], ind.ema(close, 200))
+
+
+def test_kernels_accept_empty_input():
+    empty = np.empty(0)
+    assert len(ind.rsi(empty)) == 0
+    assert len(ind.ema(empty, 20)) == 0
+    assert len(ind.atr(empty, empty, empty)) == 0
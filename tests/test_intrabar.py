@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+from backtest.intrabar import NO_TOUCH, STOP, TAKE_PROFIT, IntrabarBars
+
+
+def _minute_data(n_bars=200, seed=5):
+    rng = np.random.default_rng(seed)
+    idx = pd.date_range("2024-03-04 09:30", periods=n_bars * 5, freq="1min", tz="America/New_York")
+    close = 100 + np.cumsum(rng.normal(0, 0.05, len(idx)))
+    open_ = np.r_[close[0], close[:-1]] + rng.normal(0, 0.03, len(idx))  # gaps between minutes
+    minutes = pd.DataFrame({
+        "open": open_,
+        "high": np.maximum(open_, close) + rng.uniform(0, 0.05, len(idx)),
+        "low": np.minimum(open_, close) - rng.uniform(0, 0.05, len(idx)),
+        "close": close,
+    }, index=idx)
+    # Drop random minutes and every minute of a few whole bars
+    keep = rng.random(len(idx)) > 0.1
+    keep[5 * 17:5 * 18] = keep[5 * 90:5 * 91] = False
+    bars = minutes.resample("5min").agg({"open": "first", "high": "max", "low": "min", "close": "last"})
+    return bars, minutes[keep]
+
+
+def _brute_force(bars, minutes, i, stop, take_profit):
+    start = bars.index[i]
+    inside = minutes[(minutes.index >= start) & (minutes.index < start + pd.Timedelta(minutes=5))]
+    if inside.empty:
+        inside = bars.iloc[[i]]
+    for m in inside.itertuples():
+        if m.low <= stop:
+            return STOP, min(stop, m.open)
+        if m.high >= take_profit:
+            return TAKE_PROFIT, max(take_profit, m.open)
+    return NO_TOUCH, np.nan
+
+
+def test_first_touch_matches_minute_scan():
+    bars, minutes = _minute_data()
+    ib = IntrabarBars(bars.index, bars, minutes)
+
+    rng = np.random.default_rng(9)
+    q = rng.integers(0, len(bars), 2_000)
+    mid = bars["close"].to_numpy()[q]
+    stop = mid - rng.uniform(0, 0.3, len(q))
+    take_profit = mid + rng.uniform(0, 0.3, len(q))
+    stop[::7] = -np.inf
+    take_profit[::11] = np.inf
+
+    kind, price = ib.first_touch(q, stop, take_profit)
+    expected = [_brute_force(bars, minutes, i, s, t) for i, s, t in zip(q, stop, take_profit)]
+    np.testing.assert_array_equal(kind, [k for k, _ in expected])
+    np.testing.assert_array_equal(price, [p for _, p in expected])
+    assert {STOP, TAKE_PROFIT, NO_TOUCH} <= set(kind.tolist())
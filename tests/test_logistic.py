@@ -0,0 +1,46 @@
+import json
+from math import exp
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from experts.logistic import CompiledLogistic
+
+MODELS = Path(__file__).resolve().parents[1] / "models"
+
+
+def _dict_score(model, features):
+    """The per-call dict formula the experts used before models were compiled."""
+    z = float(model.get("bias", 0.0))
+    for name, w in model["weights"].items():
+        z += float(w) * float(features.get(name, 0.0))
+    return 1.0 / (1.0 + exp(-z))
+
+
+@pytest.mark.parametrize("name", ["rsi_expert", "macd_expert", "trend_expert", "brain"])
+def test_compiled_model_matches_dict_formula(name):
+    model = json.loads((MODELS / f"{name}.json").read_text())
+    compiled = CompiledLogistic.from_model(model)
+    rng = np.random.default_rng(1)
+    names = list(model["weights"])
+    rows = [{n: float(v) for n, v in zip(names, rng.normal(0, 2, len(names)))} for _ in range(200)]
+    rows[0].pop(names[0])  # a missing feature scores as 0.0
+
+    single = [compiled.predict_proba(r) for r in rows]
+    assert single == [_dict_score(model, r) for r in rows]
+
+    # Shuffled, partial DataFrame columns are matched by name
+    frame = pd.DataFrame(rows)[names[::-1]].fillna(0.0)
+    np.testing.assert_allclose(compiled.predict_proba_batch(frame), single, rtol=0, atol=1e-15)
+
+
+def test_from_model_and_matrix_contract():
+    assert CompiledLogistic.from_model({"type": "tree"}) is None
+    compiled = CompiledLogistic(["a", "b"], [1.0, -2.0], bias=0.5, defaults=[0.0, 3.0])
+    np.testing.assert_array_equal(compiled.matrix(np.array([[1.0]]), columns=["a"]), [[1.0, 3.0]])
+    with pytest.raises(ValueError):
+        compiled.predict_proba_batch(np.ones(2))
+    with pytest.raises(ValueError):
+        compiled.predict_proba_batch(np.ones((1, 3)))
@@ -0,0 +1,114 @@
+import json
+import math
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from ensemble.brain import Brain
+from ensemble.pipeline import ScoringPipeline
+from experts.macd_expert import MACDExpert
+from experts.rsi_expert import RSIExpert
+from experts.trend_expert import TrendExpert
+from features.feature_builder import build_features
+
+MODELS_DIR = Path(__file__).resolve().parents[1] / "models"
+MODELS = {name: json.loads((MODELS_DIR / f"{name}.json").read_text()) for name in ("rsi_expert", "macd_expert", "trend_expert", "brain")}
+
+
+def _indicator(value, ready=True):
+    return SimpleNamespace(IsReady=ready, Current=SimpleNamespace(Value=value))
+
+
+def _context(price=100.0, hour=10, minute=48):
+    macd = _indicator(0.4)
+    macd.Signal = _indicator(0.1)
+    return SimpleNamespace(
+        symbol="SPY",
+        Securities={"SPY": SimpleNamespace(Price=price)},
+        Time=datetime(2024, 3, 4, hour, minute),
+        rsi=_indicator(28.0),
+        macd=macd,
+        atr=_indicator(0.8),
+        ema20=_indicator(101.0),
+        ema50=_indicator(99.0),
+        ema200=_indicator(95.0),
+        bb=SimpleNamespace(
+            IsReady=True,
+            MiddleBand=_indicator(101.0),
+            UpperBand=_indicator(103.0),
+            LowerBand=_indicator(99.0),
+        ),
+    )
+
+
+def _pipeline():
+    return ScoringPipeline(
+        {"rsi": MODELS["rsi_expert"], "macd": MODELS["macd_expert"], "trend": MODELS["trend_expert"]},
+        MODELS["brain"],
+    )
+
+
+def _logit(model, features):
+    return model["bias"] + sum(w * features.get(n, 0.0) for n, w in model["weights"].items())
+
+
+def test_build_features_dict_scores_like_hand_computed_logit():
+    features = build_features(_context())
+    assert features["time_of_day"] == pytest.approx(10.8 / 24)
+
+    probs = {
+        name: 1 / (1 + math.exp(-_logit(MODELS[f"{name}_expert"], features)))
+        for name in ("rsi", "macd", "trend")
+    }
+    w = MODELS["brain"]["weights"]
+    hours = 10.8
+    z = (
+        MODELS["brain"]["bias"]
+        + sum(w[f"experts.{name}"] * p for name, p in probs.items())
+        + w["regime.volatility"] * features["atr_pct"]
+        + w["regime.vol_z"] * features["vol_z"]
+        + w["regime.tod_sin"] * math.sin(2 * math.pi * hours / 24)
+        + w["regime.tod_cos"] * math.cos(2 * math.pi * hours / 24)
+    )
+
+    scored = _pipeline().evaluate(features)
+    assert scored["experts"] == pytest.approx(probs, abs=1e-12)
+    assert scored["p"] == pytest.approx(1 / (1 + math.exp(-z)), abs=1e-12)
+
+
+def test_experts_match_per_expert_scoring_and_batch_matches_single():
+    pipeline = _pipeline()
+    experts = {
+        "rsi": RSIExpert(MODELS["rsi_expert"]),
+        "macd": MACDExpert(MODELS["macd_expert"]),
+        "trend": TrendExpert(MODELS["trend_expert"]),
+    }
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(200, len(pipeline.feature_names)))
+    X[:, pipeline.index["time_of_day"]] = rng.uniform(9.5, 16, 200) / 24
+    rows = [dict(zip(pipeline.feature_names, r)) for r in X.tolist()]
+
+    single = [pipeline.evaluate(f) for f in rows]
+    for f, scored in zip(rows, single):
+        assert scored["experts"] == {name: e.predict_proba(f) for name, e in experts.items()}
+    np.testing.assert_allclose(pipeline.predict_proba_batch(X), [s["p"] for s in single], rtol=0, atol=1e-15)
+
+
+def test_averaging_brain_matches_brain_class():
+    pipeline = ScoringPipeline({"rsi": MODELS["rsi_expert"], "macd": None}, {"type": "avg"})
+    features = {"rsi": 30.0, "bb_z": -1.0}
+    scored = pipeline.evaluate(features)
+    assert scored["experts"]["macd"] == 0.5
+    assert scored["p"] == Brain({"type": "avg"}).predict_proba(scored["experts"], {})
+
+
+def test_unknown_brain_weight_raises():
+    brain = dict(MODELS["brain"], weights={**MODELS["brain"]["weights"], "regime.tod_sine": 1.0})
+    experts = {"rsi": MODELS["rsi_expert"], "macd": MODELS["macd_expert"], "trend": MODELS["trend_expert"]}
+    with pytest.raises(ValueError, match="regime.tod_sine"):
+        ScoringPipeline(experts, brain)
+    with pytest.raises(ValueError, match="experts.macd"):
+        ScoringPipeline({"rsi": MODELS["rsi_expert"]}, MODELS["brain"])
@@ -0,0 +1,37 @@
+import contextlib
+import io
+
+import pandas as pd
+import pytest
+
+from features.benchmark import synthetic_bars
+from live.replay import EXCHANGE_TZ, MockAlpaca, ReplayFinished, SimClock
+from scripts.alpaca_rsi_bot import main as bot_main
+
+
+@pytest.fixture(scope="module")
+def bars():
+    df = synthetic_bars(78 * 20, seed=4)
+    df[["open", "high", "low", "close"]] /= 4  # whole shares at the bot's 0.25% cap
+    return {"TSLA": df}
+
+
+def _replay(bars, tmp_path, run):
+    days = sorted({ts.tz_convert(EXCHANGE_TZ).normalize() for ts in bars["TSLA"].index})
+    start, end = days[15] + pd.Timedelta(hours=9, minutes=30), days[17] + pd.Timedelta(days=1)
+    clock = SimClock(start, end)
+    api = MockAlpaca(bars, clock)
+    argv = [
+        "--symbols", "TSLA", "--loop", "--no-cache", "--no-state", "--history-days", "14",
+        "--log-file", str(tmp_path / f"log{run}.csv"), "--metrics-file", str(tmp_path / f"metrics{run}.prom"),
+    ]
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.suppress(ReplayFinished):
+        bot_main(argv, api=api, clock=clock)
+    return api
+
+
+def test_replay_is_deterministic(bars, tmp_path):
+    first, second = _replay(bars, tmp_path, 1), _replay(bars, tmp_path, 2)
+    assert first.cycles > 0 and first.fills
+    assert first.fills == second.fills
+    assert first.get_account().equity == second.get_account().equity
@@ -0,0 +1,35 @@
+import json
+
+import numpy as np
+
+from ml.shadow import ShadowWriter
+
+
+def test_writer_survives_unserializable_row(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # ml_shadow_errors.log lands here
+    path = tmp_path / "log.jsonl"
+    writer = ShadowWriter(fsync_interval=0.05)
+    try:
+        assert writer.enqueue(path, {"n": 1})
+        assert writer.enqueue(path, {"bad": np.float32(1.5)})
+        assert writer.enqueue(path, {"n": 2})
+        assert writer.flush(timeout=5)
+        assert writer._thread.is_alive()
+        assert writer.stats()["written"] == 2
+        assert writer.stats()["errors"] == 1
+        assert [json.loads(line) for line in path.read_text().splitlines()] == [{"n": 1}, {"n": 2}]
+        assert (tmp_path / "ml_shadow_errors.log").exists()
+    finally:
+        writer.close()
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    writer = ShadowWriter(max_queue=1, fsync_interval=0.05)
+    try:
+        results = [writer.enqueue(tmp_path / "log.jsonl", {"i": i}) for i in range(1000)]
+        assert writer.flush(timeout=5)
+        stats = writer.stats()
+        assert stats["written"] + stats["dropped"] == 1000
+        assert stats["dropped"] == results.count(False)
+    finally:
+        writer.close()
@@ -0,0 +1,49 @@
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from features.benchmark import synthetic_bars
+from features.snapshot import SnapshotError, dumps_snapshot, load_snapshot, loads_snapshot, save_snapshot
+from features.streaming import StreamingFeatureEngine
+
+COLS = ["open", "high", "low", "close", "volume"]
+
+
+@pytest.fixture(scope="module")
+def bars():
+    return synthetic_bars(1_500, seed=7)
+
+
+def _same_row(a, b):
+    assert a.keys() == b.keys()
+    for key in a:
+        assert a[key] == b[key] or (np.isnan(a[key]) and np.isnan(b[key])), key
+
+
+def test_restored_engine_continues_bit_for_bit(bars, tmp_path):
+    head, tail = bars.iloc[:1_000], bars.iloc[1_000:]
+    original = StreamingFeatureEngine()
+    original.warm_up(head)
+    save_snapshot(tmp_path / "tsla.snap", original, "tsla", strategy={"trail_stop": 101.25})
+
+    restored = StreamingFeatureEngine()
+    assert load_snapshot(tmp_path / "tsla.snap", restored, "TSLA") == {"trail_stop": 101.25}
+    assert dumps_snapshot(restored, "TSLA") == dumps_snapshot(original, "TSLA")
+
+    for ts, bar in zip(tail.index, tail[COLS].to_numpy().tolist()):
+        _same_row(restored.update(ts, *bar), original.update(ts, *bar))
+
+
+def test_tampered_snapshot_is_rejected(bars):
+    engine = StreamingFeatureEngine()
+    engine.warm_up(bars.iloc[:300])
+    text = dumps_snapshot(engine, "TSLA")
+
+    with pytest.raises(SnapshotError, match="Checksum"):
+        loads_snapshot(text.replace('"symbol":"TSLA"', '"symbol":"TSLB"'), StreamingFeatureEngine(), "TSLA")
+    with pytest.raises(SnapshotError, match="not AAPL"):
+        loads_snapshot(text, StreamingFeatureEngine(), "AAPL")
+    with pytest.raises(SnapshotError, match="stale"):
+        loads_snapshot(text, StreamingFeatureEngine(), "TSLA",
+                       now=engine.last_timestamp + timedelta(days=2), max_age=timedelta(days=1))